@@ -0,0 +1,124 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict
+
+# 동시에 실행할 에이전트 수와 대기열 크기
+MAX_INFLIGHT_RUNS = int(os.getenv("MAX_INFLIGHT_RUNS", "8"))
+MAX_QUEUED_RUNS = int(os.getenv("MAX_QUEUED_RUNS", "64"))
+
+
+class QueueFullError(Exception):
+    """대기열이 가득 찬 경우 (HTTP 429 로 응답)"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"요청이 많아 잠시 후 다시 시도해주세요. (Retry-After: {retry_after}s)")
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """에이전트 실행 슬롯 (release 는 여러 번 호출해도 한 번만 반영)"""
+
+    def __init__(self, controller: "AdmissionController", wait_time: float):
+        self.controller = controller
+        self.wait_time = wait_time
+        self.started = time.monotonic()
+        self.released = False
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        self.controller._release(time.monotonic() - self.started)
+
+
+class AdmissionController:
+    """에이전트 실행 수 제한 + 세션별 공정 대기열
+
+    실행 중인 에이전트가 max_inflight 개를 넘으면 세션별 대기열에 넣고,
+    슬롯이 비면 세션을 돌아가며(round-robin) 하나씩 실행합니다.
+    한 세션이 요청을 몰아 보내도 다른 세션의 대기 시간이 늘어나지 않습니다.
+    """
+
+    def __init__(self, max_inflight: int = MAX_INFLIGHT_RUNS, max_queue: int = MAX_QUEUED_RUNS):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.inflight = 0
+        self.queued = 0
+        self.waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.avg_run = 1.0  # 실행 시간 지수 이동 평균 (초)
+
+    def retry_after(self) -> int:
+        """대기열이 비기까지 예상 시간 (초)"""
+        return max(1, math.ceil(self.avg_run * (self.queued + 1) / self.max_inflight))
+
+    async def acquire(self, session_id: str) -> Ticket:
+        """실행 슬롯 획득 (대기열이 가득 차면 QueueFullError)"""
+        enqueued = time.monotonic()
+        if self.inflight < self.max_inflight and not self.queued:
+            self.inflight += 1
+        else:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise QueueFullError(self.retry_after())
+            future = asyncio.get_running_loop().create_future()
+            self.waiters.setdefault(session_id, deque()).append(future)
+            self.queued += 1
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # 슬롯을 받은 직후 취소된 경우 반납
+                    self._release(0.0, record=False)
+                else:
+                    self._discard(session_id, future)
+                raise
+
+        wait = time.monotonic() - enqueued
+        self.admitted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return Ticket(self, wait)
+
+    def _discard(self, session_id: str, future: asyncio.Future):
+        queue = self.waiters.get(session_id)
+        if queue and future in queue:
+            queue.remove(future)
+            self.queued -= 1
+            if not queue:
+                del self.waiters[session_id]
+
+    def _release(self, duration: float, record: bool = True):
+        if record:
+            self.avg_run = 0.8 * self.avg_run + 0.2 * duration
+        # 다음 세션에게 슬롯을 넘김 (세션 순서대로 하나씩)
+        while self.waiters:
+            session_id, queue = self.waiters.popitem(last=False)
+            future = queue.popleft()
+            self.queued -= 1
+            if queue:
+                self.waiters[session_id] = queue
+            if not future.done():
+                future.set_result(None)
+                return
+        self.inflight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """대기열 지표"""
+        return {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "queued_sessions": len(self.waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_queue_wait_ms": round(self.total_wait / self.admitted * 1000, 2) if self.admitted else 0.0,
+            "max_queue_wait_ms": round(self.max_wait * 1000, 2),
+        }
@@ -1,34 +1,59 @@
 import asyncio
-import nest_asyncio
 import json
+import logging
 import os
 import platform
 import uuid
 import time
-from typing import List, Optional, Dict, Any, AsyncGenerator
+from typing import List, Optional, Dict, Any, AsyncGenerator, Tuple
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, Header, Response
+from fastapi.responses import StreamingResponse, JSONResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
-import uvicorn
 
-from langgraph.prebuilt import create_react_agent
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, AIMessage
 from dotenv import load_dotenv
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langchain_core.messages.ai import AIMessageChunk
 from langchain_core.messages.tool import ToolMessage
-from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.runnables import RunnableConfig
 
-from fastapi import FastAPI, HTTPException, Request, Header
-from typing import Optional
+from reservation_store import ReservationStore
+from state_backend import create_backend
+from session_manager import SessionManager, empty_usage
+from admission import AdmissionController, QueueFullError, Ticket
+from sheets_throttle import SheetsThrottle
+from sheets_cache import SheetsCache
+from tool_registry import ToolRegistry
+import intent
+from intent import acknowledgement, DEFAULT_ACKNOWLEDGEMENT
+import metrics
+from metrics import (
+    TIME_TO_FIRST_TOKEN, PROMPT_TOKENS, QUEUE_WAIT, REQUESTS, TOKENS,
+    ACTIVE_SESSIONS, INFLIGHT_RUNS, QUEUED_RUNS, MetricsCallback, timed_tool,
+)
+from structured_log import log_event, setup_logging, shutdown_logging, elapsed_ms
+from prompts import PromptBuilder, new_prompt_usage, count_tokens
+from conversation_context import ConversationContext
+from tracing import tracer, TracingCallback, traced_tool, new_trace_id, trace_id_of
+from startup import Readiness, NotReadyError, READY_WAIT, preload, retry_until_ready, warm_openai
+from sse import ChunkEncoder, batch_tokens, SSE_DONE, SSE_HEADERS, SSE_MEDIA_TYPE
+
+# 에이전트 초기화 때만 쓰는 무거운 모듈 (import 에 수백 ms, 시작 준비 중 스레드에서 미리 읽음)
+# langchain_openai, langgraph.prebuilt, mcp_pool(langchain_mcp_adapters), checkpointer(langgraph.checkpoint)
+AGENT_MODULES = ("langgraph.prebuilt", "checkpointer")
+MODEL_MODULES = ("langchain_openai",)
+MCP_MODULES = ("mcp_pool",)
 
 # 환경 변수 설정
 load_dotenv(override=True)
 
+# MCP 서버 설정 파일 (오프라인 테스트: MCP_CONFIG_PATH=config.mock.json)
+CONFIG_FILE_PATH = os.getenv("MCP_CONFIG_PATH", "config.json")
+
+# 슬롯이 모두 채워진 예약/취소/조회 요청은 LLM 없이 바로 처리 (INTENT_ROUTER=off 로 비활성화)
+INTENT_ROUTER = os.getenv("INTENT_ROUTER", "on") != "off"
+
 # Pydantic 모델 정의 (OpenAI API 호환)
 class ChatMessage(BaseModel):
     role: str = Field(..., description="메시지 역할 (system, user, assistant)")
@@ -55,108 +80,119 @@ class ChatCompletionResponse(BaseModel):
     choices: List[ChatCompletionChoice]
     usage: Optional[Dict[str, int]] = None
 
-SYSTEM_PROMPT = """<ROLE>
-You are hair shop reservation agent with an ability to use tools.
-You will be given a question and you will use the tools to answer the question.
-Pick the most relevant tool to answer the question.
-If you are failed to answer the question, try different tools to get context.
-Answer as if you’re talking to a customer on the phone — keep it polite and conversational.
-</ROLE>
-
-----
-
-<INSTRUCTIONS>
-Step 1: Analyze the question
-- Analyze user's question and final goal.
-- If the user's question is consist of multiple sub-questions, split them into smaller sub-questions.
-
-Step 2: Pick the most relevant tool
-- Pick the most relevant tool to answer the question.
-- If you are failed to answer the question, try different tools to get context.
-
-Step 3: Answer the question
-- Answer the question in the same language as the question.
-- Answer as if you’re talking to a customer on the phone — keep it polite and conversational.
-
-Step 4: Provide the source of the answer(if applicable)
-- If you've used the tool, provide the source of the answer.
-- Valid sources are either a website(URL) or a document(PDF, etc).
-
-Guidelines:
-- Answer in the same language as the question.
-- Answer should be concise and to the point.
-- Avoid response your output with any other information than the answer and the source.  
-- Use the format 2025-MM-DD to record the reservation date. This year is 2025. Do not change it.
-</INSTRUCTIONS>
-
-<PROCESS>
-A. 예약하기
-    1. 문서ID는 "1lXs3JrOuvBSew2EJUZhEeaEQfGaSqIcuKcVicOkRxMQ" 시트의 이름은 "시트1"입니다.
-    2. 성명, 예약일, 예약시간, 시술 종류는 필수요소입니다. 정보가 부족하다면 정중하게 요청하세요.
-    3. 필요한 정보가 다 수집되었다면 get_sheet_data 툴을 활용하여 기존 예약 목록을 확인하세요.
-    4. 예약일과 예약시간이 모두 동일한 정보가 존재한다면, 예약을 절대 진행하지 마세요.
-       - 중복 예약이 감지되었을 경우 반드시 다음과 같이 응답하세요:
-         - "해당 시간에는 이미 예약이 있습니다. 다른 시간대를 선택해주세요."
-       - 가능한 다른 시간대를 2~3개 추천하세요.
-    5. 중복 예약이 없음을 확인한 후, 빈 행을 탐색하여 해당 위치에 정보를 기입하세요.
-    6. update_cells 툴을 활용하여 새로운 예약정보를 정확히 입력하세요.
-B. 예약 취소하기
-    1. 문서ID는 "1lXs3JrOuvBSew2EJUZhEeaEQfGaSqIcuKcVicOkRxMQ" 시트의 이름은 "시트1"입니다.
-    2. get_sheet_data 툴을 활용하여 취소를 요청받은 이름을 탐색합니다.
-    3. 해당 이름이 있는 행의 정보를 지웁니다.
-    4. 하나의 행이 비게 되므로 그 아래 내용들을 위로 한 칸씩 당깁니다.
-   
-</PROCESS>
-
-----
-
-<OUTPUT_FORMAT>
-(concise answer to the question)
-
-**Source**(if applicable)
-- (source1: valid URL)
-- (source2: valid URL)
-- ...
-</OUTPUT_FORMAT>
-"""
-
-
 class HospitalReservationAgent:
     def __init__(self):
         self.agent = None
-        self.client = None
-        self.sessions = {}  # 세션별 설정 저장
+        self.client = None  # MCP 클라이언트 풀 (호출마다 쉬는 클라이언트를 빌려 씀)
+        self.backend = create_backend()  # 워커 간 공유 상태 (STATE_BACKEND=local 이면 None)
+        self.context = ConversationContext()  # 세션별 최근 턴 + 요약 + 고정 예약 슬롯
+        self.prompt = PromptBuilder("reservation_tools", context=self.context)  # 고정 접두부 + 매장별 접미부
+        self.sessions = SessionManager(on_evict=self._forget_session, backend=self.backend)  # 세션별 설정 저장
+        self.store = ReservationStore(backend=self.backend)  # 로컬 예약 인덱스 (공유 저장소와 동기화)
+        self.throttle = SheetsThrottle()  # Sheets 쿼터 조절 + 쓰기 병합
+        self.cache = SheetsCache(backend=self.backend)  # get_sheet_data 읽기 캐시 (쿼터 조절보다 바깥, 쓰기 세대는 워커 간 공유)
+        self.registry = ToolRegistry()  # MCP 도구 입력 스키마 (잘못된 인자는 원격 호출 전에 거절)
+        self.metrics_callback = MetricsCallback()  # ReAct 단계별 모델/도구 호출 시간
+        self.tracing_callback = TracingCallback()  # 요청별 모델/도구 호출 스팬
+        self.store.use(timed_tool)  # 실제 MCP 왕복 시간 (가장 안쪽)
+        self.store.use(self.throttle)
+        self.store.use(self.cache)
+        self.store.use(self.registry)
+        self.store.use(traced_tool)  # MCP 호출 스팬 (캐시 적중/재시도 포함, 가장 바깥)
+        self.checkpointer = None  # 세션별 대화 상태 저장소
+        self.eviction_tasks = set()  # 백그라운드 세션 상태 삭제 (GC 방지용 참조)
+        
+    def _create_model(self):
+        """OpenAI 모델 사용 (부하 테스트: LLM_BACKEND=fake)"""
+        if os.getenv("LLM_BACKEND") == "fake":
+            from fake_llm import ScriptedChatModel
+            model = ScriptedChatModel(
+                latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "0")),
+                token_delay_ms=float(os.getenv("FAKE_LLM_TOKEN_DELAY_MS", "0")),
+            )
+            print("🤖 가짜 모델(ScriptedChatModel) 초기화 완료")
+        else:
+            from langchain_openai import ChatOpenAI
+            model = ChatOpenAI(
+                model='gpt-4o-mini',
+                temperature=0,
+                stream_usage=True,  # 스트리밍 응답에도 실제 토큰 사용량 포함
+            )
+            print("🤖 OpenAI 모델 초기화 완료")
+        return model
+    
+    async def initialize(self, readiness: Optional[Readiness] = None):
+        """에이전트 초기화
         
-    async def initialize(self):
-        """에이전트 초기화"""
+        MCP 서버 연결, OpenAI HTTP 연결, 예약 데이터 로드를 asyncio.gather 로 동시에 진행하고
+        단계별 결과를 readiness 에 기록합니다. 예약 데이터는 공유 저장소에 있으면 MCP 연결을
+        기다리지 않고, 없으면 MCP 연결 후 시트에서 읽습니다 (실패해도 첫 조회 시 다시 시도).
+        """
+        readiness = readiness or Readiness()
         try:
             print("🔄 에이전트 초기화 시작...")
             
             # config.json 파일 로드
-            with open("config.json", 'r', encoding='utf-8') as f:
+            with open(CONFIG_FILE_PATH, 'r', encoding='utf-8') as f:
                 mcp_config = json.load(f)
-                print(f"✅ config.json 로드 완료")
+                print(f"✅ {CONFIG_FILE_PATH} 로드 완료")
             
-            # MCP 클라이언트 초기화
-            self.client = MultiServerMCPClient(mcp_config)
-            await self.client.__aenter__()
-            tools = self.client.get_tools()
+            fake = os.getenv("LLM_BACKEND") == "fake"
+            mcp_ready = asyncio.Event()
             
-            print(f"🔧 도구 로드 완료: {len(tools)}개")
+            async def start_mcp():
+                # MCP 클라이언트 풀 초기화 (서버 프로세스 N 벌 실행 + 도구 목록 조회)
+                try:
+                    async with readiness.step("mcp"):
+                        await preload(*MCP_MODULES)
+                        from mcp_pool import MCPClientPool
+                        self.client = MCPClientPool(mcp_config)
+                        await self.client.start()
+                        self.registry.register(self.client.server_tools(), self.client.server_versions())
+                        tools = self.store.bind(self.client.get_tools())
+                        print(f"🔧 도구 로드 완료: {len(tools)}개")
+                        return tools
+                finally:
+                    mcp_ready.set()
             
-            # OpenAI 모델 사용
-            model = ChatOpenAI(
-                model='gpt-4o-mini',
-                temperature=0
-            )
-            print("🤖 OpenAI 모델 초기화 완료")
+            async def warm_model():
+                async with readiness.step("llm"):
+                    if not fake:
+                        await preload(*MODEL_MODULES)
+                    model = self._create_model()
+                    await warm_openai(model)
+                    return model
+            
+            async def load_reservations():
+                async with readiness.step("reservations", required=False):
+                    if not await self.store.load_shared():
+                        await mcp_ready.wait()
+                        if not self.store.calls:
+                            raise RuntimeError("MCP 연결 실패로 시트를 읽지 못했습니다")
+                        await self.store.load()
+            
+            steps = [
+                asyncio.ensure_future(step)
+                for step in (start_mcp(), warm_model(), load_reservations(), preload(*AGENT_MODULES))
+            ]
+            try:
+                tools, model, _, _ = await asyncio.gather(*steps)
+            except Exception:
+                # 필수 단계가 실패하면 나머지 단계도 멈추고 다음 재시도에서 처음부터 진행
+                for step in steps:
+                    step.cancel()
+                raise
             
-            # 에이전트 생성
+            # 에이전트 생성 (세션별 대화 상태는 SQLite 또는 공유 저장소에 저장)
+            from checkpointer import create_checkpointer
+            from langgraph.prebuilt import create_react_agent
+            self.checkpointer = create_checkpointer(self.backend)
             self.agent = create_react_agent(
                 model,
                 tools,
-                # checkpointer=MemorySaver(),
-                prompt=SYSTEM_PROMPT,
+                checkpointer=self.checkpointer,
+                prompt=self.prompt,
+                pre_model_hook=self.context.trim,  # 체크포인트에 저장되는 대화 길이 제한
             )
             print("🎯 에이전트 생성 완료")
             
@@ -166,90 +202,300 @@ class HospitalReservationAgent:
     
     async def cleanup(self):
         """리소스 정리"""
+        if self.eviction_tasks:
+            # 체크포인터를 닫기 전에 진행 중인 세션 상태 삭제를 마침
+            await asyncio.gather(*self.eviction_tasks, return_exceptions=True)
         if self.client:
             try:
-                await self.client.__aexit__(None, None, None)
-                print("🧹 MCP 클라이언트 정리 완료")
+                await self.client.close()
+                print("🧹 MCP 클라이언트 풀 정리 완료")
             except Exception as e:
                 print(f"⚠️ 클라이언트 정리 중 오류: {e}")
+        if self.checkpointer:
+            self.checkpointer.close()
+        if self.backend:
+            self.backend.close()
+    
+    def _forget_session(self, session_id: str):
+        """세션 제거 시 체크포인터 상태와 대화 요약도 함께 삭제
+
+        세션 제거는 요청 처리 중(SessionManager.get)에 일어나므로, 체크포인터 삭제(SQLite 쓰기 트랜잭션)와
+        공유 저장소 조회는 이벤트 루프를 막지 않도록 백그라운드 스레드에서 실행합니다.
+        """
+        self.context.forget(session_id)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._delete_session_state(session_id)
+            return
+        task = loop.create_task(asyncio.to_thread(self._delete_session_state, session_id))
+        self.eviction_tasks.add(task)
+        task.add_done_callback(self.eviction_tasks.discard)
+
+    def _delete_session_state(self, session_id: str):
+        """제거된 세션의 체크포인터 상태 삭제 (다시 사용되었거나 다른 워커에서 사용 중이면 유지)"""
+        try:
+            if session_id in self.sessions or self.sessions.is_active_elsewhere(session_id):
+                return
+            if self.checkpointer:
+                self.checkpointer.delete_thread(session_id)
+        except Exception as e:
+            print(f"⚠️ 세션 상태 삭제 중 오류 ({session_id}): {e}")
     
     def get_session_config(self, session_id: str) -> RunnableConfig:
         """세션별 설정 반환"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = RunnableConfig(
-                configurable={"thread_id": session_id}
+        return self.sessions.get(session_id)
+    
+    async def run_direct(self, route: Dict[str, Any]) -> Dict[str, Any]:
+        """라우터가 고른 예약 도구를 LLM 없이 바로 실행"""
+        slots = route["slots"]
+        if route["intent"] == "book":
+            result = await self.store.append_reservation(
+                slots["name"], slots["date"], slots["time"], slots["service"]
+            )
+        elif route["intent"] == "cancel":
+            result = await self.store.cancel_reservation(
+                slots["name"], slots.get("date", ""), slots.get("time", "")
             )
-        return self.sessions[session_id]
+        else:
+            result = await self.store.find_reservations(slots["name"])
+        return json.loads(result)
+    
+    async def stream_chat(
+        self, messages: List[ChatMessage], session_id: str, trace_id: Optional[str] = None
+    ) -> AsyncGenerator[str, None]:
+        """스트리밍 방식으로 대화하기 (응답 텍스트만 전달)"""
+        async for event, data in self.stream_events(messages, session_id, trace_id):
+            if event == "token":
+                yield data
     
-    async def stream_chat(self, messages: List[ChatMessage], session_id: str) -> AsyncGenerator[str, None]:
-        """스트리밍 방식으로 대화하기"""
+    async def stream_events(
+        self, messages: List[ChatMessage], session_id: str, trace_id: Optional[str] = None
+    ) -> AsyncGenerator[Tuple[str, Any], None]:
+        """스트리밍 방식으로 대화하기
+        
+        (event, data) 튜플을 전달합니다.
+        - ("token", 텍스트): 응답 텍스트 (안내 문구 포함)
+        - ("tool_start", 도구 이름) / ("tool_end", 도구 이름): 도구 호출 진행 상황
+        - ("usage", dict): 마지막에 한 번, 모든 ReAct 단계의 토큰 사용량 합계
+        
+        호출 1회가 추적 1개(trace_id)이며, 모델/도구/MCP 호출이 그 아래 스팬으로 기록됩니다.
+        """
         if not self.agent:
             raise Exception("에이전트가 초기화되지 않았습니다.")
         
+        root = tracer.start_trace("stream_chat", trace_id, session_id=session_id)
+        trace_id = trace_id_of(root)
+        error = None
         try:
-            # 전체 대화 히스토리를 LangChain 메시지로 변환
-            langchain_messages = []
-            # langchain_messages.append(HumanMessage(content=messages[-1].content))
+            # 세션 설정 (유휴 세션 정리가 먼저 일어나도록 가장 앞에서 조회)
+            config = self.get_session_config(session_id)
+            if self.backend is not None:
+                await asyncio.to_thread(self.sessions.touch, session_id)
+            
+            # 체크포인터에 세션 상태가 있으면 새 사용자 메시지만 전달
+            if self.checkpointer and await asyncio.to_thread(self.checkpointer.has_thread, session_id):
+                messages = [msg for msg in messages if msg.role == "user"][-1:]
             
+            # (새 세션이면) 전체 대화 히스토리를 LangChain 메시지로 변환
+            langchain_messages = []
 
             for msg in messages:
                 if msg.role == "user":
                     langchain_messages.append(HumanMessage(content=msg.content))
                 elif msg.role == "assistant":
-                    from langchain_core.messages import AIMessage
                     langchain_messages.append(AIMessage(content=msg.content))
                 elif msg.role == "system":
                     # from langchain_core.messages import SystemMessage
                     # langchain_messages.append(SystemMessage(content=msg.content))
                     continue
 
-            print("@@@", langchain_messages)
+            log_event(
+                "chat_request",
+                session_id=session_id,
+                messages=len(langchain_messages),
+                chars=sum(len(str(m.content)) for m in langchain_messages),
+            )
             
             # 메시지가 없으면 에러
             if not langchain_messages:
-                yield "메시지를 찾을 수 없습니다."
+                yield "token", "메시지를 찾을 수 없습니다."
                 return
-            config = self.get_session_config(session_id)
             
-            # 전체 메시지 히스토리 전달
-            flag = 0
+            user_text = next((msg.content for msg in reversed(messages) if msg.role == "user"), "")
+            
+            # 슬롯이 모두 채워진 요청은 ReAct 루프 없이 바로 처리하고 대화 상태에만 기록
+            route = intent.route(user_text) if INTENT_ROUTER else None
+            root.set_attribute("routed", route["tool"] if route else "")
+            if route:
+                yield "tool_start", route["tool"]
+                result = await self.run_direct(route)
+                yield "tool_end", route["tool"]
+                reply = intent.render_result(route["tool"], result)
+                await self.agent.aupdate_state(
+                    config,
+                    {"messages": langchain_messages + [AIMessage(content=reply)]},
+                    as_node="agent",
+                )
+                yield "token", reply
+                yield "usage", empty_usage()  # LLM 호출 없음
+                return
+            
+            # 의도를 알 수 있으면 LLM 호출 전에 바로 안내 문구 전송
+            ack = acknowledgement(user_text)
+            if ack:
+                yield "token", ack
+            
+            # 요청 단위 프롬프트 토큰 집계 (모델 호출마다 PromptBuilder 가 누적)
+            prompt_usage = new_prompt_usage()
+            run_config = {
+                **config,
+                "configurable": {**config["configurable"], "prompt_usage": prompt_usage},
+                "callbacks": [self.metrics_callback, self.tracing_callback],
+            }
+            started = time.perf_counter()
+            
+            # 모델이 보고한 토큰 사용량 (usage_metadata) 합계, 보고가 없으면 토크나이저로 추정
+            usage = empty_usage()
+            reported = False
+            generated = []
+            
+            # 메시지 전달 (이전 대화는 체크포인터에서 복원)
+            acknowledged = ack is not None
             async for chunk in self.agent.astream(
                 {"messages": langchain_messages},  
                 stream_mode="messages",
-                config=config
+                config=run_config
             ):
-                if isinstance(chunk[0], ToolMessage):
-                    if flag == 0:
-                        yield "요청을 처리 중입니다. 잠시만 기다려주세요."
-                        flag = 1
-                    else:
-                        continue
-                elif chunk[0].additional_kwargs:
+                message = chunk[0]
+                if isinstance(message, ToolMessage):
+                    yield "tool_end", message.name or ""
+                    continue
+                
+                metadata = getattr(message, "usage_metadata", None)
+                if metadata:
+                    reported = True
+                    usage["prompt_tokens"] += metadata.get("input_tokens", 0)
+                    usage["completion_tokens"] += metadata.get("output_tokens", 0)
+                generated.append(str(message.content))
+                generated.extend(
+                    str(tool_chunk.get("args") or "")
+                    for tool_chunk in getattr(message, "tool_call_chunks", None) or []
+                )
+                
+                # 도구 호출 시작 (이름이 담긴 첫 조각에서 한 번만 전달)
+                tool_names = [
+                    tool_chunk["name"]
+                    for tool_chunk in getattr(message, "tool_call_chunks", None) or []
+                    if tool_chunk.get("name")
+                ]
+                if tool_names or message.additional_kwargs.get("tool_calls"):
+                    if not acknowledged:
+                        yield "token", DEFAULT_ACKNOWLEDGEMENT
+                        acknowledged = True
+                    for name in tool_names:
+                        yield "tool_start", name
+                elif message.additional_kwargs:
                     pass
-                else:
-                    token = chunk[0].content
-                    yield token
-                # # 에이전트 메시지 처리
-                # if 'tool_calls' in chunk[0].additional_kwargs:
-                #     print()
-                # else:
-                #     token = chunk[0].content
-                #     yield token
+                elif message.content:
+                    yield "token", message.content
+            
+            if not reported:
+                usage["prompt_tokens"] = prompt_usage["prompt_tokens"]
+                usage["completion_tokens"] = count_tokens("".join(generated))
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            self.sessions.record_usage(session_id, usage)
+            if self.backend is not None:
+                await asyncio.to_thread(self.sessions.record_shared_usage, session_id, usage)
+            TOKENS.labels(kind="prompt").inc(usage["prompt_tokens"])
+            TOKENS.labels(kind="completion").inc(usage["completion_tokens"])
+            root.set_attributes({
+                "prompt_tokens": usage["prompt_tokens"],
+                "completion_tokens": usage["completion_tokens"],
+                "usage_source": "model" if reported else "estimate",
+            })
+            
+            log_event(
+                "chat_completed",
+                session_id=session_id,
+                trace_id=trace_id,
+                duration_ms=elapsed_ms(started),
+                llm_calls=prompt_usage["calls"],
+                prompt_tokens=usage["prompt_tokens"],
+                completion_tokens=usage["completion_tokens"],
+                cacheable_prefix_tokens=prompt_usage["cacheable_prefix_tokens"],
+                usage_source="model" if reported else "estimate",
+            )
+            yield "usage", usage
                 
         except Exception as e:
+            error = e
+            log_event(
+                "chat_error", level=logging.ERROR, sample=False,
+                session_id=session_id, trace_id=trace_id, error=str(e),
+            )
             error_msg = f"대화 중 오류가 발생했습니다: {str(e)}"
-            yield error_msg
+            yield "token", error_msg
+        finally:
+            # 클라이언트가 스트림을 중간에 끊어도 추적은 닫아서 보관/내보내기
+            tracer.end_trace(root, error)
 
 # 전역 에이전트 인스턴스
 agent_instance = None
 
+# 동시 실행 제한 및 세션별 공정 대기열
+admission = AdmissionController()
+
+# 취소된 예약 행 정리 주기 (초)
+COMPACTION_INTERVAL = float(os.getenv("COMPACTION_INTERVAL", "3600"))
+compaction_task = None
+
+# 시작 준비 상태 (/ready)
+readiness = Readiness()
+warmup_task = None
+
+async def initialize_agent() -> HospitalReservationAgent:
+    """에이전트 초기화 1회 시도 (실패하면 연결을 정리하고 예외 전달)"""
+    global agent_instance, compaction_task
+    agent = HospitalReservationAgent()
+    try:
+        await agent.initialize(readiness)
+    except Exception:
+        await agent.cleanup()
+        raise
+    agent_instance = agent
+    
+    # 수집 시점에 읽는 게이지
+    metrics.bind_gauge(ACTIVE_SESSIONS, lambda: len(agent.sessions))
+    metrics.bind_gauge(INFLIGHT_RUNS, lambda: admission.inflight)
+    metrics.bind_gauge(QUEUED_RUNS, lambda: admission.queued)
+    
+    # 취소된 예약 행 정리 작업 시작
+    compaction_task = asyncio.create_task(
+        agent.store.run_compaction(COMPACTION_INTERVAL)
+    )
+    return agent
+
+def start_warmup() -> asyncio.Task:
+    """백그라운드 초기화 시작 (성공할 때까지 재시도, 이미 시작했으면 그 작업 반환)"""
+    global warmup_task
+    if warmup_task is None:
+        warmup_task = asyncio.create_task(retry_until_ready(readiness, initialize_agent))
+    return warmup_task
+
 async def get_agent():
-    """에이전트 인스턴스 반환"""
-    global agent_instance
-    if agent_instance is None:
-        agent_instance = HospitalReservationAgent()
-        await agent_instance.initialize()
-    return agent_instance
+    """에이전트 인스턴스 반환 (준비 중이면 READY_WAIT 초까지 기다린 뒤 503)"""
+    if agent_instance is not None:
+        return agent_instance
+    try:
+        return await asyncio.wait_for(asyncio.shield(start_warmup()), READY_WAIT)
+    except asyncio.TimeoutError:
+        error = NotReadyError()
+        raise HTTPException(
+            status_code=503,
+            detail=str(error),
+            headers={"Retry-After": str(error.retry_after)},
+        )
 
 # FastAPI 애플리케이션 생성
 app = FastAPI(
@@ -269,21 +515,33 @@ async def startup_event():
     
     # nest_asyncio 적용
     try:
+        import nest_asyncio
         nest_asyncio.apply()
         print("🔄 nest_asyncio 적용 완료")
     except:
         print("ℹ️ nest_asyncio 적용 건너뜀")
     
-    # 에이전트 초기화
-    await get_agent()
-    print("✅ 서버 시작 완료!")
+    # 구조화 로그 출력, 추적 내보내기 시작
+    setup_logging()
+    tracer.start()
+    metrics.start()
+    
+    # 에이전트 초기화는 백그라운드에서 진행 (/live 는 바로 응답, /ready 는 준비가 끝나면 200)
+    start_warmup()
+    print("✅ 서버 시작 완료! (준비 상태: /ready)")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """서버 종료 시 리소스 정리"""
-    global agent_instance
+    if warmup_task:
+        warmup_task.cancel()
+    if compaction_task:
+        compaction_task.cancel()
     if agent_instance:
         await agent_instance.cleanup()
+    await tracer.stop()
+    await metrics.stop()
+    shutdown_logging()
     print("👋 서버 종료 완료")
 
 @app.get("/")
@@ -294,84 +552,177 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "chat": "/v1/chat/completions",
-            "health": "/health"
+            "health": "/health",
+            "live": "/live",
+            "ready": "/ready",
+            "metrics": "/metrics",
+            "trace": "/debug/trace/{trace_id}"
         }
     }
 
+@app.get("/live")
+async def liveness_check():
+    """프로세스 생존 확인 (초기화 여부와 관계없이 응답)"""
+    return {"status": "alive", "worker_pid": os.getpid()}
+
+@app.get("/ready")
+async def readiness_check():
+    """트래픽을 받을 준비가 되었는지 확인 (MCP/모델/예약 데이터 준비 전이면 503)"""
+    body = {"worker_pid": os.getpid(), **readiness.snapshot()}
+    if not readiness.ready:
+        return JSONResponse(body, status_code=503, headers={"Retry-After": "1"})
+    return body
+
 @app.get("/health")
 async def health_check():
     """헬스 체크 엔드포인트"""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    health = {"status": "healthy", "timestamp": datetime.now().isoformat(), "worker_pid": os.getpid()}
+    health["readiness"] = readiness.snapshot()
+    if agent_instance:
+        health["sessions"] = agent_instance.sessions.stats()
+        health["state_backend"] = agent_instance.backend.kind if agent_instance.backend else "local"
+        health["context"] = agent_instance.context.stats()
+        health["sheets"] = agent_instance.throttle.stats()
+        health["sheets_cache"] = agent_instance.cache.stats()
+        health["slot_locks"] = agent_instance.store.slot_locks.stats()
+        health["mcp_pool"] = agent_instance.client.stats()
+        health["tool_registry"] = agent_instance.registry.stats()
+    health["tracing"] = tracer.stats()
+    health["admission"] = admission.stats()
+    health["time_to_first_token"] = metrics.summarize(TIME_TO_FIRST_TOKEN)
+    health["prompt_tokens"] = metrics.summarize(PROMPT_TOKENS, unit="tokens")
+    if agent_instance:
+        health["prompt_tokens"]["cacheable_prefix"] = agent_instance.prompt.prefix_tokens
+    return health
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus 지표 엔드포인트 (멀티 워커 모드에서는 모든 워커의 합계)"""
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
+
+@app.get("/v1/sessions/{session_id}/usage")
+async def session_usage(session_id: str):
+    """세션별 누적 토큰 사용량"""
+    agent = await get_agent()
+    usage = await asyncio.to_thread(agent.sessions.usage_of, session_id)
+    return {"session_id": session_id, "usage": usage}
+
+@app.get("/debug/traces")
+async def list_traces(limit: int = 20):
+    """최근 추적 목록 (최신순)"""
+    traces = list(tracer.recent.values())[-limit:]
+    return {
+        "traces": [
+            trace.summary()
+            for trace in reversed(traces)
+        ]
+    }
+
+@app.get("/debug/trace/{trace_id}")
+async def get_trace(trace_id: str):
+    """추적 1개의 스팬 목록과 들여쓰기 타임라인"""
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="추적을 찾을 수 없습니다 (최근 추적만 보관).")
+    return {**trace.to_dict(), "timeline": trace.tree()}
+
+async def acquire_slot(session_id: str) -> Ticket:
+    """에이전트 실행 슬롯 획득 (대기열이 가득 차면 429 + Retry-After)"""
+    try:
+        ticket = await admission.acquire(session_id)
+        QUEUE_WAIT.observe(ticket.wait_time)
+        return ticket
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+async def release_after(stream: AsyncGenerator[str, None], ticket: Ticket) -> AsyncGenerator[str, None]:
+    """스트림이 끝나거나 중단되면 실행 슬롯 반납"""
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        ticket.release()
 
 @app.post("/v1/chat/completions")
 async def chat_completions(
     request: ChatCompletionRequest,
+    response: Response,
     x_session_id: Optional[str] = Header(None)  # 헤더에서 세션 ID 받기
 ):
     """OpenAI 호환 채팅 완료 엔드포인트"""
+    received = time.perf_counter()
+    trace_id = new_trace_id()  # X-Trace-Id 로 돌려주고 /debug/trace/{trace_id} 에서 조회
     try:
         agent = await get_agent()
         
         # 세션 ID 생성 (실제 구현에서는 요청에서 추출하거나 사용자 인증을 통해 설정)
         session_id = x_session_id or "default_session"
         
+        # 실행 슬롯 획득 (대기열이 가득 차면 429)
+        ticket = await acquire_slot(session_id)
+        
         # 스트리밍 응답
         if request.stream:
             async def generate_stream():
-                response_id = f"chatcmpl-{uuid.uuid4().hex}"
-                created = int(time.time())
+                # 응답마다 변하지 않는 JSON 앞/뒷부분은 한 번만 만들고 토큰 내용만 이스케이프
+                encoder = ChunkEncoder(f"chatcmpl-{uuid.uuid4().hex}", int(time.time()), request.model)
                 
                 # 스트림 시작
-                yield f"data: {json.dumps({'id': response_id, 'object': 'chat.completion.chunk', 'created': created, 'model': request.model, 'choices': [{'index': 0, 'delta': {'role': 'assistant', 'content': ''}, 'finish_reason': None}]})}\n\n"
+                yield encoder.role()
                 
-                # 에이전트 응답 스트리밍
-                async for content_chunk in agent.stream_chat(request.messages, session_id):
+                # 에이전트 응답 스트리밍 (빠르게 몰려오는 토큰은 짧은 창 안에서 묶어서 전송)
+                first_token = True
+                usage = None
+                async for event, content_chunk in batch_tokens(agent.stream_events(request.messages, session_id, trace_id)):
+                    if event == "usage":
+                        usage = content_chunk
+                        continue
+                    # 도구 진행 상황은 SSE 주석 줄로 전달 (OpenAI 호환 클라이언트는 무시)
+                    if event != "token":
+                        yield encoder.comment({'event': event, 'tool': content_chunk})
+                        continue
                     if content_chunk.strip():  # 빈 내용 제외
-                        chunk_data = {
-                            'id': response_id,
-                            'object': 'chat.completion.chunk',
-                            'created': created,
-                            'model': request.model,
-                            'choices': [{
-                                'index': 0,
-                                'delta': {'content': content_chunk},
-                                'finish_reason': None
-                            }]
-                        }
-                        yield f"data: {json.dumps(chunk_data, ensure_ascii=False)}\n\n"
+                        if first_token:
+                            TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - received)
+                            first_token = False
+                        yield encoder.content(content_chunk)
                 
                 # 스트림 종료
-                end_chunk = {
-                    'id': response_id,
-                    'object': 'chat.completion.chunk',
-                    'created': created,
-                    'model': request.model,
-                    'choices': [{
-                        'index': 0,
-                        'delta': {},
-                        'finish_reason': 'stop'
-                    }]
-                }
-                yield f"data: {json.dumps(end_chunk)}\n\n"
-                yield "data: [DONE]\n\n"
+                yield encoder.finish(usage)
+                yield SSE_DONE
             
+            REQUESTS.labels(endpoint="chat_completions", status=200).inc()
             return StreamingResponse(
-                generate_stream(),
-                media_type="text/plain",
+                release_after(generate_stream(), ticket),
+                media_type=SSE_MEDIA_TYPE,
                 headers={
-                    "Cache-Control": "no-cache",
-                    "Connection": "keep-alive",
-                    "Content-Type": "text/plain; charset=utf-8"
-                }
+                    **SSE_HEADERS,
+                    "X-Queue-Wait-Ms": f"{ticket.wait_time * 1000:.1f}",
+                    "X-Trace-Id": trace_id,
+                },
+                background=BackgroundTask(ticket.release),
             )
         
         # 일반 응답
         else:
             full_response = ""
-            async for content_chunk in agent.stream_chat(request.messages, session_id):
-                full_response += content_chunk
+            usage = None
+            try:
+                async for event, content_chunk in agent.stream_events(request.messages, session_id, trace_id):
+                    if event == "token":
+                        full_response += content_chunk
+                    elif event == "usage":
+                        usage = content_chunk
+            finally:
+                ticket.release()
             
-            response = ChatCompletionResponse(
+            response.headers["X-Trace-Id"] = trace_id
+            completion = ChatCompletionResponse(
                 id=f"chatcmpl-{uuid.uuid4().hex}",
                 object="chat.completion",
                 created=int(time.time()),
@@ -383,17 +734,18 @@ async def chat_completions(
                         finish_reason="stop"
                     )
                 ],
-                usage={
-                    "prompt_tokens": len(str(request.messages)),
-                    "completion_tokens": len(full_response),
-                    "total_tokens": len(str(request.messages)) + len(full_response)
-                }
+                usage=usage or empty_usage()
             )
             
-            return response
+            REQUESTS.labels(endpoint="chat_completions", status=200).inc()
+            return completion
             
+    except HTTPException as e:
+        REQUESTS.labels(endpoint="chat_completions", status=e.status_code).inc()
+        raise
     except Exception as e:
-        print(f"❌ API 오류: {str(e)}")
+        REQUESTS.labels(endpoint="chat_completions", status=500).inc()
+        log_event("api_error", level=logging.ERROR, sample=False, error=str(e))
         raise HTTPException(status_code=500, detail=f"내부 서버 오류: {str(e)}")
 
 # 기본 채팅 엔드포인트 (간단한 테스트용)
@@ -410,16 +762,29 @@ async def simple_chat(message: dict):
         
         messages = [ChatMessage(role="user", content=user_message)]
         
+        ticket = await acquire_slot(session_id)
         response = ""
-        async for chunk in agent.stream_chat(messages, session_id):
-            response += chunk
+        try:
+            async for chunk in agent.stream_chat(messages, session_id):
+                response += chunk
+        finally:
+            ticket.release()
+            # 일회성 세션이므로 바로 정리
+            agent.sessions.evict(session_id)
         
+        REQUESTS.labels(endpoint="chat", status=200).inc()
         return {"response": response}
         
+    except HTTPException as e:
+        REQUESTS.labels(endpoint="chat", status=e.status_code).inc()
+        raise
     except Exception as e:
+        REQUESTS.labels(endpoint="chat", status=500).inc()
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
+    import uvicorn
+    
     print("🏥 병원 예약 에이전트 FastAPI 서버")
     print("=" * 50)
     
@@ -4,7 +4,7 @@ import json
 import sys
 
 class HospitalAgentClient:
-    def __init__(self, base_url="http://localhost:8090"):
+    def __init__(self, base_url="http://localhost:6003"):
         self.base_url = base_url
     
     async def test_health(self):
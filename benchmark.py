@@ -0,0 +1,205 @@
+"""예약 에이전트 API 부하 테스트
+
+N명의 가상 고객이 동시에 예약/취소 시나리오를 실행하며 /v1/chat/completions(스트리밍/일반)와
+/chat 엔드포인트의 지연 시간(p50/p95/p99), 첫 토큰 시간(TTFT), 초당 요청 수를 측정합니다.
+
+OpenAI 비용/지연 없이 서버 성능만 측정하려면 가짜 모델과 모의 시트 서버로 실행하세요:
+    LLM_BACKEND=fake MCP_CONFIG_PATH=config.mock.json python api_google_sheet.py
+    python benchmark.py --callers 50 --iterations 5 --mode all
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import aiohttp
+
+_FAMILY = "김이박최정강조윤장임"
+_GIVEN = "민서지하도윤준현수영재우예은채아시연태"
+
+
+def caller_name(index: int) -> str:
+    """가상 고객 이름 (한글 3자, 고객마다 고유)"""
+    return (
+        _FAMILY[index % len(_FAMILY)]
+        + _GIVEN[(index // len(_FAMILY)) % len(_GIVEN)]
+        + _GIVEN[(index // (len(_FAMILY) * len(_GIVEN))) % len(_GIVEN)]
+    )
+
+
+def booking_script(index: int, iteration: int) -> List[str]:
+    """예약 시나리오: 인사 -> 예약 정보 전달"""
+    day = 1 + (index + iteration) % 28
+    hour = 10 + (index * 3 + iteration) % 9
+    return [
+        "안녕하세요, 예약하고 싶어요.",
+        f"이름은 {caller_name(index)}이고 2025-08-{day:02d} {hour}:00에 커트로 예약해주세요.",
+    ]
+
+
+def cancel_script(index: int, iteration: int) -> List[str]:
+    """취소 시나리오"""
+    return [f"{caller_name(index)} 예약 취소해주세요."]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """nearest-rank 백분위수"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+class Recorder:
+    """요청별 측정값 수집"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.ttfts: List[float] = []
+        self.errors = 0
+        self.rejected = 0
+
+    def add(self, latency: float, ttft: Optional[float]):
+        self.latencies.append(latency)
+        if ttft is not None:
+            self.ttfts.append(ttft)
+
+    def report(self, label: str, elapsed: float) -> Dict[str, float]:
+        count = len(self.latencies)
+        result = {
+            "requests": count,
+            "errors": self.errors,
+            "rejected_429": self.rejected,
+            "rps": round(count / elapsed, 2) if elapsed else 0.0,
+        }
+        for name, values in (("latency", self.latencies), ("ttft", self.ttfts)):
+            for pct in (50, 95, 99):
+                result[f"{name}_p{pct}_ms"] = round(percentile(values, pct) * 1000, 1)
+        print(f"\n📊 [{label}] {elapsed:.1f}s")
+        for key, value in result.items():
+            print(f"  - {key}: {value}")
+        return result
+
+
+class LoadGenerator:
+    def __init__(self, base_url: str, callers: int, iterations: int, script: str):
+        self.base_url = base_url.rstrip("/")
+        self.callers = callers
+        self.iterations = iterations
+        self.script = script
+
+    def scripts(self, index: int, iteration: int) -> List[str]:
+        if self.script == "book":
+            return booking_script(index, iteration)
+        if self.script == "cancel":
+            return cancel_script(index, iteration)
+        # mixed: 예약 후 절반은 취소
+        turns = booking_script(index, iteration)
+        if (index + iteration) % 2:
+            turns += cancel_script(index, iteration)
+        return turns
+
+    async def openai_turn(self, session, session_id, history, stream, recorder) -> Optional[str]:
+        payload = {"model": "gpt-4o-mini", "messages": history, "stream": stream}
+        headers = {"x-session-id": session_id}
+        started = time.perf_counter()
+        ttft = None
+        content = ""
+        async with session.post(f"{self.base_url}/v1/chat/completions", json=payload, headers=headers) as response:
+            if response.status == 429:
+                recorder.rejected += 1
+                return None
+            if response.status != 200:
+                recorder.errors += 1
+                return None
+            if stream:
+                async for line in response.content:
+                    line = line.decode("utf-8").strip()
+                    if not line.startswith("data: ") or line == "data: [DONE]":
+                        continue
+                    try:
+                        delta = json.loads(line[6:])["choices"][0].get("delta", {})
+                    except (ValueError, KeyError, IndexError):
+                        continue
+                    if delta.get("content"):
+                        if ttft is None:
+                            ttft = time.perf_counter() - started
+                        content += delta["content"]
+            else:
+                data = await response.json()
+                content = data["choices"][0]["message"]["content"]
+        latency = time.perf_counter() - started
+        recorder.add(latency, ttft if stream else latency)
+        return content
+
+    async def chat_turn(self, session, message, recorder):
+        started = time.perf_counter()
+        async with session.post(f"{self.base_url}/chat", json={"message": message}) as response:
+            if response.status == 429:
+                recorder.rejected += 1
+                return
+            if response.status != 200:
+                recorder.errors += 1
+                return
+            await response.json()
+        latency = time.perf_counter() - started
+        recorder.add(latency, latency)
+
+    async def caller(self, session, index, mode, recorder):
+        for iteration in range(self.iterations):
+            turns = self.scripts(index, iteration)
+            if mode == "chat":
+                for message in turns:
+                    await self.chat_turn(session, message, recorder)
+                continue
+            session_id = f"bench-{index}-{iteration}-{uuid.uuid4().hex[:8]}"
+            history = []
+            for message in turns:
+                history.append({"role": "user", "content": message})
+                try:
+                    reply = await self.openai_turn(session, session_id, history, mode == "stream", recorder)
+                except aiohttp.ClientError:
+                    recorder.errors += 1
+                    reply = None
+                if reply is None:
+                    break
+                history.append({"role": "assistant", "content": reply})
+
+    async def run(self, mode: str) -> Dict[str, float]:
+        recorder = Recorder()
+        timeout = aiohttp.ClientTimeout(total=300)
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            started = time.perf_counter()
+            await asyncio.gather(*(self.caller(session, i, mode, recorder) for i in range(self.callers)))
+            elapsed = time.perf_counter() - started
+        return recorder.report(mode, elapsed)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="예약 에이전트 API 부하 테스트")
+    parser.add_argument("--base-url", default="http://localhost:6003")
+    parser.add_argument("--callers", type=int, default=10, help="동시 가상 고객 수")
+    parser.add_argument("--iterations", type=int, default=3, help="고객당 시나리오 반복 횟수")
+    parser.add_argument("--mode", choices=["stream", "json", "chat", "all"], default="all")
+    parser.add_argument("--script", choices=["book", "cancel", "mixed"], default="mixed")
+    parser.add_argument("--output", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    generator = LoadGenerator(args.base_url, args.callers, args.iterations, args.script)
+    modes = ["stream", "json", "chat"] if args.mode == "all" else [args.mode]
+    print(f"🏁 부하 테스트 시작: {args.callers}명 x {args.iterations}회, 시나리오={args.script}")
+    results = {mode: await generator.run(mode) for mode in modes}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"💾 결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
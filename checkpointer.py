@@ -0,0 +1,653 @@
+import asyncio
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.serde.types import TASKS
+
+from state_backend import SQLiteBackend, StateBackend
+
+# 체크포인트 저장 파일 및 보관 한도
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "checkpoints.sqlite")
+MAX_CHECKPOINTS_PER_THREAD = int(os.getenv("MAX_CHECKPOINTS_PER_THREAD", "10"))
+MAX_THREADS = int(os.getenv("MAX_CHECKPOINT_THREADS", "5000"))
+THREAD_TTL_SECONDS = float(os.getenv("CHECKPOINT_TTL_SECONDS", str(24 * 3600)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_last_access ON threads(last_access);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class ThreadedCheckpointer(BaseCheckpointSaver):
+    """동기 구현을 스레드에서 실행하는 비동기 인터페이스 (이벤트 루프를 막지 않도록)"""
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+class SQLiteCheckpointer(ThreadedCheckpointer):
+    """SQLite 기반 LangGraph 체크포인터
+
+    세션(thread_id)별로 최근 체크포인트만 보관하고, 오래 사용되지 않은 세션은
+    TTL 또는 LRU 방식으로 삭제하여 저장소가 무한히 커지지 않도록 합니다.
+    체크포인트 하나에 담기는 messages 채널의 길이는 ConversationContext.trim
+    (pre_model_hook)이 HISTORY_MAX_TURNS 턴으로 제한합니다.
+    """
+
+    def __init__(
+        self,
+        path: str = CHECKPOINT_DB_PATH,
+        max_checkpoints_per_thread: int = MAX_CHECKPOINTS_PER_THREAD,
+        max_threads: int = MAX_THREADS,
+        ttl_seconds: float = THREAD_TTL_SECONDS,
+        *,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        # 여러 워커 프로세스가 같은 파일을 쓰면 잠금이 풀릴 때까지 대기
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.last_sweep = 0.0
+
+    @contextlib.contextmanager
+    def _write(self) -> Iterator[None]:
+        """쓰기 트랜잭션 (중간에 예외가 나면 ROLLBACK 해서 공유 연결이 열린 트랜잭션에 남지 않게 함)"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    # ---- 세션 관리 ----
+
+    def _touch(self, thread_id: str):
+        self.conn.execute(
+            "INSERT INTO threads(thread_id, last_access) VALUES (?, ?) "
+            "ON CONFLICT(thread_id) DO UPDATE SET last_access = excluded.last_access",
+            (thread_id, time.time()),
+        )
+
+    def _delete_thread(self, thread_id: str):
+        for table in ("checkpoints", "writes", "threads"):
+            self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def _prune_thread(self, thread_id: str, checkpoint_ns: str):
+        """세션별 체크포인트를 최근 N개만 남김"""
+        stale = self.conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, checkpoint_ns, self.max_checkpoints_per_thread),
+        ).fetchall()
+        for (checkpoint_id,) in stale:
+            for table in ("checkpoints", "writes"):
+                self.conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                )
+
+    def _evict(self):
+        """TTL 이 지난 세션과 최대 세션 수를 넘는 오래된 세션 삭제"""
+        now = time.time()
+        if now - self.last_sweep < 1.0:
+            return
+        self.last_sweep = now
+        expired = self.conn.execute(
+            "SELECT thread_id FROM threads WHERE last_access < ?", (now - self.ttl_seconds,)
+        ).fetchall()
+        overflow = self.conn.execute(
+            "SELECT thread_id FROM threads ORDER BY last_access DESC LIMIT -1 OFFSET ?",
+            (self.max_threads,),
+        ).fetchall()
+        for (thread_id,) in set(expired) | set(overflow):
+            self._delete_thread(thread_id)
+
+    def has_thread(self, thread_id: str) -> bool:
+        """세션의 체크포인트가 저장되어 있는지 확인"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM checkpoints WHERE thread_id = ? LIMIT 1", (thread_id,)
+            ).fetchone()
+        return row is not None
+
+    def thread_count(self) -> int:
+        """저장된 세션 수"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._write():
+            self._delete_thread(thread_id)
+
+    # ---- BaseCheckpointSaver 구현 ----
+
+    def _load_tuple(self, thread_id: str, checkpoint_ns: str, row: Tuple) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata = row
+        writes = self.conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        loaded = self.serde.loads_typed((type_, checkpoint))
+        if parent_checkpoint_id:
+            sends = self.conn.execute(
+                "SELECT type, value FROM writes WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND checkpoint_id = ? AND channel = ? ORDER BY task_path, task_id, idx",
+                (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS),
+            ).fetchall()
+            if sends:
+                loaded["pending_sends"] = [self.serde.loads_typed(send) for send in sends]
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=loaded,
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: List[Any] = [thread_id, checkpoint_ns]
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self.lock:
+            row = self.conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            self._touch(thread_id)
+            return self._load_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints WHERE 1 = 1"
+        )
+        params: List[Any] = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_id)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+            tuples = []
+            for thread_id, checkpoint_ns, *row in rows:
+                item = self._load_tuple(thread_id, checkpoint_ns, tuple(row))
+                if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                tuples.append(item)
+                if limit is not None and len(tuples) >= limit:
+                    break
+        yield from tuples
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, serialized = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(metadata)
+        with self._write():
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    serialized,
+                    metadata_type,
+                    serialized_metadata,
+                ),
+            )
+            self._touch(thread_id)
+            self._prune_thread(thread_id, checkpoint_ns)
+            self._evict()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # 특수 채널(ERROR 등)은 덮어쓰기, 일반 채널은 기존 값 유지
+        replace_rows, insert_rows = [], []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, serialized = self.serde.dumps_typed(value)
+            row = (
+                thread_id,
+                checkpoint_ns,
+                checkpoint_id,
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                value_type,
+                serialized,
+                task_path,
+            )
+            (replace_rows if channel in WRITES_IDX_MAP else insert_rows).append(row)
+        with self._write():
+            self.conn.executemany("INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", replace_rows)
+            self.conn.executemany("INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", insert_rows)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class BackendCheckpointer(ThreadedCheckpointer):
+    """공유 상태 저장소(StateBackend) 기반 체크포인터 (여러 호스트의 워커가 같은 세션을 이어서 처리)
+
+    키 구성:
+        ckpt:threads                      세션별 마지막 사용 시각 (TTL/LRU 정리용)
+        ckpt:{thread}:ns                  세션의 checkpoint_ns 목록
+        ckpt:{thread}:{ns}                checkpoint_id -> 부모 checkpoint_id
+        ckpt:{thread}:{ns}:{id}           체크포인트 본문/메타데이터
+        ckpt:{thread}:{ns}:{id}:writes    "{task_id}|{idx}" -> 대기 중인 쓰기
+    """
+
+    def __init__(
+        self,
+        backend: StateBackend,
+        max_checkpoints_per_thread: int = MAX_CHECKPOINTS_PER_THREAD,
+        max_threads: int = MAX_THREADS,
+        ttl_seconds: float = THREAD_TTL_SECONDS,
+        *,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        self.backend = backend
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.last_sweep = 0.0
+
+    # ---- 키 ----
+
+    @staticmethod
+    def _ids_key(thread_id: str, checkpoint_ns: str) -> str:
+        return f"ckpt:{thread_id}:{checkpoint_ns}"
+
+    @staticmethod
+    def _checkpoint_key(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"ckpt:{thread_id}:{checkpoint_ns}:{checkpoint_id}"
+
+    def _writes_key(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id) + ":writes"
+
+    # ---- 세션 관리 ----
+
+    def _touch(self, thread_id: str):
+        self.backend.hset("ckpt:threads", {thread_id: str(time.time()).encode()})
+
+    def _delete_checkpoint(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        self.backend.delete(
+            self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id),
+            self._writes_key(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def _prune_thread(self, thread_id: str, checkpoint_ns: str):
+        """세션별 체크포인트를 최근 N개만 남김"""
+        ids = sorted(self.backend.hgetall(self._ids_key(thread_id, checkpoint_ns)), reverse=True)
+        stale = ids[self.max_checkpoints_per_thread:]
+        for checkpoint_id in stale:
+            self._delete_checkpoint(thread_id, checkpoint_ns, checkpoint_id)
+        if stale:
+            self.backend.hdel(self._ids_key(thread_id, checkpoint_ns), *stale)
+
+    def _evict(self):
+        """TTL 이 지난 세션과 최대 세션 수를 넘는 오래된 세션 삭제"""
+        now = time.time()
+        if now - self.last_sweep < 1.0:
+            return
+        self.last_sweep = now
+        threads = sorted(
+            ((float(value), thread_id) for thread_id, value in self.backend.hgetall("ckpt:threads").items()),
+            reverse=True,
+        )
+        for rank, (last_access, thread_id) in enumerate(threads):
+            if rank >= self.max_threads or last_access < now - self.ttl_seconds:
+                self.delete_thread(thread_id)
+
+    def has_thread(self, thread_id: str) -> bool:
+        """세션의 체크포인트가 저장되어 있는지 확인"""
+        return any(
+            self.backend.hgetall(self._ids_key(thread_id, checkpoint_ns))
+            for checkpoint_ns in self.backend.hgetall(f"ckpt:{thread_id}:ns")
+        )
+
+    def thread_count(self) -> int:
+        """저장된 세션 수"""
+        return len(self.backend.hgetall("ckpt:threads"))
+
+    def delete_thread(self, thread_id: str) -> None:
+        for checkpoint_ns in self.backend.hgetall(f"ckpt:{thread_id}:ns"):
+            ids_key = self._ids_key(thread_id, checkpoint_ns)
+            for checkpoint_id in self.backend.hgetall(ids_key):
+                self._delete_checkpoint(thread_id, checkpoint_ns, checkpoint_id)
+            self.backend.delete(ids_key)
+        self.backend.delete(f"ckpt:{thread_id}:ns")
+        self.backend.hdel("ckpt:threads", thread_id)
+
+    # ---- BaseCheckpointSaver 구현 ----
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[Tuple]:
+        """(task_id, idx, channel, type, value, task_path) 목록 (task_id, idx 순)"""
+        writes = []
+        for field, packed in self.backend.hgetall(self._writes_key(thread_id, checkpoint_ns, checkpoint_id)).items():
+            task_id, _, idx = field.rpartition("|")
+            header, _, value = packed.partition(b"\n")
+            channel, value_type, task_path = json.loads(header)
+            writes.append((task_id, int(idx), channel, value_type, value, task_path))
+        writes.sort(key=lambda write: (write[0], write[1]))
+        return writes
+
+    def _load_tuple(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Optional[CheckpointTuple]:
+        stored = self.backend.hgetall(self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id))
+        if not stored:
+            return None
+        parent_checkpoint_id = stored["parent"].decode() or None
+        loaded = self.serde.loads_typed((stored["type"].decode(), stored["checkpoint"]))
+        if parent_checkpoint_id:
+            sends = sorted(
+                (write for write in self._load_writes(thread_id, checkpoint_ns, parent_checkpoint_id)
+                 if write[2] == TASKS),
+                key=lambda write: (write[5], write[0], write[1]),
+            )
+            if sends:
+                loaded["pending_sends"] = [self.serde.loads_typed((write[3], write[4])) for write in sends]
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=loaded,
+            metadata=self.serde.loads_typed((stored["metadata_type"].decode(), stored["metadata"])),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, _, channel, value_type, value, _ in self._load_writes(
+                    thread_id, checkpoint_ns, checkpoint_id
+                )
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        if not checkpoint_id:
+            ids = self.backend.hgetall(self._ids_key(thread_id, checkpoint_ns))
+            if not ids:
+                return None
+            checkpoint_id = max(ids)
+        item = self._load_tuple(thread_id, checkpoint_ns, checkpoint_id)
+        if item is not None:
+            self._touch(thread_id)
+        return item
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config:
+            thread_ids = [config["configurable"]["thread_id"]]
+        else:
+            thread_ids = list(self.backend.hgetall("ckpt:threads"))
+        before_id = get_checkpoint_id(before) if before else None
+        candidates = []
+        for thread_id in thread_ids:
+            namespaces = list(self.backend.hgetall(f"ckpt:{thread_id}:ns"))
+            if config and config["configurable"].get("checkpoint_ns") is not None:
+                namespaces = [config["configurable"]["checkpoint_ns"]]
+            for checkpoint_ns in namespaces:
+                for checkpoint_id in self.backend.hgetall(self._ids_key(thread_id, checkpoint_ns)):
+                    if config and get_checkpoint_id(config) and checkpoint_id != get_checkpoint_id(config):
+                        continue
+                    if before_id and checkpoint_id >= before_id:
+                        continue
+                    candidates.append((checkpoint_id, thread_id, checkpoint_ns))
+        candidates.sort(reverse=True)
+
+        tuples = []
+        for checkpoint_id, thread_id, checkpoint_ns in candidates:
+            item = self._load_tuple(thread_id, checkpoint_ns, checkpoint_id)
+            if item is None:
+                continue
+            if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            tuples.append(item)
+            if limit is not None and len(tuples) >= limit:
+                break
+        yield from tuples
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_checkpoint_id = config["configurable"].get("checkpoint_id") or ""
+        type_, serialized = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(metadata)
+        # 본문을 먼저 기록하고 목록에 추가 (다른 워커가 목록에서 빈 체크포인트를 보지 않도록)
+        self.backend.hset(self._checkpoint_key(thread_id, checkpoint_ns, checkpoint["id"]), {
+            "type": type_.encode(),
+            "checkpoint": serialized,
+            "metadata_type": metadata_type.encode(),
+            "metadata": serialized_metadata,
+            "parent": parent_checkpoint_id.encode(),
+        })
+        self.backend.hset(f"ckpt:{thread_id}:ns", {checkpoint_ns: b""})
+        self.backend.hset(self._ids_key(thread_id, checkpoint_ns), {checkpoint["id"]: parent_checkpoint_id.encode()})
+        self._touch(thread_id)
+        self._prune_thread(thread_id, checkpoint_ns)
+        self._evict()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        key = self._writes_key(thread_id, checkpoint_ns, checkpoint_id)
+        existing = self.backend.hgetall(key)
+        # 특수 채널(ERROR 등)은 덮어쓰기, 일반 채널은 기존 값 유지
+        mapping = {}
+        for idx, (channel, value) in enumerate(writes):
+            field = f"{task_id}|{WRITES_IDX_MAP.get(channel, idx)}"
+            if channel not in WRITES_IDX_MAP and field in existing:
+                continue
+            value_type, serialized = self.serde.dumps_typed(value)
+            header = json.dumps([channel, value_type, task_path]).encode()
+            mapping[field] = header + b"\n" + serialized
+        self.backend.hset(key, mapping)
+
+    def close(self):
+        pass  # 공유 저장소는 만든 쪽에서 닫음
+
+
+def create_checkpointer(backend: Optional[StateBackend] = None) -> ThreadedCheckpointer:
+    """공유 저장소 설정에 맞는 체크포인터 (SQLite 는 같은 파일을 여러 워커가 함께 사용)"""
+    if backend is None:
+        return SQLiteCheckpointer()
+    if isinstance(backend, SQLiteBackend):
+        return SQLiteCheckpointer(backend.path)
+    return BackendCheckpointer(backend)
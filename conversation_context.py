@@ -0,0 +1,162 @@
+"""대화 길이와 무관하게 모델 입력 크기를 일정하게 유지하는 세션별 문맥 관리
+
+모델에는 다음만 전달합니다.
+- 최근 K 턴(사용자 메시지 기준)의 메시지 원문
+- 그보다 오래된 턴을 한 줄씩 접어 둔 요약 (최근 N 줄)
+- 대화 전체에서 뽑아 고정해 둔 예약 정보 (성명/예약일/예약시간/시술 종류)
+
+체크포인터에 저장되는 대화(messages 채널)도 최근 HISTORY_MAX_TURNS 턴으로 자릅니다
+(create_react_agent 의 pre_model_hook=trim). 자른 메시지는 이미 요약/고정 슬롯에 반영된 뒤입니다.
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, RemoveMessage, SystemMessage
+
+from intent import extract_slots
+
+CONTEXT_WINDOW_TURNS = int(os.getenv("CONTEXT_WINDOW_TURNS", "6"))
+SUMMARY_MAX_LINES = int(os.getenv("SUMMARY_MAX_LINES", "12"))
+SUMMARY_LINE_CHARS = int(os.getenv("SUMMARY_LINE_CHARS", "80"))
+# 체크포인트에 남길 최대 턴 수 (CONTEXT_WINDOW_TURNS 보다 작으면 CONTEXT_WINDOW_TURNS)
+HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "20"))
+
+# langgraph.graph.message.REMOVE_ALL_MESSAGES (모듈 import 가 무거워 값만 사용)
+REMOVE_ALL_MESSAGES = "__remove_all__"
+
+SLOT_LABELS = (("name", "성명"), ("date", "예약일"), ("time", "예약시간"), ("service", "시술 종류"))
+
+
+def summarize_line(message: BaseMessage, limit: int = SUMMARY_LINE_CHARS) -> Optional[str]:
+    """오래된 메시지 1개를 요약 한 줄로 (도구 결과는 고정 슬롯으로 대신하므로 생략)"""
+    if isinstance(message, HumanMessage):
+        speaker = "고객"
+    elif isinstance(message, AIMessage):
+        speaker = "상담원"
+    else:
+        return None
+    text = " ".join(str(message.content).split())
+    if isinstance(message, AIMessage) and message.tool_calls:
+        text = (text + " " if text else "") + ", ".join(
+            f"[{call['name']} 호출]" for call in message.tool_calls
+        )
+    if not text:
+        return None
+    return f"{speaker}: {text[:limit]}{'…' if len(text) > limit else ''}"
+
+
+class SessionContext:
+    """세션 하나의 요약/고정 슬롯 상태"""
+
+    __slots__ = ("summary", "folded", "scanned", "slots")
+
+    def __init__(self):
+        self.summary: List[str] = []
+        self.folded = 0  # 요약으로 접힌 메시지 수
+        self.scanned = 0  # 슬롯 추출을 마친 메시지 수
+        self.slots: Dict[str, str] = {}
+
+
+class ConversationContext:
+    """세션별 대화 창(window) + 누적 요약 + 고정 예약 슬롯"""
+
+    def __init__(
+        self,
+        max_turns: int = CONTEXT_WINDOW_TURNS,
+        max_summary_lines: int = SUMMARY_MAX_LINES,
+        max_history_turns: int = HISTORY_MAX_TURNS,
+    ):
+        self.max_turns = max_turns
+        self.max_summary_lines = max_summary_lines
+        self.max_history_turns = max(max_turns, max_history_turns)
+        self.sessions: Dict[str, SessionContext] = {}
+        self.trimmed = 0  # 체크포인트 대화에서 잘라낸 메시지 수
+
+    def _cut(self, messages: List[BaseMessage], turns: Optional[int] = None) -> int:
+        """최근 turns(기본 max_turns) 턴이 시작되는 위치 (도구 호출/결과 쌍이 잘리지 않도록 사용자 메시지에서 자름)"""
+        turns = turns or self.max_turns
+        seen = 0
+        for i in range(len(messages) - 1, -1, -1):
+            if isinstance(messages[i], HumanMessage):
+                seen += 1
+                if seen == turns:
+                    return i
+        return 0
+
+    def window(self, session_id: Optional[str], messages: List[BaseMessage]) -> List[BaseMessage]:
+        """모델에 전달할 메시지 목록 (대화 상태 요약 + 최근 턴)"""
+        if not session_id:
+            return list(messages)
+        state = self.sessions.get(session_id)
+        if state is None or state.scanned > len(messages):
+            # 새 세션이거나 대화 상태가 초기화된 경우
+            state = self.sessions[session_id] = SessionContext()
+
+        # 새로 들어온 사용자 메시지에서 예약 슬롯 추출 (나중 값이 우선)
+        for message in messages[state.scanned:]:
+            if isinstance(message, HumanMessage):
+                state.slots.update(extract_slots(str(message.content)))
+        state.scanned = len(messages)
+
+        # 창 밖으로 밀려난 메시지만 이어서 요약에 추가
+        cut = self._cut(messages)
+        if cut > state.folded:
+            for message in messages[state.folded:cut]:
+                line = summarize_line(message)
+                if line:
+                    state.summary.append(line)
+            del state.summary[:-self.max_summary_lines]
+            state.folded = cut
+
+        header = self.render(state)
+        recent = list(messages[state.folded:])
+        return ([SystemMessage(content=header)] if header else []) + recent
+
+    def trim(self, state: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """pre_model_hook: 최근 max_history_turns 턴보다 오래된 메시지를 대화 상태(체크포인트)에서 삭제
+
+        먼저 window() 로 요약/고정 슬롯에 반영한 뒤 자르고, 세션 상태의 메시지 위치도 그만큼 당깁니다.
+        자를 것이 없으면 상태는 그대로 두고 모델 입력만 넘깁니다.
+        """
+        messages = state["messages"]
+        session_id = ((config or {}).get("configurable") or {}).get("thread_id")
+        cut = self._cut(messages, self.max_history_turns)
+        if not session_id or cut == 0:
+            return {"llm_input_messages": messages}
+        self.window(session_id, messages)
+        context = self.sessions[session_id]
+        context.folded -= cut
+        context.scanned -= cut
+        self.trimmed += cut
+        return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *messages[cut:]]}
+
+    def render(self, state: SessionContext) -> str:
+        lines = []
+        if state.slots:
+            pinned = ", ".join(
+                f"{label}={state.slots[key]}" for key, label in SLOT_LABELS if key in state.slots
+            )
+            lines.append(f"- 지금까지 확인된 예약 정보: {pinned}")
+        if state.summary:
+            lines.append("- 이전 대화 요약:")
+            lines.extend(f"  - {line}" for line in state.summary)
+        if not lines:
+            return ""
+        return "<CONVERSATION_STATE>\n" + "\n".join(lines) + "\n</CONVERSATION_STATE>"
+
+    def slots(self, session_id: str) -> Dict[str, str]:
+        """세션에 고정된 예약 슬롯"""
+        state = self.sessions.get(session_id)
+        return dict(state.slots) if state else {}
+
+    def forget(self, session_id: str):
+        self.sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self.sessions),
+            "summarized_sessions": sum(1 for state in self.sessions.values() if state.summary),
+            "max_turns": self.max_turns,
+            "max_history_turns": self.max_history_turns,
+            "trimmed_messages": self.trimmed,
+        }
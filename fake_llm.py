@@ -0,0 +1,169 @@
+"""부하 테스트용 결정적(deterministic) 채팅 모델
+
+ChatOpenAI 대신 사용하여 벤치마크 수치가 OpenAI 응답 시간이 아닌 서버 자체 성능을
+측정하도록 합니다. 사용자 메시지에서 성명/예약일/예약시간/시술 종류를 intent.extract_slots 로 뽑아
+예약 도구를 호출하고, 도구 결과로 정해진 문장을 만들어 토큰 단위로 스트리밍합니다.
+
+사용법: LLM_BACKEND=fake python api_google_sheet.py
+"""
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+
+from intent import extract_slots, render_result
+
+
+class ScriptedChatModel(BaseChatModel):
+    """규칙 기반 가짜 채팅 모델 (도구 호출 + 토큰 스트리밍 지원)"""
+
+    latency_ms: float = Field(default=0.0, description="호출당 첫 토큰까지 지연 (ms)")
+    token_delay_ms: float = Field(default=0.0, description="토큰 사이 지연 (ms)")
+    tool_names: List[str] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        names = [getattr(tool, "name", None) or tool.get("name") for tool in tools]
+        return self.model_copy(update={"tool_names": names})
+
+    # ---- 응답 결정 ----
+
+    def _decide(self, messages: List[BaseMessage]) -> AIMessage:
+        last = messages[-1] if messages else HumanMessage(content="")
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=self._summarize_tool(last))
+
+        text = str(last.content)
+        slots: Dict[str, str] = {}
+        # 이전 사용자 메시지들의 정보도 이어서 사용
+        for msg in messages:
+            if isinstance(msg, HumanMessage):
+                slots.update(extract_slots(str(msg.content)))
+
+        if "취소" in text and "cancel_reservation" in self.tool_names and "name" in slots:
+            return self._tool_call("cancel_reservation", {"name": slots["name"]})
+        if "예약" in text and "append_reservation" in self.tool_names:
+            missing = [label for key, label in (
+                ("name", "성함"), ("date", "예약일"), ("time", "예약시간"), ("service", "시술 종류"),
+            ) if key not in slots]
+            if not missing:
+                return self._tool_call("append_reservation", {
+                    "name": slots["name"],
+                    "date": slots["date"],
+                    "time": slots["time"],
+                    "service": slots["service"],
+                })
+            return AIMessage(content=f"예약을 도와드릴게요. {', '.join(missing)}을(를) 알려주시겠어요?")
+        return AIMessage(content="안녕하세요, 헤어샵 예약 상담입니다. 예약 또는 예약 취소를 도와드릴까요?")
+
+    def _tool_call(self, name: str, args: Dict[str, Any]) -> AIMessage:
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:12]}", "type": "tool_call"}],
+        )
+
+    def _summarize_tool(self, message: ToolMessage) -> str:
+        try:
+            result = json.loads(str(message.content))
+        except ValueError:
+            return "요청하신 작업을 처리했습니다."
+        return render_result(message.name, result)
+
+    def _usage(self, messages: List[BaseMessage], output: AIMessage) -> Dict[str, int]:
+        # 대략 한글 2자당 1토큰으로 계산
+        input_tokens = sum(len(str(m.content)) for m in messages) // 2 + 1
+        output_tokens = len(str(output.content)) // 2 + 1
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    # ---- BaseChatModel 구현 ----
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency_ms / 1000.0)
+        message = self._decide(messages)
+        message.usage_metadata = self._usage(messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency_ms / 1000.0)
+        message = self._decide(messages)
+        message.usage_metadata = self._usage(messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency_ms / 1000.0)
+        for chunk in self._chunks(messages):
+            time.sleep(self.token_delay_ms / 1000.0)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency_ms / 1000.0)
+        for chunk in self._chunks(messages):
+            await asyncio.sleep(self.token_delay_ms / 1000.0)
+            # ChatOpenAI 처럼 도구 호출/사용량 조각도 콜백으로 전달
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+    def _chunks(self, messages: List[BaseMessage]) -> Iterator[ChatGenerationChunk]:
+        message = self._decide(messages)
+        usage = self._usage(messages, message)
+        if message.tool_calls:
+            call = message.tool_calls[0]
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[{
+                    "name": call["name"],
+                    "args": json.dumps(call["args"], ensure_ascii=False),
+                    "id": call["id"],
+                    "index": 0,
+                    "type": "tool_call_chunk",
+                }],
+                usage_metadata=usage,
+            ))
+            return
+        # 2글자씩 토큰으로 나누어 전송
+        text = str(message.content)
+        tokens = [text[i:i + 2] for i in range(0, len(text), 2)]
+        for i, token in enumerate(tokens):
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content=token,
+                usage_metadata=usage if i == len(tokens) - 1 else None,
+            ))
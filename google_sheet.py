@@ -1,20 +1,17 @@
 import asyncio
-import nest_asyncio
 import json
 import os
 import platform
+import traceback
 import uuid
 
-from langgraph.prebuilt import create_react_agent
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 from dotenv import load_dotenv
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langchain_core.messages.ai import AIMessageChunk
 from langchain_core.messages.tool import ToolMessage
-from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.runnables import RunnableConfig
 
+from prompts import build_system_prompt
+
 os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = "/home/ubuntu/Desktop/mcp_sheets.json"
 
 # 환경 변수 로드 (.env 파일에서 API 키 등의 설정을 가져옴)
@@ -72,70 +69,8 @@ def save_config_to_json(config):
         return False
 
 
-SYSTEM_PROMPT = """<ROLE>
-You are hair shop reservation agent with an ability to use tools. 
-You will be given a question and you will use the tools to answer the question.
-Pick the most relevant tool to answer the question. 
-If you are failed to answer the question, try different tools to get context.
-Answer as if you’re talking to a customer on the phone — keep it polite and conversational.
-</ROLE>
-
-----
-
-<INSTRUCTIONS>
-Step 1: Analyze the question
-- Analyze user's question and final goal.
-- If the user's question is consist of multiple sub-questions, split them into smaller sub-questions.
-
-Step 2: Pick the most relevant tool
-- Pick the most relevant tool to answer the question.
-- If you are failed to answer the question, try different tools to get context.
-
-Step 3: Answer the question
-- Answer the question in the same language as the question.
-- Answer as if you’re talking to a customer on the phone — keep it polite and conversational.
-
-Step 4: Provide the source of the answer(if applicable)
-- If you've used the tool, provide the source of the answer.
-- Valid sources are either a website(URL) or a document(PDF, etc).
-
-Guidelines:
-- Answer in the same language as the question.
-- Answer should be concise and to the point.
-- Avoid response your output with any other information than the answer and the source.  
-- Use the format 2025-MM-DD to record the reservation date. This year is 2025. Do not change it.
-</INSTRUCTIONS>
-
-<PROCESS>
-A. 예약하기
-    1. 문서ID는 "1lXs3JrOuvBSew2EJUZhEeaEQfGaSqIcuKcVicOkRxMQ" 시트의 이름은 "시트1"입니다.
-    2. 성명, 예약일, 예약시간, 시술 종류는 필수요소입니다. 정보가 부족하다면 정중하게 요청하세요.
-    3. 필요한 정보가 다 수집되었다면 get_sheet_data 툴을 활용하여 기존 예약 목록을 확인하세요.
-    4. 예약일과 예약시간이 모두 동일한 정보가 존재한다면, 예약을 절대 진행하지 마세요.
-       - 중복 예약이 감지되었을 경우 반드시 다음과 같이 응답하세요:
-         - "해당 시간에는 이미 예약이 있습니다. 다른 시간대를 선택해주세요."
-       - 가능한 다른 시간대를 2~3개 추천하세요.
-    5. 중복 예약이 없음을 확인한 후, 빈 행을 탐색하여 해당 위치에 정보를 기입하세요.
-    6. update_cells 툴을 활용하여 새로운 예약정보를 정확히 입력하세요.
-B. 예약 취소하기
-    1. 문서ID는 "1lXs3JrOuvBSew2EJUZhEeaEQfGaSqIcuKcVicOkRxMQ" 시트의 이름은 "시트1"입니다.
-    2. get_sheet_data 툴을 활용하여 취소를 요청받은 이름을 탐색합니다.
-    3. 해당 이름이 있는 행의 정보를 지웁니다.
-    4. 하나의 행이 비게 되므로 그 아래 내용들을 위로 한 칸씩 당깁니다.
-    
-</PROCESS>
-
-----
-
-<OUTPUT_FORMAT>
-(concise answer to the question)
-
-**Source**(if applicable)
-- (source1: valid URL)
-- (source2: valid URL)
-- ...
-</OUTPUT_FORMAT>
-"""
+# 시스템 프롬프트 (Prompt.txt 에서 조립, 시트 도구를 직접 사용하는 절차)
+SYSTEM_PROMPT = build_system_prompt("sheet_tools")
 
 class HospitalReservationAgent:
     def __init__(self):
@@ -159,6 +94,12 @@ class HospitalReservationAgent:
             self.session_id = str(uuid.uuid4())
             print(f"🆔 세션 ID 생성: {self.session_id}")
             
+            # 에이전트 생성에만 쓰는 무거운 모듈은 여기서 import (모듈을 불러오기만 할 때는 비용 없음)
+            from langchain_mcp_adapters.client import MultiServerMCPClient
+            from langchain_openai import ChatOpenAI
+            from langgraph.checkpoint.memory import MemorySaver
+            from langgraph.prebuilt import create_react_agent
+            
             # MCP 클라이언트 초기화
             self.client = MultiServerMCPClient(mcp_config)
             await self.client.__aenter__()
@@ -207,7 +148,6 @@ class HospitalReservationAgent:
             
         except Exception as e:
             print(f"❌ 에이전트 초기화 실패: {str(e)}")
-            import traceback
             traceback.print_exc()
             raise
     
@@ -258,7 +198,6 @@ class HospitalReservationAgent:
         except Exception as e:
             error_msg = f"대화 중 오류가 발생했습니다: {str(e)}"
             print(f"❌ {error_msg}")
-            import traceback
             traceback.print_exc()
             return error_msg
     
@@ -320,7 +259,6 @@ class HospitalReservationAgent:
         except Exception as e:
             error_msg = f"스트리밍 중 오류가 발생했습니다: {str(e)}"
             print(f"❌ {error_msg}")
-            import traceback
             traceback.print_exc()
             yield error_msg
 
@@ -333,10 +271,14 @@ async def test_sheet_access():
         with open("config.json", 'r', encoding='utf-8') as f:
             mcp_config = json.load(f)
         
-        # MCP 클라이언트를 통한 접근
-        async with MultiServerMCPClient(mcp_config) as client:
+        # MCP 클라이언트를 통한 접근 (연결 시 받은 도구 스키마를 등록부에 저장)
+        from mcp_pool import VersionedMCPClient
+        from tool_registry import ToolRegistry, ToolArgumentError
+        async with VersionedMCPClient(mcp_config) as client:
             tools = client.get_tools()
             print(f"✅ 도구 로드 성공: {len(tools)}개")
+            registry = ToolRegistry()
+            registry.register(client.server_name_to_tools, client.server_versions)
             
             # 시트 읽기 도구 찾기
             sheet_tools = [tool for tool in tools if 'sheet' in tool.name.lower() or 'get' in tool.name.lower()]
@@ -346,82 +288,49 @@ async def test_sheet_access():
                 for tool in sheet_tools:
                     print(f"  - {tool.name}: {tool.description}")
                 
-                # 첫 번째 시트 도구로 테스트
-                test_tool = sheet_tools[0]
-                print(f"🧪 테스트 도구: {test_tool.name}")
+                # 시트 읽기 도구로 테스트 (없으면 첫 번째 시트 도구)
+                test_tool = next((tool for tool in sheet_tools if tool.name == "get_sheet_data"), sheet_tools[0])
+                print(f"🧪 테스트 도구: {test_tool.name} ({registry.sources.get(test_tool.name)})")
                 
                 # 도구 스키마 상세 확인
-                if hasattr(test_tool, 'inputSchema'):
-                    schema = test_tool.inputSchema
-                    print(f"📋 도구 스키마:")
-                    print(json.dumps(schema, indent=2, ensure_ascii=False))
-                    
-                    # 필수 매개변수 확인
-                    if 'properties' in schema:
-                        required_params = schema.get('required', [])
-                        print(f"🔧 필수 매개변수: {required_params}")
-                        print("📝 매개변수 상세:")
-                        for prop_name, prop_info in schema['properties'].items():
-                            is_required = prop_name in required_params
-                            prop_type = prop_info.get('type', 'unknown')
-                            prop_desc = prop_info.get('description', '설명 없음')
-                            print(f"  - {prop_name} ({'필수' if is_required else '선택'}): {prop_type} - {prop_desc}")
+                schema = registry.schemas.get(test_tool.name, {})
+                print(f"📋 도구 스키마:")
+                print(json.dumps(schema, indent=2, ensure_ascii=False))
+                print(f"🔧 매개변수: {registry.usage(test_tool.name)}")
                 
                 # 스프레드시트 ID와 시트명
                 SPREADSHEET_ID = "1lXs3JrOuvBSew2EJUZhEeaEQfGaSqIcuKcVicOkRxMQ"
                 SHEET_NAME = "시트1"
                 
-                # 다양한 매개변수 조합 시도
-                param_combinations = [
+                # 매개변수 이름을 추측해 여러 번 호출하지 않고, 스키마에 있는 이름만 골라 한 번 호출
+                params = registry.fit_args(
+                    test_tool.name,
                     {"spreadsheet_id": SPREADSHEET_ID, "sheet": SHEET_NAME, "range": "A1:Z100"},
-                    {"spreadsheet_id": SPREADSHEET_ID, "sheet": SHEET_NAME},
-                    {"spreadsheet_id": SPREADSHEET_ID, "range": f"{SHEET_NAME}!A1:Z100"},
-                    {"spreadsheet_id": SPREADSHEET_ID, "sheet_name": SHEET_NAME, "range": "A1:Z100"},
-                    {"spreadsheet_id": SPREADSHEET_ID, "range": "A1:Z100"},
-                ]
+                )
+                if "sheet" not in params and "range" in params:
+                    params["range"] = f"{SHEET_NAME}!A1:Z100"  # 시트 이름을 범위에 포함하는 서버
+                try:
+                    registry.check(test_tool.name, params)
+                except ToolArgumentError as e:
+                    print(f"❌ 매개변수가 스키마와 맞지 않습니다 (호출하지 않음): {e}")
+                    return False
                 
-                for i, params in enumerate(param_combinations):
-                    try:
-                        print(f"🔄 시도 {i+1}: {params}")
-                        
-                        # ainvoke 시도
-                        if hasattr(test_tool, 'ainvoke'):
-                            result = await test_tool.ainvoke(params)
-                            print(f"✅ 시트 읽기 성공!")
-                            
-                            # 결과 처리
-                            if hasattr(result, 'content'):
-                                content = result.content
-                                if isinstance(content, list) and content:
-                                    for item in content:
-                                        if hasattr(item, 'text'):
-                                            print(f"📊 데이터 샘플:\n{item.text[:500]}...")
-                                            return True
-                                        else:
-                                            print(f"📊 데이터 샘플:\n{str(item)[:500]}...")
-                                            return True
-                                elif isinstance(content, str):
-                                    print(f"📊 데이터 샘플:\n{content[:500]}...")
-                                    return True
-                            elif isinstance(result, str):
-                                print(f"📊 데이터 샘플:\n{result[:500]}...")
-                                return True
-                            
-                            break
-                            
-                    except Exception as e:
-                        print(f"❌ 시도 {i+1} 실패: {str(e)}")
-                        continue
+                print(f"🔄 시트 읽기: {params}")
+                result = await test_tool.ainvoke(params)
+                print(f"✅ 시트 읽기 성공!")
                 
-                print("⚠️ 모든 시도 실패")
-                return False
+                # 결과 처리
+                content = getattr(result, 'content', result)
+                if isinstance(content, list):
+                    content = "\n".join(getattr(item, 'text', str(item)) for item in content)
+                print(f"📊 데이터 샘플:\n{str(content)[:500]}...")
+                return True
             else:
                 print("❌ 시트 관련 도구를 찾을 수 없습니다!")
                 return False
                 
     except Exception as e:
         print(f"❌ 시트 접근 테스트 실패: {str(e)}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -466,7 +375,6 @@ async def run_interactive_chat():
                 
     except Exception as e:
         print(f"❌ 시스템 오류: {str(e)}")
-        import traceback
         traceback.print_exc()
     finally:
         # 리소스 정리
@@ -483,6 +391,7 @@ async def main():
     
     # nest_asyncio 적용 (필요한 경우)
     try:
+        import nest_asyncio
         nest_asyncio.apply()
         print("🔄 nest_asyncio 적용 완료")
     except:
@@ -0,0 +1,95 @@
+"""모듈 import 시간 측정 (python -X importtime)
+
+워커 프로세스가 뜰 때 api_google_sheet 를 import 하는 데 걸리는 시간을 측정합니다.
+매번 새 프로세스에서 import 하고, 중앙값과 가장 무거운 패키지(자기 시간 합계)를 보여줍니다.
+
+    python import_benchmark.py                                # api_google_sheet, google_sheet
+    python import_benchmark.py --modules api_google_sheet --runs 10 --top 20
+    python import_benchmark.py --preload                      # 시작 준비 때 스레드에서 읽는 모듈까지 포함
+
+--preload 는 에이전트 초기화까지 마친 상태(준비 완료 시점)에 필요한 모듈 전체의 import 비용입니다.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# api_google_sheet 의 AGENT_MODULES + MODEL_MODULES + MCP_MODULES (시작 준비 중 스레드에서 import)
+PRELOAD_MODULES = ("mcp_pool", "langchain_openai", "langgraph.prebuilt", "checkpointer")
+
+
+def import_times(statement: str) -> List[Tuple[str, int, int]]:
+    """새 프로세스에서 statement 를 실행하고 (모듈, 자기 시간 us, 누적 시간 us) 목록을 반환"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import 실패: {statement}\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(modules: List[str], runs: int, top: int) -> Dict[str, object]:
+    statement = "; ".join(f"import {module}" for module in modules)
+    totals: List[float] = []
+    by_package: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(runs):
+        rows = import_times(statement)
+        totals.append(sum(self_us for _, self_us, _ in rows) / 1000)
+        packages: Dict[str, int] = defaultdict(int)
+        for name, self_us, _ in rows:
+            packages[name.split(".")[0]] += self_us
+        for package, self_us in packages.items():
+            by_package[package].append(self_us)
+    heaviest = sorted(
+        ((package, statistics.median(values) / 1000) for package, values in by_package.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:top]
+    return {
+        "statement": statement,
+        "runs": runs,
+        "median_ms": round(statistics.median(totals), 1),
+        "min_ms": round(min(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "heaviest_packages_ms": {package: round(ms, 1) for package, ms in heaviest},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈 import 시간 측정 (python -X importtime)")
+    parser.add_argument("--modules", nargs="+", default=["api_google_sheet", "google_sheet"])
+    parser.add_argument("--runs", type=int, default=5, help="모듈별 측정 횟수 (매번 새 프로세스)")
+    parser.add_argument("--top", type=int, default=10, help="표시할 무거운 패키지 수")
+    parser.add_argument("--preload", action="store_true", help="시작 준비 때 읽는 모듈까지 함께 측정")
+    parser.add_argument("--output", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        modules = [module, *PRELOAD_MODULES] if args.preload else [module]
+        report = measure(modules, args.runs, args.top)
+        results[module] = report
+        print(f"📦 {report['statement']}")
+        print(f"  - 중앙값 {report['median_ms']}ms (최소 {report['min_ms']}ms, 최대 {report['max_ms']}ms, {args.runs}회)")
+        for package, ms in report["heaviest_packages_ms"].items():
+            print(f"    {package:<28} {ms:>8.1f}ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"💾 결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import re
+from typing import Any, Dict, Optional, Set
+
+from reservation_index import normalize_date, normalize_time
+
+# 의도별 키워드 (앞에 있는 의도가 우선)
+INTENT_KEYWORDS = (
+    ("cancel", ("취소", "캔슬", "못 갈", "못갈")),
+    ("lookup", ("조회", "확인", "언제", "몇 시", "몇시")),
+    ("book", ("예약", "잡아", "방문")),
+)
+
+# 슬롯 추출 패턴
+_DATE = re.compile(r"\d{4}-\d{1,2}-\d{1,2}|\d{1,2}\s*월\s*\d{1,2}\s*일")
+_TIME = re.compile(r"(?:오전|오후)?\s*\d{1,2}\s*(?::\s*\d{2}|시(?:\s*\d{1,2}\s*분)?)")
+_NAMES = (
+    re.compile(r"(?:이름은|성함은|저는)\s*([가-힣]{2,4}?)(?:입니다|이에요|예요|이고|고|,|\s|$)"),
+    re.compile(r"([가-힣]{2,4})\s*(?:입니다|이에요|예요)"),
+    re.compile(r"([가-힣]{2,4})\s*님?\s*(?:의\s*)?예약"),
+)
+_SERVICES = ("커트", "펌", "염색", "드라이", "클리닉")
+# 이름 자리에 자주 오지만 이름이 아닌 단어
+_NOT_NAMES = (
+    "오늘", "내일", "모레", "이번", "다음", "제가", "저의", "혹시", "지금", "기존",
+    "언제", "어디", "무엇", "몇시", "몇시에",
+)
+
+# 문의(질문) 표현: 예약/취소를 실행하지 않고 LLM 이 답하도록 넘김
+_QUESTION_MARKERS = (
+    "?", "가능한가", "가능할까", "가능한지", "가능하나", "되나요", "될까요", "되는지",
+    "있나요", "있을까요", "어떻게", "어떡", "수수료", "환불", "할까요", "하나요",
+)
+# 예약 변경 표현: 새 예약 추가나 취소 한쪽만 실행하면 안 되므로 LLM 에 맡김
+_RESCHEDULE_MARKERS = ("바꿔", "바꾸", "변경", "옮겨", "옮기", "미뤄", "미루", "당겨")
+# 정정/부정 표현: 앞에서 말한 내용을 뒤집을 수 있으므로 LLM 에 맡김
+_CORRECTION_MARKERS = ("말고", "아니", "대신")
+# 의도별로 실제 요청을 나타내는 표현 (공백 제거 후 비교, "예약" 같은 명사만으로는 세지 않음)
+_INTENT_ACTIONS = (
+    ("book", ("예약해", "예약할", "예약하고", "예약부탁", "잡아", "방문")),
+    ("cancel", ("취소", "캔슬", "못갈")),
+    ("lookup", ("조회", "확인", "언제", "몇시")),
+)
+# 취소를 바로 실행하는 명시적인 요청 표현 (공백 제거 후 비교)
+_CANCEL_COMMANDS = tuple(
+    stem + ending
+    for stem in ("취소", "캔슬")
+    for ending in ("해주", "해줘", "할게", "하겠", "부탁", "시켜")
+)
+
+# 의도별 필수 슬롯과 바로 실행할 예약 도구
+REQUIRED_SLOTS = {
+    "book": ("name", "date", "time", "service"),
+    "cancel": ("name",),
+    "lookup": ("name",),
+}
+INTENT_TOOLS = {
+    "book": "append_reservation",
+    "cancel": "cancel_reservation",
+    "lookup": "find_reservations",
+}
+
+# 요청을 받자마자 보내는 의도별 안내 문구
+ACKNOWLEDGEMENTS = {
+    "book": "네, 예약을 도와드릴게요. 잠시만 기다려주세요. ",
+    "cancel": "네, 예약 취소를 도와드릴게요. 잠시만 기다려주세요. ",
+    "lookup": "네, 예약 내역을 확인해드릴게요. 잠시만 기다려주세요. ",
+}
+
+# 의도를 알 수 없을 때 첫 도구 호출 시점에 보내는 안내 문구
+DEFAULT_ACKNOWLEDGEMENT = "요청을 처리 중입니다. 잠시만 기다려주세요. "
+
+
+def detect_intent(text: str) -> Optional[str]:
+    """사용자 메시지의 의도 (book / cancel / lookup, 알 수 없으면 None)"""
+    text = text or ""
+    for intent, keywords in INTENT_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return intent
+    return None
+
+
+def is_question(text: str) -> bool:
+    """예약 가능 여부, 수수료 등을 묻는 문의인지"""
+    return any(marker in text for marker in _QUESTION_MARKERS)
+
+
+def is_reschedule(text: str) -> bool:
+    """기존 예약의 변경 요청인지"""
+    return any(marker in text for marker in _RESCHEDULE_MARKERS)
+
+
+def is_correction(text: str) -> bool:
+    """"말고", "아니다" 처럼 앞의 내용을 정정/부정하는 표현이 있는지"""
+    return any(marker in text for marker in _CORRECTION_MARKERS)
+
+
+def stated_intents(text: str) -> Set[str]:
+    """메시지에서 요청한 의도 전부 ("취소하고 다시 예약해주세요" -> {"cancel", "book"})"""
+    compact = re.sub(r"\s+", "", text)
+    return {intent for intent, actions in _INTENT_ACTIONS if any(action in compact for action in actions)}
+
+
+def has_multiple_values(text: str) -> bool:
+    """시술 종류/예약일/예약시간 중 하나라도 서로 다른 값이 두 개 이상 있는지 ("커트랑 염색")"""
+    services = [service for service in _SERVICES if service in text]
+    dates = {normalize_date(match) for match in _DATE.findall(text)}
+    times = {normalize_time(match) for match in _TIME.findall(_DATE.sub(" ", text))}
+    return len(services) > 1 or len(dates) > 1 or len(times) > 1
+
+
+def is_cancel_command(text: str) -> bool:
+    """"취소해주세요", "취소할게요" 처럼 취소를 분명하게 요청했는지"""
+    compact = re.sub(r"\s+", "", text)
+    return any(command in compact for command in _CANCEL_COMMANDS)
+
+
+def is_ambiguous_time(text: str) -> bool:
+    """오전/오후 없이 1~12시로 쓴 시간인지 ("3시" 는 03:00 인지 15:00 인지 알 수 없음)
+
+    "09:30", "17:00" 처럼 두 자리 24시간 표기와 13시 이후는 모호하지 않은 것으로 봅니다.
+    """
+    if "오전" in text or "오후" in text:
+        return False
+    match = re.search(r"(\d{1,2})\s*(:|시)", text)
+    if not match:
+        return True
+    if match.group(2) == ":" and len(match.group(1)) == 2:
+        return False
+    return 1 <= int(match.group(1)) <= 12
+
+
+def acknowledgement(text: str) -> Optional[str]:
+    """의도에 맞는 안내 문구 (의도를 알 수 없거나 문의이면 None)"""
+    if is_question(text or ""):
+        return None
+    intent = detect_intent(text)
+    return ACKNOWLEDGEMENTS.get(intent) if intent else None
+
+
+def extract_slots(text: str) -> Dict[str, str]:
+    """메시지에서 성명/예약일/예약시간/시술 종류 추출"""
+    slots = {}
+    if match := _DATE.search(text):
+        slots["date"] = normalize_date(match.group(0))
+    if match := _TIME.search(_DATE.sub(" ", text)):
+        slots["time"] = normalize_time(match.group(0))
+    for pattern in _NAMES:
+        match = pattern.search(text)
+        if match and not match.group(1).startswith(_SERVICES) and match.group(1) not in _NOT_NAMES:
+            slots["name"] = match.group(1)
+            break
+    for service in _SERVICES:
+        if service in text:
+            slots["service"] = service
+            break
+    return slots
+
+
+def route(text: str) -> Optional[Dict[str, Any]]:
+    """LLM 없이 바로 처리할 수 있는 요청이면 {"intent", "tool", "slots"} 반환
+
+    의도를 알 수 없거나 필수 슬롯이 빠진 모호한 요청은 None (LLM 에이전트가 처리)
+    문의, 예약 변경, 명시적이지 않은 취소, 오전/오후가 없는 시간도 실행하지 않고 LLM 에 맡깁니다.
+    시트 쓰기는 되돌릴 수 없으므로 정정/부정 표현, 두 가지 이상의 의도, 값이 여러 개인 슬롯
+    (시술/날짜/시간)도 한쪽만 골라 실행하지 않고 LLM 에 맡깁니다.
+    """
+    intent = detect_intent(text)
+    if intent is None or is_question(text) or is_reschedule(text) or is_correction(text):
+        return None
+    if len(stated_intents(text)) > 1 or has_multiple_values(text):
+        return None
+    if intent == "cancel" and not is_cancel_command(text):
+        return None
+    time_text = _TIME.search(_DATE.sub(" ", text))
+    if time_text and is_ambiguous_time(time_text.group(0)):
+        return None
+    slots = extract_slots(text)
+    if any(key not in slots for key in REQUIRED_SLOTS[intent]):
+        return None
+    # 날짜/시간이 들어간 "확인" 요청은 예약 가능 여부 문의일 수 있으므로 LLM 에 맡김
+    if intent == "lookup" and ("date" in slots or "time" in slots):
+        return None
+    return {"intent": intent, "tool": INTENT_TOOLS[intent], "slots": slots}
+
+
+def _describe(reservation: Dict[str, Any]) -> str:
+    return " ".join(
+        str(reservation[key]) for key in ("date", "time", "service") if reservation.get(key)
+    )
+
+
+def render_result(tool: str, result: Dict[str, Any]) -> str:
+    """예약 도구 결과(JSON)를 안내 문장으로 변환"""
+    reservation = result.get("reservation") or {}
+    name = reservation.get("name", "")
+    if tool == "find_reservations":
+        reservations = result.get("reservations", [])
+        if not reservations:
+            return "해당 이름으로 등록된 예약이 없습니다."
+        listing = ", ".join(_describe(item) for item in reservations)
+        return f"{reservations[0].get('name', '')}님의 예약은 {listing} 입니다."
+    if result.get("success"):
+        if tool == "cancel_reservation":
+            return f"{name}님의 {_describe(reservation)} 예약이 취소되었습니다. 감사합니다."
+        return f"{name}님, {_describe(reservation)} 예약이 완료되었습니다. 감사합니다."
+    reason = result.get("reason", "요청을 처리할 수 없습니다.")
+    if result.get("reservations"):
+        listing = ", ".join(_describe(item) for item in result["reservations"])
+        return f"{reason} ({listing})"
+    alternatives = ", ".join(
+        f"{slot['date']} {slot['time']}" for slot in result.get("alternatives", [])
+    )
+    return f"{reason} 가능한 시간은 {alternatives} 입니다." if alternatives else reason
@@ -0,0 +1,81 @@
+"""intent.route 회귀 테스트 (LLM 없이 바로 실행하면 안 되는 요청)
+
+    python -m pytest intent_test.py
+"""
+import pytest
+
+import intent
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        # 취소 가능 여부/수수료 문의, 명시적이지 않은 취소 의사는 실제 예약을 취소하면 안 됨
+        "홍길동입니다. 예약 취소 가능한가요?",
+        "취소하면 수수료 있나요? 저는 김민수입니다",
+        "저는 이영희예요. 다음주에 못 갈 것 같은데 어떻게 하죠?",
+        # 예약 변경은 새 예약 추가로 처리하면 기존 예약이 남음
+        "김민수 예약 9월 19일 오후 5시 커트로 바꿔주세요",
+        "저는 김민수입니다. 9월 19일 오후 3시 펌 예약을 오후 5시로 변경해주세요",
+        # 예약 가능 여부 문의는 바로 예약하면 안 됨
+        "3시에 펌 예약 가능한가요?",
+        "제 이름은 김철수이고 9월 19일 오후 3시에 펌 예약 가능한가요",
+        # 오전/오후가 없는 1~12시는 03:00 으로 해석하지 않고 LLM 에 맡김
+        "제 이름은 김철수이고 9월 19일 3시에 커트 예약해주세요",
+        "제 이름은 김철수이고 9월 19일 2시 30분에 펌 예약해주세요",
+        "김철수 예약 9월 19일 3시 취소해주세요",
+        # 시술/날짜/시간이 여러 개면 하나만 골라 예약하면 안 됨
+        "제 이름은 김철수이고 9월 19일 오후 5시에 커트랑 염색 예약해주세요",
+        "제 이름은 김철수이고 9월 19일이나 9월 20일 오후 5시에 커트 예약해주세요",
+        "제 이름은 김철수이고 9월 19일 오후 3시나 오후 5시에 커트 예약해주세요",
+        # 정정/부정 표현은 앞의 내용을 그대로 실행하면 안 됨
+        "제 이름은 김철수이고 9월 19일 오후 5시에 커트 예약 말고 내일로 할게요",
+        "홍길동입니다. 예약 취소해주세요 아 아니다",
+        "홍길동입니다. 9월 19일 오후 5시 커트 대신 펌으로 해주세요",
+        # 두 가지 이상의 의도
+        "홍길동입니다. 예약 확인하고 취소해주세요",
+        "제 이름은 김철수이고 예약 취소하고 9월 20일 오후 5시에 커트 예약해주세요",
+    ],
+)
+def test_route_hands_over_to_llm(text):
+    assert intent.route(text) is None
+
+
+@pytest.mark.parametrize(
+    "text, tool, slots",
+    [
+        (
+            "제 이름은 김철수이고 9월 19일 오후 5시에 커트 예약해주세요",
+            "append_reservation",
+            {"name": "김철수", "time": "17:00", "service": "커트"},
+        ),
+        (
+            "제 이름은 김철수이고 2025-09-19 17:00 에 커트 예약해주세요",
+            "append_reservation",
+            {"name": "김철수", "date": "2025-09-19", "time": "17:00"},
+        ),
+        ("홍길동입니다. 예약 취소해주세요", "cancel_reservation", {"name": "홍길동"}),
+        ("저는 김민수입니다. 예약 취소할게요", "cancel_reservation", {"name": "김민수"}),
+        ("홍길동 예약 9월 19일 오후 3시 취소해 주세요", "cancel_reservation", {"name": "홍길동", "time": "15:00"}),
+        ("홍길동입니다. 제 예약 조회해주세요", "find_reservations", {"name": "홍길동"}),
+    ],
+)
+def test_route_runs_explicit_requests(text, tool, slots):
+    route = intent.route(text)
+    assert route is not None
+    assert route["tool"] == tool
+    for key, value in slots.items():
+        assert route["slots"][key] == value
+
+
+@pytest.mark.parametrize(
+    "text, ambiguous",
+    [("3시", True), ("12시", True), ("3:30", True), ("오후 3시", False), ("오전 10시", False), ("17시", False), ("09:30", False), ("17:00", False)],
+)
+def test_is_ambiguous_time(text, ambiguous):
+    assert intent.is_ambiguous_time(text) is ambiguous
+
+
+def test_question_has_no_acknowledgement():
+    assert intent.acknowledgement("취소하면 수수료 있나요?") is None
+    assert intent.acknowledgement("예약 취소해주세요") == intent.ACKNOWLEDGEMENTS["cancel"]
@@ -0,0 +1,357 @@
+"""MCP 클라이언트 세션 풀
+
+MCP 클라이언트 하나를 모든 요청이 공유하면 stdio 서버 프로세스 하나가 모든 도구 호출을
+처리하고, 그 프로세스가 죽거나 멈추면 재시작 전까지 모든 요청이 실패합니다.
+이 풀은 같은 설정으로 클라이언트(= 서버 프로세스 묶음)를 N 개 띄워 두고 호출마다 하나를 빌려 씁니다.
+
+stdio 서버 프로세스 수 = 설정의 서버 수 x MCP_POOL_SIZE x 워커 수(serve.py --workers) 입니다.
+예: 서버 1개, 풀 2, 워커 4 -> 서버 프로세스 8개. 기본값 1 은 풀 없이 쓰던 때와 프로세스 수가 같고
+(죽거나 멈춘 클라이언트는 그래도 다시 띄움), 동시 도구 호출이 많을 때만 2 정도로 늘리세요.
+
+- 빌려 쓰기(checkout): 쉬고 있는 클라이언트 하나를 독점해서 도구를 호출하고 돌려놓음
+- 상태 확인: 주기적으로 쉬고 있는 클라이언트에 ping, 응답이 없으면 다시 띄움
+- 다시 띄우기: 호출 중 연결 오류/시간 초과가 나면 그 클라이언트만 백그라운드에서 재시작하고,
+  호출한 쪽에는 ConnectionError/TimeoutError 를 올려 재시도 미들웨어가 다른 클라이언트로 다시 호출
+
+각 클라이언트는 전용 태스크 안에서 열고 닫습니다 (stdio 연결의 anyio 취소 범위는 연 태스크에서 닫아야 함).
+연결할 때 초기화 응답(serverInfo)의 서버 이름/버전을 기록해 두고, 도구 스키마 등록부(tool_registry)가 캐시 키로 사용합니다.
+
+환경 변수:
+    MCP_POOL_SIZE: 워커당 띄워 둘 클라이언트 수 (기본 1)
+    MCP_START_TIMEOUT: 클라이언트 하나를 띄우는 최대 시간 (초, 기본 30)
+    MCP_CALL_TIMEOUT: 도구 호출 1회 최대 시간 (초, 기본 60, 넘으면 멈춘 것으로 보고 재시작)
+    MCP_CHECKOUT_TIMEOUT: 쉬는 클라이언트를 기다리는 최대 시간 (초, 기본 30)
+    MCP_PROBE_INTERVAL: 상태 확인 주기 (초, 기본 30, 0 이면 끔)
+    MCP_PROBE_TIMEOUT: ping 응답 대기 시간 (초, 기본 5)
+"""
+import asyncio
+import contextlib
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "1"))
+MCP_START_TIMEOUT = float(os.getenv("MCP_START_TIMEOUT", "30"))
+MCP_CALL_TIMEOUT = float(os.getenv("MCP_CALL_TIMEOUT", "60"))
+MCP_CHECKOUT_TIMEOUT = float(os.getenv("MCP_CHECKOUT_TIMEOUT", "30"))
+MCP_PROBE_INTERVAL = float(os.getenv("MCP_PROBE_INTERVAL", "30"))
+MCP_PROBE_TIMEOUT = float(os.getenv("MCP_PROBE_TIMEOUT", "5"))
+RESPAWN_BACKOFF_CAP = 30.0
+
+
+class VersionedMCPClient:
+    """서버별 MCP 세션을 열고 도구 목록과 서버 버전(serverInfo)을 모으는 클라이언트
+
+    MultiServerMCPClient 는 session.initialize() 의 결과를 버리므로, 같은 연결 설정(stdio/sse/websocket)으로
+    mcp ClientSession 을 직접 열고 공개 API(initialize, load_mcp_tools)만 사용합니다.
+    MultiServerMCPClient 와 같은 속성(sessions, server_name_to_tools, get_tools())을 제공합니다.
+    """
+
+    def __init__(self, connections: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.connections = connections or {}
+        self.exit_stack = contextlib.AsyncExitStack()
+        self.sessions: Dict[str, ClientSession] = {}
+        self.server_name_to_tools: Dict[str, List[BaseTool]] = {}
+        self.server_versions: Dict[str, str] = {}
+
+    async def __aenter__(self) -> "VersionedMCPClient":
+        try:
+            for server_name, connection in self.connections.items():
+                await self._connect(server_name, connection)
+        except BaseException:
+            await self.exit_stack.aclose()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.exit_stack.aclose()
+
+    def _transport(self, connection: Dict[str, Any]):
+        transport = connection.get("transport", "stdio")
+        if transport == "stdio":
+            # npx/uvx 같은 실행 명령은 PATH 가 필요하므로 현재 PATH 를 넘김
+            env = {"PATH": os.environ.get("PATH", ""), **(connection.get("env") or {})}
+            return stdio_client(StdioServerParameters(
+                command=connection["command"],
+                args=connection.get("args", []),
+                env=env,
+                cwd=connection.get("cwd"),
+                encoding=connection.get("encoding", "utf-8"),
+                encoding_error_handler=connection.get("encoding_error_handler", "strict"),
+            ))
+        if transport == "sse":
+            return sse_client(
+                connection["url"],
+                connection.get("headers"),
+                connection.get("timeout", 5),
+                connection.get("sse_read_timeout", 300),
+            )
+        if transport == "websocket":
+            from mcp.client.websocket import websocket_client
+
+            return websocket_client(connection["url"])
+        raise ValueError(f"지원하지 않는 MCP 전송 방식: {transport}")
+
+    async def _connect(self, server_name: str, connection: Dict[str, Any]):
+        read, write = await self.exit_stack.enter_async_context(self._transport(connection))
+        session = await self.exit_stack.enter_async_context(
+            ClientSession(read, write, **(connection.get("session_kwargs") or {}))
+        )
+        result = await session.initialize()
+        info = getattr(result, "serverInfo", None)
+        if info is not None:
+            self.server_versions[server_name] = f"{info.name}-{info.version}"
+        self.sessions[server_name] = session
+        self.server_name_to_tools[server_name] = await load_mcp_tools(session)
+
+    def get_tools(self) -> List[BaseTool]:
+        return [tool for tools in self.server_name_to_tools.values() for tool in tools]
+
+
+class PooledClient:
+    """풀에 속한 MCP 클라이언트 하나 (전용 태스크에서 열고 닫음)"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.client: Optional[VersionedMCPClient] = None
+        self.tools: Dict[str, BaseTool] = {}
+        self.healthy = False
+        self.calls = 0
+        self.runner: Optional[asyncio.Task] = None
+        self.stop: Optional[asyncio.Event] = None
+
+    async def start(self, config: Dict[str, Any]):
+        """클라이언트를 열고 도구 목록을 받을 때까지 대기"""
+        ready = asyncio.get_running_loop().create_future()
+        self.stop = asyncio.Event()
+        self.runner = asyncio.create_task(self._run(config, ready, self.stop))
+        try:
+            await ready
+        except asyncio.CancelledError:
+            self.stop.set()
+            raise
+        self.healthy = True
+
+    async def _run(self, config: Dict[str, Any], ready: asyncio.Future, stop: asyncio.Event):
+        client = VersionedMCPClient(config)
+        try:
+            # 서버가 시작 중에 죽으면 초기화 응답을 영원히 기다리므로 시간 제한 (연 태스크 안에서 취소)
+            async with asyncio.timeout(MCP_START_TIMEOUT):
+                await client.__aenter__()
+        except BaseException as e:
+            with contextlib.suppress(Exception):
+                await client.__aexit__(None, None, None)
+            if isinstance(e, TimeoutError):
+                e = TimeoutError(f"MCP 클라이언트 시작 시간 초과 ({MCP_START_TIMEOUT}s)")
+            if not ready.done():
+                ready.set_exception(e if isinstance(e, Exception) else asyncio.CancelledError())
+            if not isinstance(e, Exception):
+                raise
+            return
+        try:
+            self.client = client
+            self.tools = {tool.name: tool for tool in client.get_tools()}
+            if not ready.done():
+                ready.set_result(None)
+            await stop.wait()
+        finally:
+            self.healthy = False
+            try:
+                await client.__aexit__(None, None, None)
+            except Exception as e:
+                print(f"⚠️ MCP 클라이언트 #{self.index} 정리 중 오류: {e}")
+
+    async def ping(self):
+        """연결된 모든 서버에 ping"""
+        await asyncio.gather(*(session.send_ping() for session in self.client.sessions.values()))
+
+    async def close(self, timeout: float = 5.0):
+        """클라이언트 종료 (정리가 멈추면 태스크 취소)"""
+        self.healthy = False
+        if self.stop is not None:
+            self.stop.set()
+        if self.runner is not None and not self.runner.done():
+            with contextlib.suppress(asyncio.TimeoutError, asyncio.CancelledError):
+                await asyncio.wait_for(self.runner, timeout)
+        self.runner = None
+
+
+class MCPClientPool:
+    """같은 MCP 설정으로 띄운 클라이언트 N 개를 호출마다 빌려 쓰는 풀
+
+    사용 예:
+        pool = MCPClientPool(mcp_config)
+        await pool.start()
+        tools = pool.get_tools()   # 호출할 때마다 쉬는 클라이언트를 빌려 쓰는 도구
+        ...
+        await pool.close()
+    """
+
+    def __init__(self, config: Dict[str, Any], size: int = MCP_POOL_SIZE):
+        self.config = config
+        self.members = [PooledClient(i) for i in range(max(1, size))]
+        self.idle: asyncio.Queue = asyncio.Queue()
+        self.tasks: Set[asyncio.Task] = set()  # 다시 띄우기/상태 확인 태스크
+        self.probe_task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.calls = 0
+        self.waits = 0
+        self.call_failures = 0
+        self.probe_failures = 0
+        self.respawns = 0
+
+    async def start(self):
+        """클라이언트를 동시에 띄움 (하나라도 뜨면 진행, 실패한 것은 백그라운드에서 재시도)"""
+        results = await asyncio.gather(
+            *(member.start(self.config) for member in self.members), return_exceptions=True
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if len(errors) == len(self.members):
+            raise errors[0]
+        for member, result in zip(self.members, results):
+            if isinstance(result, BaseException):
+                print(f"⚠️ MCP 클라이언트 #{member.index} 시작 실패 (재시도): {result}")
+                self._respawn(member)
+            else:
+                self.idle.put_nowait(member)
+        if MCP_PROBE_INTERVAL > 0:
+            self.probe_task = asyncio.create_task(self._probe_loop())
+        print(f"🔌 MCP 클라이언트 풀 준비: {self.idle.qsize()}/{len(self.members)}개")
+
+    def get_tools(self) -> List[BaseTool]:
+        """호출마다 쉬는 클라이언트를 빌려 실행하는 도구 목록 (이름/설명/스키마는 원래 도구와 같음)"""
+        member = next(member for member in self.members if member.tools)
+        return [self._pooled_tool(tool) for tool in member.tools.values()]
+
+    def server_tools(self) -> Dict[str, List[BaseTool]]:
+        """서버별 원래 도구 목록 (스키마 등록용)"""
+        member = next(member for member in self.members if member.tools)
+        return dict(member.client.server_name_to_tools)
+
+    def server_versions(self) -> Dict[str, str]:
+        """서버별 버전 (초기화 응답의 serverInfo, 알 수 없으면 빠짐)"""
+        member = next(member for member in self.members if member.tools)
+        return dict(member.client.server_versions)
+
+    def _pooled_tool(self, tool: BaseTool) -> StructuredTool:
+        async def coroutine(**kwargs):
+            return await self.call(tool.name, kwargs)
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            coroutine=coroutine,
+            response_format=tool.response_format,
+        )
+
+    @contextlib.asynccontextmanager
+    async def checkout(self) -> AsyncIterator[PooledClient]:
+        """쉬는 클라이언트 하나를 빌림 (돌려줄 때 이상이 있으면 다시 띄움)"""
+        if self.idle.empty():
+            self.waits += 1
+        try:
+            member = await asyncio.wait_for(self.idle.get(), MCP_CHECKOUT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError("MCP 클라이언트 대기 시간 초과 (사용 가능한 클라이언트 없음)") from None
+        try:
+            yield member
+        finally:
+            if member.healthy:
+                self.idle.put_nowait(member)
+            else:
+                self._respawn(member)
+
+    async def call(self, name: str, args: Dict[str, Any]) -> Any:
+        """도구 1회 호출
+
+        도구가 돌려준 오류(ToolException, McpError)는 그대로 전달하고, 연결 오류와 시간 초과는
+        클라이언트를 다시 띄운 뒤 재시도 가능한 ConnectionError/TimeoutError 로 바꿔 올립니다.
+        """
+        async with self.checkout() as member:
+            self.calls += 1
+            member.calls += 1
+            try:
+                return await asyncio.wait_for(member.tools[name].coroutine(**args), MCP_CALL_TIMEOUT)
+            except (ToolException, McpError):
+                raise
+            except asyncio.TimeoutError:
+                self.call_failures += 1
+                member.healthy = False
+                raise asyncio.TimeoutError(f"MCP 도구 응답 시간 초과 ({name}, {MCP_CALL_TIMEOUT}s)") from None
+            except Exception as e:
+                self.call_failures += 1
+                member.healthy = False
+                raise ConnectionError(f"MCP 연결 오류 ({name}): {e!r}") from e
+
+    def _respawn(self, member: PooledClient):
+        if self.closed:
+            return
+        task = asyncio.create_task(self._restart(member))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _restart(self, member: PooledClient):
+        """클라이언트를 닫고 다시 띄움 (성공할 때까지 간격을 늘려가며 재시도)"""
+        await member.close()
+        delay = 1.0
+        while not self.closed:
+            try:
+                await member.start(self.config)
+            except Exception as e:
+                print(f"⚠️ MCP 클라이언트 #{member.index} 재시작 실패, {delay:.0f}s 후 재시도: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RESPAWN_BACKOFF_CAP)
+                continue
+            self.respawns += 1
+            self.idle.put_nowait(member)
+            print(f"♻️ MCP 클라이언트 #{member.index} 재시작 완료")
+            return
+
+    async def _probe_loop(self):
+        """쉬고 있는 클라이언트를 하나씩 빌려 ping (호출 중인 것은 건너뜀)"""
+        while True:
+            await asyncio.sleep(MCP_PROBE_INTERVAL)
+            for _ in range(self.idle.qsize()):
+                try:
+                    member = self.idle.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                try:
+                    await asyncio.wait_for(member.ping(), MCP_PROBE_TIMEOUT)
+                except Exception as e:
+                    self.probe_failures += 1
+                    member.healthy = False
+                    print(f"⚠️ MCP 클라이언트 #{member.index} 응답 없음, 다시 띄움: {e!r}")
+                    self._respawn(member)
+                else:
+                    self.idle.put_nowait(member)
+
+    async def close(self):
+        """모든 클라이언트 종료"""
+        self.closed = True
+        for task in [self.probe_task, *self.tasks]:
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(member.close() for member in self.members))
+
+    def stats(self) -> Dict[str, Any]:
+        healthy = sum(1 for member in self.members if member.healthy)
+        return {
+            "size": len(self.members),
+            "healthy": healthy,
+            "idle": self.idle.qsize(),
+            "in_use": healthy - self.idle.qsize(),
+            "calls": self.calls,
+            "waits": self.waits,
+            "call_failures": self.call_failures,
+            "probe_failures": self.probe_failures,
+            "respawns": self.respawns,
+            "calls_per_client": [member.calls for member in self.members],
+        }
@@ -0,0 +1,220 @@
+"""Prometheus 지표 (/metrics, prometheus_client)
+
+워커가 여러 개(serve.py)이면 PROMETHEUS_MULTIPROC_DIR 에 워커별 지표 파일을 두고
+수집할 때 MultiProcessCollector 로 모든 워커의 값을 합쳐서 내보냅니다 (어느 워커가 스크레이프를 받아도 같은 값).
+디렉터리는 prometheus_client 를 import 하기 전에 정해져 있어야 하며, serve.py 가 워커 실행 전에 설정합니다.
+
+환경 변수:
+    PROMETHEUS_MULTIPROC_DIR: 워커별 지표 파일 디렉터리 (없으면 단일 프로세스 모드)
+    METRICS_GAUGE_INTERVAL: 멀티 워커 모드에서 게이지 값을 기록하는 주기 (초, 기본 5)
+"""
+import asyncio
+import contextlib
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+METRICS_GAUGE_INTERVAL = float(os.getenv("METRICS_GAUGE_INTERVAL", "5"))
+
+# 기본 지연 시간 구간 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 요청 도착부터 첫 응답 내용까지 걸린 시간
+TIME_TO_FIRST_TOKEN = Histogram(
+    "time_to_first_token_seconds",
+    "요청 도착부터 첫 응답 토큰(안내 문구 포함)까지 걸린 시간",
+    buckets=DEFAULT_BUCKETS,
+)
+
+# 모델 호출 1회당 입력(프롬프트) 토큰 수
+PROMPT_TOKENS = Histogram(
+    "prompt_tokens",
+    "모델 호출 1회당 입력(프롬프트) 토큰 수",
+    buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 16000, 32000),
+)
+
+LLM_STEP_LATENCY = Histogram(
+    "llm_step_duration_seconds",
+    "ReAct 단계별 모델 호출 시간",
+    ["model"],
+    buckets=DEFAULT_BUCKETS,
+)
+
+TOOL_LATENCY = Histogram(
+    "tool_call_duration_seconds",
+    "LangChain 도구 호출 시간 (예약 도구와 그 안에서 호출한 MCP 도구 포함)",
+    ["tool", "status"],
+    buckets=DEFAULT_BUCKETS,
+)
+
+MCP_TOOL_LATENCY = Histogram(
+    "mcp_tool_call_duration_seconds",
+    "MCP 서버 왕복 시간 (쿼터 조절/캐시 안쪽의 실제 호출)",
+    ["tool", "status"],
+    buckets=DEFAULT_BUCKETS,
+)
+
+QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds",
+    "실행 슬롯을 얻기까지 대기한 시간",
+    buckets=DEFAULT_BUCKETS,
+)
+
+REQUESTS = Counter("chat_requests_total", "채팅 요청 수", ["endpoint", "status"])
+
+TOKENS = Counter("llm_tokens_total", "모델 토큰 사용량", ["kind"])
+
+# 멀티 워커 모드에서는 살아 있는 워커의 값을 합산
+ACTIVE_SESSIONS = Gauge("active_sessions", "보관 중인 세션 수", multiprocess_mode="livesum")
+INFLIGHT_RUNS = Gauge("inflight_agent_runs", "실행 중인 에이전트 수", multiprocess_mode="livesum")
+QUEUED_RUNS = Gauge("queued_agent_runs", "실행 슬롯을 기다리는 요청 수", multiprocess_mode="livesum")
+
+# 멀티 워커 모드에서 주기적으로 기록할 (게이지, 읽기 함수)
+_sampled_gauges: List[Tuple[Gauge, Callable[[], float]]] = []
+_gauge_task: Optional[asyncio.Task] = None
+
+
+def bind_gauge(gauge: Gauge, read: Callable[[], float]):
+    """게이지 값을 read() 로 읽도록 연결
+
+    단일 프로세스에서는 Gauge.set_function 으로 수집 시점에 읽고, 멀티 워커 모드에서는
+    (set_function 값이 워커별 지표 파일에 남지 않으므로) METRICS_GAUGE_INTERVAL 마다 set 으로 기록합니다.
+    """
+    if MULTIPROC_DIR:
+        _sampled_gauges[:] = [(g, r) for g, r in _sampled_gauges if g is not gauge]
+        _sampled_gauges.append((gauge, read))
+        gauge.set(read())
+    else:
+        gauge.set_function(read)
+
+
+async def _sample_gauges():
+    while True:
+        await asyncio.sleep(METRICS_GAUGE_INTERVAL)
+        for gauge, read in _sampled_gauges:
+            try:
+                gauge.set(read())
+            except Exception:
+                pass
+
+
+def start():
+    """멀티 워커 모드의 게이지 기록 작업 시작 (서버 시작 시)"""
+    global _gauge_task
+    if MULTIPROC_DIR and _gauge_task is None:
+        _gauge_task = asyncio.create_task(_sample_gauges())
+
+
+async def stop():
+    """게이지 기록 작업 중지, 이 워커의 live 게이지 파일 정리 (서버 종료 시)"""
+    global _gauge_task
+    if _gauge_task is not None:
+        _gauge_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _gauge_task
+        _gauge_task = None
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid(), MULTIPROC_DIR)
+
+
+def render() -> Tuple[bytes, str]:
+    """/metrics 응답 본문과 Content-Type (멀티 워커 모드에서는 모든 워커의 값을 합산)"""
+    registry = REGISTRY
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, MULTIPROC_DIR)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def summarize(histogram: Histogram, unit: str = "seconds") -> Dict[str, Any]:
+    """이 워커의 히스토그램 요약 (/health, 구간 상한 기준 근사 분위수, 모든 레이블 합산)"""
+    buckets: Dict[float, float] = {}
+    total, total_sum = 0.0, 0.0
+    for metric in histogram.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_bucket"):
+                bound = float(sample.labels["le"])
+                buckets[bound] = buckets.get(bound, 0.0) + sample.value
+            elif sample.name.endswith("_count"):
+                total += sample.value
+            elif sample.name.endswith("_sum"):
+                total_sum += sample.value
+
+    bounds = sorted(bound for bound in buckets if bound != float("inf"))
+
+    def quantile(q: float) -> float:
+        for bound in bounds:
+            if buckets[bound] >= q * total:
+                return bound
+        return bounds[-1] if bounds else 0.0
+
+    # 초 단위는 ms 로 변환해서 표시
+    scale, suffix = (1000, "_ms") if unit == "seconds" else (1, "")
+    return {
+        "count": int(total),
+        f"avg{suffix}": round(total_sum / total * scale, 2) if total else 0.0,
+        f"p50{suffix}": round(quantile(0.5) * scale, 2) if total else 0.0,
+        f"p95{suffix}": round(quantile(0.95) * scale, 2) if total else 0.0,
+    }
+
+
+def timed_tool(name: str, call):
+    """MCP 도구 호출 시간을 기록하는 미들웨어 (ReservationStore.use 에 가장 먼저 등록)"""
+    async def timed(args: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            return await call(args)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            MCP_TOOL_LATENCY.labels(tool=name, status=status).observe(time.perf_counter() - started)
+    return timed
+
+
+class MetricsCallback(AsyncCallbackHandler):
+    """모델 호출(ReAct 단계)과 도구 호출 시간을 기록하는 LangChain 콜백"""
+
+    def __init__(self):
+        self.started: Dict[UUID, Tuple[float, str]] = {}
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        metadata = kwargs.get("metadata") or {}
+        model = metadata.get("ls_model_name") or (serialized or {}).get("name") or "unknown"
+        self.started[run_id] = (time.perf_counter(), model)
+
+    async def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        if run_id in self.started:
+            started, model = self.started.pop(run_id)
+            LLM_STEP_LATENCY.labels(model=model).observe(time.perf_counter() - started)
+
+    async def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self.started.pop(run_id, None)
+
+    async def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs: Any):
+        self.started[run_id] = (time.perf_counter(), (serialized or {}).get("name", "unknown"))
+
+    async def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any):
+        if run_id in self.started:
+            started, tool = self.started.pop(run_id)
+            TOOL_LATENCY.labels(tool=tool, status="ok").observe(time.perf_counter() - started)
+
+    async def on_tool_error(self, error, *, run_id: UUID, **kwargs: Any):
+        if run_id in self.started:
+            started, tool = self.started.pop(run_id)
+            TOOL_LATENCY.labels(tool=tool, status="error").observe(time.perf_counter() - started)
@@ -0,0 +1,151 @@
+"""오프라인 부하 테스트용 Google Sheets MCP 서버 (stdio)
+
+실제 스프레드시트 대신 SQLite(기본: 메모리) 격자에 get_sheet_data / update_cells /
+batch_update_cells 를 구현합니다. 지연 시간과 오류율을 주입할 수 있습니다.
+
+config.json 예시 (config.mock.json 참고):
+    {
+      "mcp-google-sheets": {
+        "command": "python",
+        "args": ["./mock_sheets_server.py", "--latency-ms", "80", "--error-rate", "0.02"],
+        "transport": "stdio"
+      }
+    }
+
+MCP 클라이언트 풀(MCP_POOL_SIZE)은 서버 프로세스를 여러 개 띄우므로, 같은 시트를 보려면
+--db 로 SQLite 파일을 함께 쓰게 합니다 (파일을 지우면 시드 데이터로 다시 시작).
+"""
+import argparse
+import asyncio
+import builtins
+import json
+import random
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from mcp.server.fastmcp import FastMCP
+
+from reservation_index import DEFAULT_COLUMNS, parse_a1_range
+
+parser = argparse.ArgumentParser(description="Mock Google Sheets MCP server")
+parser.add_argument("--db", default=":memory:", help="SQLite 파일 경로 (기본: 메모리)")
+parser.add_argument("--latency-ms", type=float, default=0.0, help="호출당 평균 지연 (ms)")
+parser.add_argument("--jitter-ms", type=float, default=0.0, help="지연 편차 (ms)")
+parser.add_argument("--error-rate", type=float, default=0.0, help="429 오류를 반환할 확률 (0~1)")
+parser.add_argument("--seed-rows", type=int, default=0, help="미리 채워둘 예약 행 수")
+args, _ = parser.parse_known_args()
+
+mcp = FastMCP("mock-google-sheets")
+
+conn = sqlite3.connect(args.db, isolation_level=None, timeout=10)
+if args.db != ":memory:":
+    # 파일을 여러 서버 프로세스(MCP 클라이언트 풀)가 함께 쓰는 경우
+    conn.execute("PRAGMA journal_mode=WAL")
+conn.execute(
+    "CREATE TABLE IF NOT EXISTS cells ("
+    "spreadsheet_id TEXT, sheet TEXT, row INTEGER, col INTEGER, value TEXT, "
+    "PRIMARY KEY (spreadsheet_id, sheet, row, col))"
+)
+seeded = set()
+
+
+async def simulate():
+    """지연 시간/오류 주입"""
+    delay = args.latency_ms + random.uniform(-args.jitter_ms, args.jitter_ms)
+    if delay > 0:
+        await asyncio.sleep(delay / 1000.0)
+    if args.error_rate and random.random() < args.error_rate:
+        raise Exception("HttpError 429: Quota exceeded for quota metric 'Read requests' (mock)")
+
+
+def ensure_sheet(spreadsheet_id: str, sheet: str):
+    """시트가 비어있으면 헤더(와 시드 데이터) 작성"""
+    if (spreadsheet_id, sheet) in seeded:
+        return
+    seeded.add((spreadsheet_id, sheet))
+    exists = conn.execute(
+        "SELECT 1 FROM cells WHERE spreadsheet_id = ? AND sheet = ? LIMIT 1", (spreadsheet_id, sheet)
+    ).fetchone()
+    if exists:
+        return
+    rows = [DEFAULT_COLUMNS]
+    for i in range(args.seed_rows):
+        day = 1 + (i // 20) % 28
+        hour = 10 + (i % 20) // 2
+        minute = 30 * (i % 2)
+        rows.append([f"고객{i + 1}", f"2025-07-{day:02d}", f"{hour:02d}:{minute:02d}", "커트", ""])
+    write_values(spreadsheet_id, sheet, 1, 0, rows)
+
+
+def write_values(spreadsheet_id: str, sheet: str, start_row: int, start_col: int, data: List[List[Any]]):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for r, row_values in enumerate(data):
+            for c, value in enumerate(row_values):
+                conn.execute(
+                    "INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?, ?)",
+                    (spreadsheet_id, sheet, start_row + r, start_col + c, "" if value is None else str(value)),
+                )
+        conn.execute("COMMIT")
+    except Exception:
+        # 실패한 쓰기가 열린 트랜잭션으로 남아 다음 BEGIN 이 실패하지 않도록 되돌림
+        conn.execute("ROLLBACK")
+        raise
+
+
+def write_range(spreadsheet_id: str, sheet: str, range: str, data: List[List[Any]]) -> int:
+    parsed = parse_a1_range(range)
+    if parsed is None or parsed[1] is None:
+        raise ValueError(f"Invalid range: {range}")
+    write_values(spreadsheet_id, sheet, parsed[1], parsed[0], data)
+    return sum(len(row) for row in data)
+
+
+@mcp.tool()
+async def get_sheet_data(spreadsheet_id: str, sheet: str, range: Optional[str] = None) -> str:
+    """Get data from a specific sheet in a Google Spreadsheet."""
+    await simulate()
+    ensure_sheet(spreadsheet_id, sheet)
+    rows = conn.execute(
+        "SELECT row, col, value FROM cells WHERE spreadsheet_id = ? AND sheet = ?", (spreadsheet_id, sheet)
+    ).fetchall()
+    parsed = parse_a1_range(range) or (0, None, None, None)
+    start_col, start_row, end_col, end_row = parsed
+    start_row = start_row or 1
+    grid: Dict[int, Dict[int, str]] = {}
+    for row, col, value in rows:
+        if row < start_row or (end_row is not None and row > end_row):
+            continue
+        if col < start_col or (end_col is not None and col > end_col):
+            continue
+        grid.setdefault(row, {})[col] = value
+    last_row = max((r for r, cols in grid.items() if any(cols.values())), default=start_row - 1)
+    values = []
+    # 도구 인자 이름이 range 이므로 내장 range 는 builtins 로 접근
+    for row in builtins.range(start_row, last_row + 1):
+        cols = grid.get(row, {})
+        width = max((c for c, v in cols.items() if v), default=start_col - 1) + 1
+        values.append([cols.get(c, "") for c in builtins.range(start_col, width)])
+    return json.dumps(values, ensure_ascii=False)
+
+
+@mcp.tool()
+async def update_cells(spreadsheet_id: str, sheet: str, range: str, data: List[List[Any]]) -> str:
+    """Update cells in a Google Spreadsheet."""
+    await simulate()
+    ensure_sheet(spreadsheet_id, sheet)
+    updated = write_range(spreadsheet_id, sheet, range, data)
+    return json.dumps({"updatedRange": f"{sheet}!{range}", "updatedCells": updated}, ensure_ascii=False)
+
+
+@mcp.tool()
+async def batch_update_cells(spreadsheet_id: str, sheet: str, ranges: Dict[str, List[List[Any]]]) -> str:
+    """Batch update multiple ranges in a Google Spreadsheet."""
+    await simulate()
+    ensure_sheet(spreadsheet_id, sheet)
+    updated = sum(write_range(spreadsheet_id, sheet, r, data) for r, data in ranges.items())
+    return json.dumps({"totalUpdatedCells": updated, "updatedRanges": len(ranges)}, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    mcp.run(transport="stdio")
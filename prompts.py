@@ -0,0 +1,134 @@
+"""시스템 프롬프트 조립
+
+Prompt.txt 한 곳에서 프롬프트를 읽어 두 부분으로 나눕니다.
+- 고정 접두부: 역할/지침/처리 절차/출력 형식. 모든 요청에서 글자 하나 바뀌지 않으므로
+  공급자 측 프롬프트 캐싱(OpenAI 는 1024 토큰 이상의 동일한 접두부)이 재사용할 수 있습니다.
+- 가변 접미부(<CONTEXT>): 문서ID, 시트 이름, 연도처럼 매장(테넌트)마다 다른 값.
+"""
+import functools
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+from conversation_context import ConversationContext
+from metrics import PROMPT_TOKENS
+from reservation_index import RESERVATION_YEAR, SHEET_NAME, SPREADSHEET_ID
+
+PROMPT_FILE_PATH = os.getenv(
+    "PROMPT_FILE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "Prompt.txt")
+)
+
+_PROCESS = re.compile(r'<PROCESS name="([^"]+)">\n(.*?)</PROCESS>\n*', re.S)
+
+# OpenAI 채팅 형식의 메시지당 추가 토큰
+_MESSAGE_OVERHEAD = 4
+
+
+@functools.lru_cache(maxsize=None)
+def _read_template(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@functools.lru_cache(maxsize=None)
+def compile_prefix(process: str, path: str = PROMPT_FILE_PATH) -> str:
+    """선택한 처리 절차(<PROCESS name=...>)만 남긴 고정 접두부"""
+    template = _read_template(path)
+    blocks = dict(_PROCESS.findall(template))
+    if process not in blocks:
+        raise ValueError(f"Prompt.txt 에 '{process}' 처리 절차가 없습니다: {sorted(blocks)}")
+    first = _PROCESS.search(template)
+    body = _PROCESS.sub("", template[first.start():])
+    prefix = template[:first.start()] + f"<PROCESS>\n{blocks[process]}</PROCESS>\n\n" + body
+    # 줄 끝 공백 제거 (토큰 낭비 방지)
+    return "\n".join(line.rstrip() for line in prefix.splitlines()).strip() + "\n"
+
+
+def context_suffix(
+    spreadsheet_id: str = SPREADSHEET_ID,
+    sheet: str = SHEET_NAME,
+    year: int = RESERVATION_YEAR,
+) -> str:
+    """매장마다 달라지는 값만 담은 가변 접미부"""
+    return (
+        "\n<CONTEXT>\n"
+        f'- 문서ID: "{spreadsheet_id}"\n'
+        f'- 시트 이름: "{sheet}"\n'
+        f"- This year is {year}.\n"
+        "</CONTEXT>\n"
+    )
+
+
+def build_system_prompt(process: str, **context: Any) -> str:
+    """고정 접두부 + 가변 접미부"""
+    return compile_prefix(process) + context_suffix(**context)
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """텍스트 토큰 수 (tiktoken 이 없으면 글자 수로 추정)"""
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 2 + 1
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages: List[BaseMessage]) -> int:
+    """모델에 전달되는 메시지 목록의 입력 토큰 수"""
+    total = 0
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        total += count_tokens(content) + _MESSAGE_OVERHEAD
+        for call in getattr(message, "tool_calls", None) or []:
+            total += count_tokens(call["name"]) + count_tokens(str(call.get("args", "")))
+    return total
+
+
+class PromptBuilder:
+    """create_react_agent 의 prompt 로 사용하는 시스템 프롬프트
+
+    context 를 주면 세션(thread_id)별로 최근 턴만 남기고 나머지는 요약/고정 슬롯으로 대신합니다.
+    요청 config 의 configurable["prompt_usage"] 에 dict 를 넣어두면
+    모델 호출마다 입력 토큰 수를 누적합니다.
+    """
+
+    def __init__(self, process: str, context: Optional[ConversationContext] = None, **values: Any):
+        self.context = context
+        self.prefix = compile_prefix(process)
+        self.suffix = context_suffix(**values)
+        self.prefix_tokens = count_tokens(self.prefix)
+        self.system_message = SystemMessage(content=self.prefix + self.suffix)
+
+    @property
+    def text(self) -> str:
+        return self.system_message.content
+
+    def __call__(self, state: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> List[BaseMessage]:
+        configurable = (config or {}).get("configurable") or {}
+        history = list(state["messages"])
+        if self.context is not None:
+            history = self.context.window(configurable.get("thread_id"), history)
+        messages = [self.system_message] + history
+        tokens = count_message_tokens(messages)
+        PROMPT_TOKENS.observe(tokens)
+        usage = configurable.get("prompt_usage")
+        if usage is not None:
+            usage["calls"] = usage.get("calls", 0) + 1
+            usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + tokens
+            usage["cacheable_prefix_tokens"] = usage.get("cacheable_prefix_tokens", 0) + self.prefix_tokens
+        return messages
+
+
+def new_prompt_usage() -> Dict[str, int]:
+    """요청 단위 프롬프트 토큰 집계용 dict"""
+    return {"calls": 0, "prompt_tokens": 0, "cacheable_prefix_tokens": 0}
@@ -0,0 +1,321 @@
+import bisect
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# 예약 시트 기본 정보
+SPREADSHEET_ID = "1lXs3JrOuvBSew2EJUZhEeaEQfGaSqIcuKcVicOkRxMQ"
+SHEET_NAME = "시트1"
+
+# 연도 없이 "8월 3일"처럼 말한 예약일에 붙이는 연도
+RESERVATION_YEAR = int(os.getenv("RESERVATION_YEAR", "2025"))
+
+# 헤더가 없을 때 사용하는 기본 컬럼 순서
+DEFAULT_COLUMNS = ["성명", "예약일", "예약시간", "시술 종류", "상태"]
+
+# 레코드 필드 -> 시트 헤더 이름
+FIELD_HEADERS = {
+    "name": "성명",
+    "date": "예약일",
+    "time": "예약시간",
+    "service": "시술 종류",
+    "status": "상태",
+}
+
+# 취소된 예약 표시 (행은 남겨두고 백그라운드 정리 작업에서 제거)
+CANCELLED = "취소"
+
+_A1_CELL = re.compile(r"^([A-Za-z]*)(\d*)$")
+
+
+def normalize_date(value: Any) -> str:
+    """예약일을 YYYY-MM-DD 형식으로 정규화"""
+    text = str(value or "").strip()
+    match = re.search(r"(\d{4})\D+(\d{1,2})\D+(\d{1,2})", text)
+    if match:
+        year, month, day = match.groups()
+        return f"{int(year):04d}-{int(month):02d}-{int(day):02d}"
+    match = re.search(r"(\d{1,2})\s*월\s*(\d{1,2})\s*일", text)
+    if match:
+        month, day = match.groups()
+        return f"{RESERVATION_YEAR:04d}-{int(month):02d}-{int(day):02d}"
+    return text
+
+
+def normalize_time(value: Any) -> str:
+    """예약시간을 HH:MM 형식으로 정규화 ("오후 2시 30분", "14:30" 등)"""
+    text = str(value or "").strip()
+    match = re.search(r"(\d{1,2})\s*(?::|시)\s*(\d{1,2})?", text)
+    if not match:
+        return text
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    if "오후" in text and hour < 12:
+        hour += 12
+    elif "오전" in text and hour == 12:
+        hour = 0
+    return f"{hour:02d}:{minute:02d}"
+
+
+def time_to_minutes(value: Any) -> Optional[int]:
+    """예약시간을 자정 기준 분 단위로 변환 (해석할 수 없으면 None)"""
+    match = re.match(r"^(\d{2}):(\d{2})$", normalize_time(value))
+    if not match:
+        return None
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def minutes_to_time(minutes: int) -> str:
+    """자정 기준 분을 HH:MM 형식으로 변환"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def column_index(letters: str) -> int:
+    """컬럼 문자(A, B, ..., AA)를 0부터 시작하는 인덱스로 변환"""
+    index = 0
+    for ch in letters.upper():
+        index = index * 26 + (ord(ch) - ord("A") + 1)
+    return index - 1
+
+
+def column_letter(index: int) -> str:
+    """0부터 시작하는 인덱스를 컬럼 문자로 변환"""
+    letters = ""
+    index += 1
+    while index > 0:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def parse_a1_range(range_str: Optional[str]) -> Optional[Tuple[int, Optional[int], Optional[int], Optional[int]]]:
+    """A1 표기 범위를 (시작 컬럼, 시작 행, 끝 컬럼, 끝 행)으로 변환
+
+    행/컬럼이 지정되지 않은 부분은 None 으로 반환합니다. 해석할 수 없으면 None.
+    """
+    if not range_str:
+        return None
+    text = str(range_str).split("!")[-1].replace("$", "").strip()
+    start, _, end = text.partition(":")
+    start_match = _A1_CELL.match(start)
+    end_match = _A1_CELL.match(end or start)
+    if not start_match or not end_match:
+        return None
+    start_col, start_row = start_match.groups()
+    end_col, end_row = end_match.groups()
+    return (
+        column_index(start_col) if start_col else 0,
+        int(start_row) if start_row else None,
+        column_index(end_col) if end_col else None,
+        int(end_row) if end_row else None,
+    )
+
+
+def parse_sheet_values(content: Any) -> List[List[str]]:
+    """get_sheet_data 결과를 2차원 셀 목록으로 변환"""
+    if isinstance(content, str):
+        try:
+            content = json.loads(content)
+        except (ValueError, TypeError):
+            return [line.split("\t") for line in content.splitlines()]
+    if isinstance(content, dict):
+        if "valueRanges" in content:
+            content = (content["valueRanges"] or [{}])[0]
+        content = content.get("values", [])
+    if not isinstance(content, list):
+        return []
+
+    rows = []
+    for row in content:
+        if isinstance(row, str):
+            try:
+                row = json.loads(row)
+            except (ValueError, TypeError):
+                row = [row]
+        if isinstance(row, dict):
+            rows.extend(parse_sheet_values(row))
+            continue
+        if not isinstance(row, list):
+            row = [row]
+        rows.append(["" if cell is None else str(cell) for cell in row])
+    return rows
+
+
+class ReservationIndex:
+    """(예약일, 예약시간) 기준 로컬 예약 인덱스
+
+    시트를 한 번 읽어 메모리에 올려두고, update_cells 쓰기가 일어날 때마다 갱신합니다.
+    중복 예약 확인은 시트 전체를 다시 읽지 않고 O(1)로 처리됩니다.
+    """
+
+    def __init__(self):
+        self.columns = list(DEFAULT_COLUMNS)
+        self.header_rows = 0
+        self.missing_headers: List[str] = []  # 머리글 행에 없어 마지막 컬럼 뒤에 붙인 필드 머리글
+        self.cells: Dict[int, List[str]] = {}  # 시트 행 번호(1부터) -> 셀 값
+        self.slots: Dict[Tuple[str, str], int] = {}  # (예약일, 예약시간) -> 행 번호
+        self.days: Dict[str, List[Tuple[int, int]]] = {}  # 예약일 -> 정렬된 (시작 분, 행 번호)
+        self.tombstones = set()  # 취소 표시된 행 번호
+        self.loaded = False
+
+    def _field_position(self, field: str) -> int:
+        return self.columns.index(FIELD_HEADERS[field])
+
+    def sheet_header(self) -> List[str]:
+        """시트에 실제로 있는 머리글 (마지막 컬럼 뒤에 붙인 필드 제외)"""
+        return self.columns[:len(self.columns) - len(self.missing_headers)]
+
+    def field_column(self, field: str) -> str:
+        """필드가 기록되는 시트 컬럼 문자"""
+        return column_letter(self._field_position(field))
+
+    def record(self, row: int) -> Optional[Dict[str, Any]]:
+        """행 번호의 예약 정보를 딕셔너리로 반환"""
+        cells = self.cells.get(row)
+        if cells is None:
+            return None
+        return self.record_of(row, cells)
+
+    def record_of(self, row: int, cells: List[str]) -> Dict[str, Any]:
+        """셀 목록을 예약 정보 딕셔너리로 변환"""
+        record = {"row": row}
+        for field in FIELD_HEADERS:
+            pos = self._field_position(field)
+            record[field] = cells[pos] if pos < len(cells) else ""
+        return record
+
+    def is_cancelled(self, row: int) -> bool:
+        record = self.record(row)
+        return bool(record) and record["status"].strip() == CANCELLED
+
+    def _slot_key(self, row: int) -> Optional[Tuple[str, str]]:
+        record = self.record(row)
+        if not record or not record["date"] or not record["time"]:
+            return None
+        if record["status"].strip() == CANCELLED:
+            return None
+        return normalize_date(record["date"]), normalize_time(record["time"])
+
+    def load(self, values: List[List[str]]):
+        """시트 전체 값으로 인덱스를 다시 구성"""
+        self.cells.clear()
+        self.slots.clear()
+        self.days.clear()
+        self.tombstones.clear()
+        self.columns = list(DEFAULT_COLUMNS)
+        self.header_rows = 0
+        self.missing_headers = []
+
+        if values and any(cell.strip() in FIELD_HEADERS.values() for cell in values[0]):
+            self.columns = [cell.strip() for cell in values[0]]
+            self.header_rows = 1
+            # 머리글에 없는 필드(예: 상태)는 기본 배치 위치가 아니라 마지막 컬럼 뒤에 둠
+            # (기본 위치에는 실제 시트의 다른 컬럼이 있을 수 있음, 머리글 셀은 처음 쓸 때 기록)
+            for header in FIELD_HEADERS.values():
+                if header not in self.columns:
+                    self.columns.append(header)
+                    self.missing_headers.append(header)
+
+        for offset, row_values in enumerate(values[self.header_rows:]):
+            self.set_row(self.header_rows + offset + 1, row_values)
+        self.loaded = True
+
+    def set_row(self, row: int, values: List[str]):
+        """행 내용을 교체하고 슬롯 인덱스를 갱신"""
+        if row <= self.header_rows:
+            return
+        self.clear_row(row)
+        values = ["" if cell is None else str(cell) for cell in values]
+        if not any(cell.strip() for cell in values):
+            return
+        self.cells[row] = values
+        if self.is_cancelled(row):
+            self.tombstones.add(row)
+        key = self._slot_key(row)
+        if key is not None:
+            self.slots.setdefault(key, row)
+            start = time_to_minutes(key[1])
+            if start is not None:
+                bisect.insort(self.days.setdefault(key[0], []), (start, row))
+
+    def clear_row(self, row: int):
+        """행을 인덱스에서 제거"""
+        key = self._slot_key(row)
+        self.cells.pop(row, None)
+        self.tombstones.discard(row)
+        if key is None:
+            return
+        day = self.days.get(key[0], [])
+        start = time_to_minutes(key[1])
+        if start is not None:
+            pos = bisect.bisect_left(day, (start, row))
+            if pos < len(day) and day[pos] == (start, row):
+                del day[pos]
+        if self.slots.get(key) == row:
+            del self.slots[key]
+            # 같은 슬롯의 다른 행이 남아있다면 다시 연결
+            if start is not None:
+                pos = bisect.bisect_left(day, (start, 0))
+                if pos < len(day) and day[pos][0] == start:
+                    self.slots[key] = day[pos][1]
+
+    def apply_update(self, range_str: Optional[str], data: Any) -> bool:
+        """update_cells 쓰기 내용을 인덱스에 반영
+
+        범위를 해석할 수 없는 경우 False 를 반환하며, 이때는 시트를 다시 읽어야 합니다.
+        """
+        parsed = parse_a1_range(range_str)
+        if parsed is None or parsed[1] is None:
+            self.loaded = False
+            return False
+        for row, merged in self.preview_update(parsed, data):
+            self.set_row(row, merged)
+        return True
+
+    def preview_update(self, parsed: Tuple, data: Any) -> List[Tuple[int, List[str]]]:
+        """쓰기 후의 (행 번호, 셀 목록) 목록 (인덱스는 바꾸지 않음, parsed 는 parse_a1_range 결과)"""
+        start_col, start_row, _, _ = parsed
+        rows = []
+        for offset, row_values in enumerate(parse_sheet_values(data)):
+            row = start_row + offset
+            merged = list(self.cells.get(row, []))
+            needed = start_col + len(row_values)
+            if len(merged) < needed:
+                merged.extend([""] * (needed - len(merged)))
+            merged[start_col:needed] = row_values
+            rows.append((row, merged))
+        return rows
+
+    def lookup(self, date: str, time: str) -> Optional[Dict[str, Any]]:
+        """해당 슬롯의 예약 정보 반환 (없으면 None)"""
+        row = self.slots.get((normalize_date(date), normalize_time(time)))
+        return self.record(row) if row is not None else None
+
+    def next_row(self) -> int:
+        """새 예약을 기록할 다음 빈 행 번호"""
+        return max(self.cells, default=self.header_rows) + 1
+
+    def row_values(self, record: Dict[str, Any]) -> List[str]:
+        """예약 정보를 시트 컬럼 순서의 셀 목록으로 변환"""
+        positions = {self._field_position(field): field for field in FIELD_HEADERS}
+        return [str(record.get(positions[pos], "")) if pos in positions else "" for pos in range(max(positions) + 1)]
+
+    def day_bookings(self, date: str) -> List[Tuple[int, int]]:
+        """예약일의 (시작 분, 행 번호) 목록 (시작 시각 순 정렬)"""
+        return self.days.get(normalize_date(date), [])
+
+    def find_by_name(self, name: str) -> List[Dict[str, Any]]:
+        """성명으로 예약 목록 검색"""
+        name = str(name).strip()
+        return [
+            record for record in (self.record(row) for row in sorted(self.cells))
+            if record and record["name"].strip() == name and record["row"] not in self.tombstones
+        ]
+
+    def live_rows(self) -> List[List[str]]:
+        """취소되지 않은 행의 셀 목록 (행 번호 순)"""
+        return [self.cells[row] for row in sorted(self.cells) if row not in self.tombstones]
+
+    def __len__(self):
+        return len(self.cells) - len(self.tombstones)
@@ -0,0 +1,687 @@
+import asyncio
+import contextlib
+import json
+import time as clock
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from reservation_index import (
+    CANCELLED,
+    SHEET_NAME,
+    SPREADSHEET_ID,
+    ReservationIndex,
+    column_letter,
+    normalize_date,
+    normalize_time,
+    parse_a1_range,
+    parse_sheet_values,
+    time_to_minutes,
+)
+from scheduler import SchedulingEngine
+from slot_locks import SlotLockManager, SlotLockTimeout
+from state_backend import StateBackend
+
+# 도구 호출 함수 타입: 인자 딕셔너리 -> 도구 결과
+ToolCall = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+# 도구 호출 미들웨어 타입: (도구 이름, 하위 호출) -> 감싼 호출
+Middleware = Callable[[str, ToolCall], ToolCall]
+
+# 같은 시간대 잠금을 얻지 못했을 때 안내
+SLOT_BUSY_REASON = "같은 시간대의 다른 예약을 처리하는 중입니다. 잠시 후 다시 시도해주세요."
+
+# 예약 기록 중인 행의 선점 유지 시간 (초, 쓰기가 실패해 해제되지 않은 경우 대비)
+ROW_CLAIM_TTL = 60.0
+
+# 시트 정리(compact) 표시 유지 시간 (초, 정리 중 워커가 죽은 경우 대비)
+COMPACTION_TTL = 300.0
+
+# 다른 워커가 정리 중일 때 행 번호로 쓰기를 기다리는 최대 시간 (초)
+COMPACTION_WAIT = 30.0
+
+
+def update_error(result: Any) -> Optional[str]:
+    """update_cells 결과가 실패를 나타내면 오류 내용을, 성공이면 None 을 반환"""
+    if result is None:
+        return "응답이 없습니다."
+    content = result
+    if isinstance(result, str):
+        if result.strip().lower().startswith("error"):
+            return result.strip()
+        try:
+            content = json.loads(result)
+        except (ValueError, TypeError):
+            return None
+    if isinstance(content, dict):
+        if content.get("isError") or content.get("success") is False:
+            return str(content.get("reason") or content.get("error") or content)
+        if content.get("error"):
+            return str(content["error"])
+    return None
+
+
+def tool_call(tool: BaseTool) -> ToolCall:
+    """LangChain 도구를 인자 딕셔너리로 호출하는 함수로 변환"""
+    async def call(args: Dict[str, Any]) -> Any:
+        return await tool.ainvoke(args)
+    return call
+
+
+def rebind_tool(tool: BaseTool, call: ToolCall) -> StructuredTool:
+    """도구 이름/설명/스키마는 유지하고 실행 함수만 교체"""
+    async def coroutine(**kwargs):
+        return await call(kwargs)
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        coroutine=coroutine,
+    )
+
+
+class ReservationStore:
+    """예약 시트 접근 계층
+
+    MCP 시트 도구(get_sheet_data, update_cells)를 감싸 로컬 예약 인덱스를 유지하고,
+    에이전트가 사용할 예약 전용 도구를 제공합니다.
+
+    backend 를 주면 인덱스의 행 내용을 공유 저장소에 함께 기록하고, 다른 워커가 쓴 내용은
+    버전 번호가 바뀌었을 때 공유 저장소에서 다시 읽어 반영합니다 (시트를 다시 읽지 않음).
+    예약 기록은 빈 시간 확인부터 시트 쓰기까지 시간대 잠금(slot_locks)을 잡은 채로 진행합니다.
+    """
+
+    def __init__(
+        self,
+        spreadsheet_id: str = SPREADSHEET_ID,
+        sheet: str = SHEET_NAME,
+        backend: Optional[StateBackend] = None,
+        slot_locks: Optional[SlotLockManager] = None,
+    ):
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet = sheet
+        self.backend = backend
+        self.shared_key = f"index:{spreadsheet_id}:{sheet}"
+        self.version = 0  # 마지막으로 반영한 공유 인덱스 버전
+        self.generation = 0  # 마지막으로 반영한 시트 정리 세대 (정리되면 행 번호가 바뀜)
+        self.sync_lock = asyncio.Lock()  # 공유 인덱스 읽기/기록 직렬화
+        self.unpublished: Dict[int, Optional[List[str]]] = {}  # 공유 저장소에 기록 중인 행
+        self.index = ReservationIndex()
+        self.scheduler = SchedulingEngine(self.index)
+        self.slot_locks = slot_locks or SlotLockManager(backend)
+        self.calls: Dict[str, ToolCall] = {}
+        self.middlewares: List[Middleware] = []
+        self.write_lock = asyncio.Lock()  # 중복 확인 ~ 쓰기 구간 직렬화
+        self.pending_writes = 0  # 잠금 밖에서 진행 중인 예약 기록 수
+        self.writes_idle = asyncio.Event()
+        self.writes_idle.set()
+
+    def use(self, middleware: Middleware):
+        """MCP 도구 호출 미들웨어 추가 (먼저 추가한 것이 안쪽, bind 전에 호출)"""
+        self.middlewares.append(middleware)
+
+    def bind(self, tools: List[BaseTool]) -> List[BaseTool]:
+        """MCP 도구를 연결하고 에이전트에 넘길 도구 목록을 반환
+
+        에이전트가 직접 호출하는 도구와 예약 도구 내부 호출 모두 같은 미들웨어를 거칩니다.
+        """
+        bound = []
+        for tool in tools:
+            call = tool_call(tool)
+            for middleware in self.middlewares:
+                call = middleware(tool.name, call)
+            self.calls[tool.name] = call
+            if tool.name == "update_cells":
+                bound.append(rebind_tool(tool, self.update_cells))
+            elif self.middlewares:
+                bound.append(rebind_tool(tool, call))
+            else:
+                bound.append(tool)
+        return bound + self.as_tools()
+
+    def _is_own_sheet(self, args: Dict[str, Any]) -> bool:
+        return (
+            args.get("spreadsheet_id", self.spreadsheet_id) == self.spreadsheet_id
+            and args.get("sheet", self.sheet) == self.sheet
+        )
+
+    async def load(self, fresh: bool = False):
+        """시트 전체를 읽어 인덱스를 구성 (fresh=True 이면 미들웨어 캐시를 무시)
+
+        공유 저장소에 다른 워커가 올려둔 인덱스가 있으면 시트 대신 그것을 읽습니다.
+        """
+        if not fresh and await self.load_shared():
+            return
+        if "get_sheet_data" not in self.calls:
+            print("⚠️ get_sheet_data 도구가 없어 예약 인덱스를 만들 수 없습니다.")
+            return
+        if fresh:
+            for middleware in self.middlewares:
+                if hasattr(middleware, "invalidate"):
+                    middleware.invalidate(self.spreadsheet_id, self.sheet)
+        generation = await self._read_generation()
+        result = await self.calls["get_sheet_data"](
+            {"spreadsheet_id": self.spreadsheet_id, "sheet": self.sheet}
+        )
+        self.index.load(parse_sheet_values(result))
+        self.generation = generation
+        await self._publish_all()
+        print(f"📇 예약 인덱스 로드 완료: {len(self.index)}건")
+
+    async def load_shared(self) -> bool:
+        """공유 저장소에 다른 워커가 올려둔 인덱스만 읽음 (MCP 연결 전에도 가능, 없으면 False)"""
+        if not await self._load_shared():
+            return False
+        print(f"📇 공유 예약 인덱스 로드 완료: {len(self.index)}건")
+        return True
+
+    # ---- 워커 간 인덱스 공유 ----
+
+    def _shared_values(self) -> Optional[List[List[str]]]:
+        rows = self.backend.hgetall(f"{self.shared_key}:rows")
+        if not rows:
+            return None
+        last = max(int(row) for row in rows)
+        return [json.loads(rows.get(str(row), b"[]")) for row in range(1, last + 1)]
+
+    async def _load_shared(self) -> bool:
+        """공유 저장소의 인덱스로 다시 구성 (없으면 False)"""
+        if self.backend is None:
+            return False
+        async with self.sync_lock:
+            # 버전을 먼저 읽어야 그 사이에 들어온 쓰기를 다음 동기화에서 놓치지 않음
+            version = await asyncio.to_thread(self.backend.get, f"{self.shared_key}:version")
+            generation = await self._read_generation()
+            values = await asyncio.to_thread(self._shared_values)
+            if values is None:
+                return False
+            self.index.load(values)
+            # 아직 공유 저장소에 기록 중인 이 워커의 변경은 다시 덮어씀 (선점한 행이 사라지지 않도록)
+            for row, cells in self.unpublished.items():
+                if cells is None:
+                    self.index.clear_row(row)
+                else:
+                    self.index.set_row(row, cells)
+            self.version = int(version or 0)
+            self.generation = generation
+            return True
+
+    async def _sync(self):
+        """다른 워커의 쓰기가 있었으면 공유 인덱스를 다시 반영"""
+        if self.backend is None:
+            return
+        version = await asyncio.to_thread(self.backend.get, f"{self.shared_key}:version")
+        if version is not None and int(version) != self.version:
+            await self._load_shared()
+
+    async def _ensure_loaded(self):
+        await self._sync()
+        if not self.index.loaded:
+            await self.load()
+
+    # ---- 행 번호로 쓰기 / 시트 정리 조율 ----
+
+    async def _read_generation(self) -> int:
+        if self.backend is None:
+            return self.generation
+        generation = await asyncio.to_thread(self.backend.get, f"{self.shared_key}:generation")
+        return int(generation or 0)
+
+    @contextlib.asynccontextmanager
+    async def _row_write(self):
+        """행 번호로 시트에 쓰는 구간 (다른 워커의 시트 정리와 겹치지 않게 등록)
+
+        쓰기 등록을 먼저 하고 정리 표시를 확인하므로, 정리하는 워커는 등록된 쓰기가 끝날 때까지
+        기다리거나 이 구간이 정리가 끝날 때까지 기다립니다. 정리로 행 번호가 바뀌었으면 인덱스를 다시 읽습니다.
+        """
+        if self.backend is None:
+            yield
+            return
+        writers = f"{self.shared_key}:writers"
+        token = uuid.uuid4().hex
+        deadline = clock.monotonic() + COMPACTION_WAIT
+        while True:
+            expires = str(clock.time() + ROW_CLAIM_TTL).encode()
+            await asyncio.to_thread(self.backend.hset, writers, {token: expires})
+            if await asyncio.to_thread(self.backend.get, f"{self.shared_key}:compaction") is None:
+                break
+            await asyncio.to_thread(self.backend.hdel, writers, token)
+            if clock.monotonic() > deadline:
+                raise SlotLockTimeout("예약 시트 정리 대기 시간 초과")
+            await asyncio.sleep(0.1)
+        try:
+            if await self._read_generation() != self.generation:
+                # 다른 워커가 시트를 정리해 행이 옮겨졌으므로 최신 인덱스를 다시 읽음
+                if not await self._load_shared():
+                    await self.load(fresh=True)
+            yield
+        finally:
+            await asyncio.to_thread(self.backend.hdel, writers, token)
+
+    async def _wait_row_writers(self, timeout: float = ROW_CLAIM_TTL) -> bool:
+        """다른 워커에서 진행 중인 행 번호 쓰기가 끝날 때까지 대기 (만료된 등록은 무시)"""
+        writers = f"{self.shared_key}:writers"
+        deadline = clock.monotonic() + timeout
+        while True:
+            entries = await asyncio.to_thread(self.backend.hgetall, writers)
+            now = clock.time()
+            expired = [token for token, expires in entries.items() if float(expires) <= now]
+            if expired:
+                await asyncio.to_thread(self.backend.hdel, writers, *expired)
+            if len(entries) == len(expired):
+                return True
+            if clock.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.05)
+
+    def _row_cells(self, row: int) -> Optional[List[str]]:
+        if row <= self.index.header_rows:
+            return self.index.sheet_header()
+        cells = self.index.cells.get(row)
+        return None if cells is None else list(cells)
+
+    def _publish(self, changes: Dict[int, Optional[List[str]]], replace: bool = False):
+        changed, removed = {}, []
+        for row, cells in changes.items():
+            if cells is None:
+                removed.append(str(row))
+            else:
+                changed[str(row)] = json.dumps(cells, ensure_ascii=False).encode("utf-8")
+        if replace:
+            self.backend.delete(f"{self.shared_key}:rows")
+        self.backend.hset(f"{self.shared_key}:rows", changed)
+        self.backend.hdel(f"{self.shared_key}:rows", *removed)
+        version = self.backend.incr(f"{self.shared_key}:version")
+        # 그 사이 다른 워커의 쓰기가 없었을 때만 최신으로 간주 (있었다면 다음 동기화에서 다시 읽음)
+        if replace or version == self.version + 1:
+            self.version = version
+
+    async def _publish_changes(self, changes: Dict[int, Optional[List[str]]], replace: bool = False):
+        # 행 내용은 호출 시점에 확정 (기록을 기다리는 사이 다시 읽은 인덱스에 덮이지 않도록)
+        self.unpublished.update(changes)
+        try:
+            async with self.sync_lock:
+                await asyncio.to_thread(self._publish, changes, replace)
+        finally:
+            for row, cells in changes.items():
+                if row in self.unpublished and self.unpublished[row] is cells:
+                    del self.unpublished[row]
+
+    async def _publish_rows(self, rows: Iterable[int]):
+        """바뀐 행을 공유 저장소에 기록"""
+        if self.backend is not None:
+            await self._publish_changes({row: self._row_cells(row) for row in rows})
+
+    async def _publish_all(self):
+        """인덱스 전체를 공유 저장소에 기록 (시트를 새로 읽었거나 정리한 뒤)"""
+        if self.backend is not None:
+            rows = list(range(1, self.index.header_rows + 1)) + sorted(self.index.cells)
+            await self._publish_changes({row: self._row_cells(row) for row in rows}, replace=True)
+
+    async def _ensure_headers(self):
+        """머리글 행에 없던 필드 머리글(예: 상태)을 마지막 컬럼 뒤에 한 번 기록 (write_lock 안에서 호출)"""
+        missing = list(self.index.missing_headers)
+        if not missing:
+            return
+        first = len(self.index.columns) - len(missing)
+        try:
+            result = await self.calls["update_cells"]({
+                "spreadsheet_id": self.spreadsheet_id,
+                "sheet": self.sheet,
+                "range": f"{column_letter(first)}1:{column_letter(len(self.index.columns) - 1)}1",
+                "data": [missing],
+            })
+            error = update_error(result)
+        except Exception as e:
+            error = str(e) or repr(e)
+        if error is not None:
+            # 머리글 없이도 필드는 붙인 컬럼에 기록되므로 다음 쓰기 때 다시 시도
+            print(f"⚠️ 머리글 기록 실패 ({', '.join(missing)}): {error}")
+            return
+        self.index.missing_headers = []
+        await self._publish_rows(range(1, self.index.header_rows + 1))
+        print(f"🧾 머리글 추가: {', '.join(missing)}")
+
+    def _claim_row(self, row: int) -> int:
+        """다른 워커가 기록 중인 행을 피해 빈 행을 선점"""
+        while not self.backend.set_if_absent(f"{self.shared_key}:claim:{row}", b"1", ttl=ROW_CLAIM_TTL):
+            row += 1
+        return row
+
+    def _written_slots(self, args: Dict[str, Any]) -> List[tuple]:
+        """update_cells 로 기록될 (취소되지 않은) 예약의 (행 번호, 예약 정보) 목록"""
+        parsed = parse_a1_range(args.get("range"))
+        if not self._is_own_sheet(args) or parsed is None or parsed[1] is None:
+            return []
+        written = []
+        for row, cells in self.index.preview_update(parsed, args.get("data")):
+            record = self.index.record_of(row, cells)
+            if row > self.index.header_rows and record["date"] and record["time"] and record["status"].strip() != CANCELLED:
+                written.append((row, record))
+        return written
+
+    async def update_cells(self, args: Dict[str, Any]) -> Any:
+        """update_cells 호출 후 쓰기 내용을 인덱스에 반영
+
+        에이전트가 시트에 직접 예약 행을 쓰는 경우에도 해당 시간대를 잠그고
+        기존 예약과 겹치면 기록하지 않고 오류를 돌려줍니다.
+        """
+        if not self._is_own_sheet(args):
+            return await self._update_cells(args)
+        written = self._written_slots(args)
+        if not written:
+            try:
+                async with self._row_write():
+                    return await self._update_cells(args)
+            except SlotLockTimeout:
+                return json.dumps({"success": False, "reason": SLOT_BUSY_REASON}, ensure_ascii=False)
+        slots = [
+            slot for _, record in written
+            for slot in self.scheduler.lock_slots(record["date"], record["time"], record["service"])
+        ]
+        try:
+            async with self.slot_locks.hold(slots), self._row_write():
+                await self._sync()
+                for row, record in written:
+                    start = time_to_minutes(record["time"])
+                    minutes = self.scheduler.duration(record["service"])
+                    if start is not None and self.scheduler.overlaps(record["date"], start, minutes, ignore_row=row):
+                        return json.dumps({
+                            "success": False,
+                            "reason": f"{normalize_date(record['date'])} {normalize_time(record['time'])} 에는 이미 예약이 있습니다.",
+                            "alternatives": self.scheduler.nearest_free_slots(
+                                record["date"], record["time"], record["service"]
+                            ),
+                        }, ensure_ascii=False)
+                return await self._update_cells(args)
+        except SlotLockTimeout:
+            return json.dumps({"success": False, "reason": SLOT_BUSY_REASON}, ensure_ascii=False)
+
+    async def _update_cells(self, args: Dict[str, Any]) -> Any:
+        result = await self.calls["update_cells"](args)
+        if self._is_own_sheet(args) and update_error(result) is None:
+            if not self.index.apply_update(args.get("range"), args.get("data")):
+                await self.load(fresh=True)
+            else:
+                start_row = parse_a1_range(args.get("range"))[1]
+                await self._publish_rows(range(start_row, start_row + len(parse_sheet_values(args.get("data")))))
+        return result
+
+    async def check_slot(self, date: str, time: str, service: str = "") -> str:
+        """해당 예약일/예약시간에 예약이 가능한지 확인 (불가능하면 대안 시간 포함)"""
+        await self._ensure_loaded()
+        existing = self.index.lookup(date, time)
+        status = self.scheduler.check(date, time, service)
+        available = existing is None and status["available"]
+        result = {
+            "date": normalize_date(date),
+            "time": normalize_time(time),
+            "available": available,
+            "reason": status["reason"] if existing is None else "해당 시간에는 이미 예약이 있습니다.",
+            "reservation": existing,
+        }
+        if not available:
+            result["alternatives"] = self.scheduler.nearest_free_slots(date, time, service)
+        return json.dumps(result, ensure_ascii=False)
+
+    async def suggest_slots(self, date: str, time: str, service: str = "", count: int = 3) -> str:
+        """요청 시간과 가장 가까운 빈 시간대 추천"""
+        await self._ensure_loaded()
+        slots = self.scheduler.nearest_free_slots(date, time, service, count)
+        return json.dumps({"alternatives": slots}, ensure_ascii=False)
+
+    async def append_reservation(self, name: str, date: str, time: str, service: str) -> str:
+        """중복 확인 후 다음 빈 행에 예약을 한 번의 update_cells 호출로 기록
+
+        중복 확인과 행 배정은 잠금 안에서 로컬 인덱스에 먼저 반영하고, 원격 쓰기는 잠금 밖에서
+        수행하므로 동시에 들어온 예약들이 같은 행을 두고 경쟁하지 않으면서 병렬로 기록됩니다.
+        """
+        await self._ensure_loaded()
+        record = {
+            "name": name.strip(),
+            "date": normalize_date(date),
+            "time": normalize_time(time),
+            "service": service.strip(),
+        }
+        try:
+            async with self.slot_locks.hold(self.scheduler.lock_slots(date, time, service)), self._row_write():
+                return await self._append(record, date, time, service)
+        except SlotLockTimeout as e:
+            if e.expired:
+                self.index.loaded = False  # 쓰기 도중 취소되었으므로 시트를 다시 읽어 확인
+            return json.dumps({"success": False, "reason": SLOT_BUSY_REASON}, ensure_ascii=False)
+
+    async def _append(self, record: Dict[str, str], date: str, time: str, service: str) -> str:
+        async with self.write_lock:
+            await self._sync()
+            existing = self.index.lookup(date, time)
+            status = self.scheduler.check(date, time, service)
+            if existing is not None or not status["available"]:
+                return json.dumps({
+                    "success": False,
+                    "reason": status["reason"] if existing is None else "해당 시간에는 이미 예약이 있습니다.",
+                    "alternatives": self.scheduler.nearest_free_slots(date, time, service),
+                }, ensure_ascii=False)
+            await self._ensure_headers()
+            row = self.index.next_row()
+            if self.backend is not None:
+                row = await asyncio.to_thread(self._claim_row, row)
+            values = self.index.row_values(record)
+            self.index.set_row(row, values)  # 행/슬롯 선점
+            await self._publish_rows([row])  # 다른 워커에도 선점 내용 공유
+            self.pending_writes += 1
+            self.writes_idle.clear()
+
+        try:
+            try:
+                result = await self.calls["update_cells"]({
+                    "spreadsheet_id": self.spreadsheet_id,
+                    "sheet": self.sheet,
+                    "range": f"A{row}:{column_letter(len(values) - 1)}{row}",
+                    "data": [values],
+                })
+                error = update_error(result)
+            except Exception as e:
+                error = str(e) or repr(e)
+            except BaseException:
+                await self._release_row(row)
+                raise
+            if error is not None:
+                await self._release_row(row)
+                print(f"⚠️ 예약 기록 실패 (행 {row}): {error}")
+                return json.dumps({
+                    "success": False,
+                    "reason": f"예약을 시트에 기록하지 못했습니다. 잠시 후 다시 시도해주세요. ({error})",
+                }, ensure_ascii=False)
+        finally:
+            self.pending_writes -= 1
+            if self.pending_writes == 0:
+                self.writes_idle.set()
+        return json.dumps({"success": True, "row": row, "reservation": record}, ensure_ascii=False)
+
+    async def _release_row(self, row: int):
+        """기록하지 못한 행의 선점을 되돌림 (인덱스, 공유 인덱스, 행 선점 표시)"""
+        self.index.clear_row(row)
+        await self._publish_rows([row])
+        if self.backend is not None:
+            await asyncio.to_thread(self.backend.delete, f"{self.shared_key}:claim:{row}")
+
+    def _find_matches(self, name: str, date: str = "", time: str = "") -> List[Dict[str, Any]]:
+        return [
+            record for record in self.index.find_by_name(name)
+            if (not date or normalize_date(record["date"]) == normalize_date(date))
+            and (not time or normalize_time(record["time"]) == normalize_time(time))
+        ]
+
+    async def cancel_reservation(self, name: str, date: str = "", time: str = "") -> str:
+        """예약 행의 상태 컬럼에 취소 표시 (다른 행은 건드리지 않음)
+
+        행 번호는 시트 정리로 바뀔 수 있으므로, 시간대 잠금과 쓰기 잠금을 잡은 뒤
+        최신 인덱스에서 (성명, 예약일, 예약시간)으로 행을 다시 찾아 확인하고 기록합니다.
+        """
+        await self._ensure_loaded()
+        matches = self._find_matches(name, date, time)
+        if not matches:
+            return json.dumps({"success": False, "reason": "해당 이름의 예약을 찾을 수 없습니다."}, ensure_ascii=False)
+        if len(matches) > 1:
+            return json.dumps({
+                "success": False,
+                "reason": "같은 이름의 예약이 여러 건 있습니다. 예약일과 예약시간을 함께 알려주세요.",
+                "reservations": matches,
+            }, ensure_ascii=False)
+
+        record = matches[0]
+        try:
+            async with self.slot_locks.hold(
+                self.scheduler.lock_slots(record["date"], record["time"], record["service"])
+            ), self._row_write():
+                return await self._cancel(record)
+        except SlotLockTimeout as e:
+            if e.expired:
+                self.index.loaded = False
+            return json.dumps({"success": False, "reason": SLOT_BUSY_REASON}, ensure_ascii=False)
+
+    async def _cancel(self, record: Dict[str, Any]) -> str:
+        async with self.write_lock:
+            await self._sync()
+            current = self._find_matches(record["name"], record["date"], record["time"])
+            if len(current) != 1 or current[0]["service"] != record["service"]:
+                return json.dumps({
+                    "success": False,
+                    "reason": "예약 정보가 바뀌었습니다. 예약을 다시 조회한 뒤 시도해주세요.",
+                }, ensure_ascii=False)
+            record = current[0]
+            await self._ensure_headers()
+            cell = f"{self.index.field_column('status')}{record['row']}"
+            result = await self._update_cells({
+                "spreadsheet_id": self.spreadsheet_id,
+                "sheet": self.sheet,
+                "range": f"{cell}:{cell}",
+                "data": [[CANCELLED]],
+            })
+        error = update_error(result)
+        if error is not None:
+            return json.dumps({"success": False, "reason": f"예약을 취소하지 못했습니다. ({error})"}, ensure_ascii=False)
+        return json.dumps({"success": True, "reservation": record}, ensure_ascii=False)
+
+    async def find_reservations(self, name: str) -> str:
+        """성명으로 (취소되지 않은) 예약 목록 조회"""
+        await self._ensure_loaded()
+        return json.dumps({"reservations": self.index.find_by_name(name)}, ensure_ascii=False)
+
+    async def compact(self) -> int:
+        """취소 표시된 행을 제거하고 남은 예약을 위로 당겨 한 번에 다시 기록
+
+        반환값:
+            int: 제거된 행 수
+        """
+        await self._sync()
+        if not self.index.tombstones:
+            return 0
+        if self.backend is None:
+            removed = await self._compact()
+        else:
+            # 여러 워커 중 한 곳에서만 정리하고, 정리 중에는 다른 워커의 행 번호 쓰기를 막음
+            key = f"{self.shared_key}:compaction"
+            token = uuid.uuid4().hex.encode()
+            if not await asyncio.to_thread(self.backend.set_if_absent, key, token, COMPACTION_TTL):
+                return 0
+            try:
+                if not await self._wait_row_writers():
+                    print("⚠️ 진행 중인 예약 기록이 끝나지 않아 시트 정리를 다음으로 미룹니다.")
+                    return 0
+                removed = await self._compact()
+            finally:
+                await asyncio.to_thread(self.backend.delete_if_equals, key, token)
+        if removed:
+            print(f"🧹 취소된 예약 {removed}건 정리 완료")
+        return removed
+
+    async def _compact(self) -> int:
+        async with self.write_lock:
+            await self.writes_idle.wait()
+            await self.load(fresh=True)  # 최신 시트 기준으로 정리
+            removed = len(self.index.tombstones)
+            if not removed:
+                return 0
+            first = self.index.header_rows + 1
+            last = self.index.next_row() - 1
+            live = self.index.live_rows()
+            width = max(len(cells) for cells in self.index.cells.values())
+            data = [cells + [""] * (width - len(cells)) for cells in live]
+            data += [[""] * width for _ in range(last - first + 1 - len(live))]
+            result = await self.calls["update_cells"]({
+                "spreadsheet_id": self.spreadsheet_id,
+                "sheet": self.sheet,
+                "range": f"A{first}:{column_letter(width - 1)}{last}",
+                "data": data,
+            })
+            error = update_error(result)
+            if error is not None:
+                self.index.loaded = False  # 일부만 기록되었을 수 있으므로 다음 조회 때 시트를 다시 읽음
+                raise RuntimeError(f"예약 시트 정리 기록 실패: {error}")
+            self.index.load(
+                [self.index.sheet_header()] * self.index.header_rows + live
+            )
+            if self.backend is not None:
+                # 진행 중인 쓰기가 없으므로 기록이 끝난 행의 선점 표시도 정리 (비운 행을 다시 쓸 수 있도록)
+                await asyncio.to_thread(
+                    self.backend.delete, *(f"{self.shared_key}:claim:{row}" for row in range(first, last + 1))
+                )
+                # 행 번호가 바뀌었음을 다른 워커에 알림 (행 번호로 쓰기 전에 인덱스를 다시 읽음)
+                self.generation = await asyncio.to_thread(self.backend.incr, f"{self.shared_key}:generation")
+            await self._publish_all()
+        return removed
+
+    async def run_compaction(self, interval: float):
+        """interval 초마다 취소된 행을 정리하는 백그라운드 작업"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.compact()
+            except Exception as e:
+                print(f"⚠️ 예약 시트 정리 중 오류: {e}")
+
+    def as_tools(self) -> List[BaseTool]:
+        """에이전트용 예약 도구 목록"""
+        return [
+            StructuredTool.from_function(
+                coroutine=self.check_slot,
+                name="check_slot",
+                description=(
+                    "예약일(YYYY-MM-DD)과 예약시간(HH:MM), 시술 종류로 예약 가능 여부를 확인합니다. "
+                    "available 이 false 이면 예약할 수 없으며, alternatives 에 추천 시간대가 포함됩니다."
+                ),
+            ),
+            StructuredTool.from_function(
+                coroutine=self.suggest_slots,
+                name="suggest_slots",
+                description=(
+                    "예약일(YYYY-MM-DD), 예약시간(HH:MM), 시술 종류를 기준으로 "
+                    "가장 가까운 빈 시간대를 count 개 추천합니다."
+                ),
+            ),
+            StructuredTool.from_function(
+                coroutine=self.append_reservation,
+                name="append_reservation",
+                description=(
+                    "성명, 예약일(YYYY-MM-DD), 예약시간(HH:MM), 시술 종류로 새 예약을 기록합니다. "
+                    "중복 확인과 빈 행 탐색을 함께 처리하며, success 가 false 이면 alternatives 를 안내하세요."
+                ),
+            ),
+            StructuredTool.from_function(
+                coroutine=self.find_reservations,
+                name="find_reservations",
+                description="성명으로 취소되지 않은 예약 목록(예약일, 예약시간, 시술 종류)을 조회합니다.",
+            ),
+            StructuredTool.from_function(
+                coroutine=self.cancel_reservation,
+                name="cancel_reservation",
+                description=(
+                    "성명(필요하면 예약일/예약시간 포함)으로 예약을 찾아 취소합니다. "
+                    "같은 이름의 예약이 여러 건이면 reservations 목록을 보여주고 어떤 예약인지 확인하세요."
+                ),
+            ),
+        ]
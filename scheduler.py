@@ -0,0 +1,173 @@
+import bisect
+import json
+import os
+from datetime import date as date_cls, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from reservation_index import (
+    ReservationIndex,
+    minutes_to_time,
+    normalize_date,
+    time_to_minutes,
+)
+
+# schedule.json 파일 경로 설정 (없으면 기본값 사용)
+SCHEDULE_FILE_PATH = os.getenv("SCHEDULE_FILE_PATH", "schedule.json")
+
+# 하루 전체 (영업시간 제한이 없을 때의 예약 가능 구간, 분)
+ALL_DAY = (0, 24 * 60)
+
+DEFAULT_SCHEDULE = {
+    # 요일별 영업시간 (0=월요일 ... 6=일요일, 예: {"0": ["10:00", "20:00"], "6": null}, null 이면 휴무)
+    # 기본값 null: 영업시간을 제한하지 않음 (schedule.json 에 지정한 경우에만 적용)
+    "opening_hours": None,
+    # 예약 시작 시각 간격 (분)
+    "slot_minutes": 30,
+    # 시술 종류별 소요 시간 (분)
+    "service_minutes": {
+        "커트": 30,
+        "드라이": 30,
+        "염색": 90,
+        "펌": 120,
+        "클리닉": 60,
+    },
+    "default_service_minutes": 60,
+    # 당일에 빈 시간이 부족할 때 추천을 찾아볼 최대 일수
+    "search_days": 7,
+}
+
+
+def load_schedule_config(path: str = SCHEDULE_FILE_PATH) -> Dict[str, Any]:
+    """schedule.json 에서 영업시간/시술 시간을 로드 (없으면 기본값)"""
+    config = json.loads(json.dumps(DEFAULT_SCHEDULE))
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                config.update(json.load(f))
+    except Exception as e:
+        print(f"스케줄 설정 로드 중 오류 발생: {str(e)}")
+    return config
+
+
+class SchedulingEngine:
+    """예약 가능 시간 계산 엔진
+
+    예약 인덱스의 예약일별 정렬된 시작 시각 목록을 이분 탐색하여
+    LLM 추론 없이 빈 시간대를 계산합니다.
+    두 예약은 시작 시각이 같을 때만이 아니라 시술 시간 [시작, 시작 + 소요 시간) 구간이
+    겹치면 충돌로 봅니다 (앞 예약이 끝나는 시각에 바로 시작하는 예약은 허용).
+    """
+
+    def __init__(self, index: ReservationIndex, config: Optional[Dict[str, Any]] = None):
+        self.index = index
+        self.config = config or load_schedule_config()
+        self.slot_minutes = int(self.config["slot_minutes"])
+        self.service_minutes = dict(self.config["service_minutes"])
+        self.default_minutes = int(self.config["default_service_minutes"])
+        self.max_minutes = max([self.default_minutes, *self.service_minutes.values()])
+
+    def duration(self, service: Optional[str]) -> int:
+        """시술 종류의 소요 시간 (분)"""
+        service = (service or "").strip()
+        if service in self.service_minutes:
+            return int(self.service_minutes[service])
+        for name, minutes in self.service_minutes.items():
+            if name in service:
+                return int(minutes)
+        return self.default_minutes
+
+    def opening_hours(self, date: str) -> Optional[tuple]:
+        """예약일의 (개점 분, 폐점 분), 휴무일이면 None (영업시간 설정이 없으면 하루 전체)"""
+        try:
+            weekday = date_cls.fromisoformat(normalize_date(date)).weekday()
+        except ValueError:
+            return None
+        if self.config.get("opening_hours") is None:
+            return ALL_DAY
+        hours = self.config["opening_hours"].get(str(weekday))
+        if not hours:
+            return None
+        return time_to_minutes(hours[0]), time_to_minutes(hours[1])
+
+    def is_free(self, date: str, start: int, minutes: int, ignore_row: Optional[int] = None) -> bool:
+        """[start, start + minutes) 구간이 기존 예약과 겹치지 않는지 확인"""
+        hours = self.opening_hours(date)
+        if hours is None or start < hours[0] or start + minutes > hours[1]:
+            return False
+        return not self.overlaps(date, start, minutes, ignore_row)
+
+    def overlaps(self, date: str, start: int, minutes: int, ignore_row: Optional[int] = None) -> bool:
+        """[start, start + minutes) 구간과 겹치는 기존 예약이 있는지 확인 (영업시간은 보지 않음)"""
+        bookings = self.index.day_bookings(date)
+        # 시작 시각이 (start - 최대 시술 시간, start + minutes) 인 예약만 겹칠 수 있음
+        lo = bisect.bisect_right(bookings, (start - self.max_minutes, float("inf")))
+        hi = bisect.bisect_left(bookings, (start + minutes, 0))
+        for booked_start, row in bookings[lo:hi]:
+            if row == ignore_row:
+                continue
+            record = self.index.record(row)
+            booked_end = booked_start + self.duration(record["service"] if record else None)
+            if booked_end > start:
+                return True
+        return False
+
+    def lock_slots(self, date: str, time: str, service: Optional[str] = None) -> List[Tuple[str, str]]:
+        """예약이 차지하는 (예약일, 예약시간) 잠금 키 목록
+
+        시작 시각부터 시술 시간 동안 걸치는 slot_minutes 간격의 칸을 모두 반환합니다.
+        겹치는 두 예약은 반드시 한 칸 이상을 공유하므로 칸 단위로 잠그면 충돌하는 예약끼리 직렬화됩니다.
+        """
+        date = normalize_date(date)
+        start = time_to_minutes(time)
+        if start is None:
+            return [(date, str(time).strip())]
+        first = start - start % self.slot_minutes
+        return [
+            (date, minutes_to_time(slot))
+            for slot in range(first, start + self.duration(service), self.slot_minutes)
+        ]
+
+    def check(self, date: str, time: str, service: Optional[str] = None) -> Dict[str, Any]:
+        """요청 시간의 예약 가능 여부와 사유"""
+        start = time_to_minutes(time)
+        if start is None:
+            return {"available": False, "reason": "예약시간 형식을 확인할 수 없습니다."}
+        if self.opening_hours(date) is None:
+            try:
+                date_cls.fromisoformat(normalize_date(date))
+            except ValueError:
+                return {"available": False, "reason": "예약일 형식을 확인할 수 없습니다."}
+            return {"available": False, "reason": "휴무일입니다."}
+        if not self.is_free(date, start, self.duration(service)):
+            hours = self.opening_hours(date)
+            if start < hours[0] or start + self.duration(service) > hours[1]:
+                return {"available": False, "reason": "영업시간이 아닙니다."}
+            return {"available": False, "reason": "해당 시간에는 이미 예약이 있습니다."}
+        return {"available": True, "reason": ""}
+
+    def nearest_free_slots(self, date: str, time: str, service: Optional[str] = None, count: int = 3) -> List[Dict[str, str]]:
+        """요청 시간과 가장 가까운 빈 시간대 count 개 (당일 우선, 부족하면 이후 날짜)"""
+        minutes = self.duration(service)
+        requested = time_to_minutes(time)
+        try:
+            day = date_cls.fromisoformat(normalize_date(date))
+        except ValueError:
+            return []
+
+        results: List[Dict[str, str]] = []
+        for offset in range(int(self.config["search_days"]) + 1):
+            current = (day + timedelta(days=offset)).isoformat()
+            hours = self.opening_hours(current)
+            if hours is None:
+                continue
+            candidates = range(hours[0], hours[1] - minutes + 1, self.slot_minutes)
+            if requested is not None:
+                candidates = sorted(candidates, key=lambda start: (abs(start - requested), start))
+            for start in candidates:
+                if offset == 0 and start == requested:
+                    continue
+                if self.is_free(current, start, minutes):
+                    results.append({"date": current, "time": minutes_to_time(start)})
+                    if len(results) >= count:
+                        return results
+        return results
@@ -0,0 +1,56 @@
+"""SchedulingEngine 겹침 판정 회귀 테스트 (시술 시간 기준)
+
+    python -m pytest scheduler_test.py
+"""
+import pytest
+
+from reservation_index import DEFAULT_COLUMNS, ReservationIndex
+from scheduler import SchedulingEngine, load_schedule_config
+
+DATE = "2025-09-19"
+
+
+@pytest.fixture
+def engine():
+    index = ReservationIndex()
+    index.load([
+        DEFAULT_COLUMNS,
+        ["김철수", DATE, "10:00", "펌", ""],     # 10:00 ~ 12:00
+        ["이영희", DATE, "14:00", "염색", ""],   # 14:00 ~ 15:30
+    ])
+    return SchedulingEngine(index, load_schedule_config("없는-파일.json"))
+
+
+@pytest.mark.parametrize(
+    "time, service",
+    [
+        # 앞 예약이 끝나는 시각에 바로 시작
+        ("12:00", "커트"),
+        ("15:30", "펌"),
+        # 뒤 예약이 시작하는 시각에 바로 끝남
+        ("09:30", "커트"),
+        ("12:30", "염색"),
+    ],
+)
+def test_adjacent_slots_are_available(engine, time, service):
+    assert engine.check(DATE, time, service)["available"]
+
+
+@pytest.mark.parametrize(
+    "time, service",
+    [
+        # 같은 시작 시각 (이전의 정확한 칸 비교에서도 거절되던 경우)
+        ("10:00", "커트"),
+        # 진행 중인 시술 도중에 시작
+        ("10:30", "커트"),
+        ("11:30", "드라이"),
+        ("15:00", "커트"),
+        # 새 시술이 다음 예약 시작 이후까지 이어짐
+        ("09:00", "펌"),
+        ("13:00", "염색"),
+    ],
+)
+def test_overlapping_slots_are_rejected(engine, time, service):
+    status = engine.check(DATE, time, service)
+    assert not status["available"]
+    assert status["reason"] == "해당 시간에는 이미 예약이 있습니다."
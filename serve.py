@@ -0,0 +1,76 @@
+"""운영용 서버 실행 (uvicorn 워커 여러 개)
+
+각 워커 프로세스는 api_google_sheet 를 따로 불러와 자신만의 HospitalReservationAgent 와
+MCP 클라이언트를 가집니다. 세션 활동/토큰 사용량, 대화 체크포인트, 예약 인덱스는
+STATE_BACKEND 로 공유하므로 어느 워커가 요청을 받아도 같은 x_session_id 의 대화를 이어갑니다.
+
+사용 예:
+    python serve.py --workers 4                              # 같은 호스트: SQLite 파일 공유
+    STATE_BACKEND=redis REDIS_URL=redis://cache:6379/0 python serve.py --workers 8
+
+실행 슬롯 제한(MAX_INFLIGHT_RUNS, MAX_QUEUED_RUNS)은 워커별로 적용됩니다.
+MCP 클라이언트 풀도 워커별이므로 stdio MCP 서버 프로세스는 서버 수 x MCP_POOL_SIZE(기본 1) x 워커 수만큼 뜹니다.
+Sheets 쿼터 조절(sheets_throttle)의 토큰 버킷도 워커별이므로, 워커 수를 WEB_CONCURRENCY 로 넘겨
+각 워커가 SHEETS_RATE_PER_MINUTE / SHEETS_BURST 를 워커 수로 나눈 만큼만 쓰게 합니다 (합계 = 설정한 쿼터).
+Sheets 읽기 캐시(sheets_cache)도 워커별이지만 쓰기마다 STATE_BACKEND 의 시트별 세대를 올리고
+읽을 때 확인하므로, 한 워커가 쓴 시트를 다른 워커가 캐시에서 오래된 값으로 읽지 않습니다.
+/metrics 는 워커별 지표 파일(PROMETHEUS_MULTIPROC_DIR, 없으면 임시 디렉터리)을 합산하므로
+어느 워커가 스크레이프를 받아도 전체 워커의 합계를 돌려줍니다.
+워커는 시작 직후부터 /live 에 응답하고, MCP/모델/예약 데이터 준비가 끝나면 /ready 가 200 이 됩니다.
+개발 중에는 api_google_sheet.py 를 직접 실행하세요 (워커 1개 + 자동 재시작).
+"""
+import argparse
+import glob
+import os
+import tempfile
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="병원 예약 에이전트 API 서버 (멀티 워커)")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "6003")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))),
+        help="워커 프로세스 수 (기본: WEB_CONCURRENCY 또는 CPU 코어 수)",
+    )
+    parser.add_argument(
+        "--state-backend",
+        choices=("local", "sqlite", "redis"),
+        default=os.getenv("STATE_BACKEND"),
+        help="워커 간 공유 상태 저장소 (기본: 워커가 2개 이상이면 sqlite)",
+    )
+    args = parser.parse_args()
+
+    backend = args.state_backend or ("sqlite" if args.workers > 1 else "local")
+    if backend == "local" and args.workers > 1:
+        parser.error("워커가 2개 이상이면 세션 상태를 공유해야 합니다 (--state-backend sqlite 또는 redis)")
+    # 워커 프로세스는 환경 변수를 물려받아 같은 저장소를 사용
+    os.environ["STATE_BACKEND"] = backend
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)  # Sheets 쿼터를 워커 수로 나눔
+    if args.workers > 1:
+        # 워커별 지표 파일 디렉터리 (이전 실행의 파일은 지워야 합계가 맞음)
+        metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or tempfile.mkdtemp(prefix="prometheus_")
+        os.makedirs(metrics_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+            os.remove(path)
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+    print("🏥 병원 예약 에이전트 API 서버")
+    print(f"👷 워커 {args.workers}개, 공유 상태 저장소: {backend}")
+    if args.workers > 1:
+        print(f"📈 워커별 지표 디렉터리: {os.environ['PROMETHEUS_MULTIPROC_DIR']}")
+    uvicorn.run(
+        "api_google_sheet:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level="info",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from state_backend import StateBackend
+
+# 세션 보관 한도
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "5000"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "1800"))
+
+USAGE_KEYS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+
+def empty_usage() -> Dict[str, int]:
+    return {key: 0 for key in USAGE_KEYS}
+
+
+class SessionManager:
+    """세션별 RunnableConfig 저장소 (최대 크기 + 유휴 TTL + LRU 제거)
+
+    세션이 제거되면 on_evict 콜백으로 체크포인터 등 연관 상태도 함께 정리합니다.
+    on_evict 는 get() 안에서(이벤트 루프 위에서) 바로 호출되므로 블로킹 작업은 콜백이 백그라운드로 넘겨야 합니다.
+    backend 를 주면 세션 활동 시각과 토큰 사용량을 여러 워커가 공유합니다
+    (touch/record_shared_usage 는 원격 저장소를 호출하므로 asyncio.to_thread 로 실행).
+    """
+
+    def __init__(
+        self,
+        max_size: int = MAX_SESSIONS,
+        idle_ttl: float = SESSION_IDLE_TTL,
+        on_evict: Optional[Callable[[str], Any]] = None,
+        backend: Optional[StateBackend] = None,
+    ):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        self.backend = backend
+        self.sessions: "OrderedDict[str, tuple]" = OrderedDict()  # session_id -> (config, 마지막 사용 시각)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.usage: Dict[str, Dict[str, int]] = {}  # session_id -> 누적 토큰 사용량
+        self.total_usage = empty_usage()
+
+    def get(self, session_id: str) -> RunnableConfig:
+        """세션 설정 반환 (없으면 생성), 최근 사용 순서 갱신"""
+        now = time.monotonic()
+        self.expire(now)
+        entry = self.sessions.get(session_id)
+        if entry is not None:
+            self.hits += 1
+            config = entry[0]
+            self.sessions.move_to_end(session_id)
+        else:
+            self.misses += 1
+            config = RunnableConfig(configurable={"thread_id": session_id})
+        self.sessions[session_id] = (config, now)
+        while len(self.sessions) > self.max_size:
+            oldest = next(iter(self.sessions))
+            self.evict(oldest)
+        return config
+
+    def expire(self, now: Optional[float] = None):
+        """유휴 TTL 이 지난 세션 제거 (오래된 순으로 정렬되어 있으므로 앞에서부터 확인)"""
+        now = time.monotonic() if now is None else now
+        while self.sessions:
+            session_id, (_, last_used) = next(iter(self.sessions.items()))
+            if now - last_used < self.idle_ttl:
+                break
+            self.evict(session_id)
+
+    def evict(self, session_id: str):
+        """세션과 연관 상태 제거"""
+        if self.sessions.pop(session_id, None) is None:
+            return
+        self.usage.pop(session_id, None)
+        self.evictions += 1
+        if self.on_evict:
+            try:
+                self.on_evict(session_id)
+            except Exception as e:
+                print(f"⚠️ 세션 정리 중 오류 ({session_id}): {e}")
+
+    def touch(self, session_id: str):
+        """공유 저장소에 세션 활동 기록 (유휴 TTL 동안 유지)"""
+        if self.backend is not None:
+            self.backend.set(f"session:{session_id}", b"1", ttl=self.idle_ttl)
+
+    def is_active_elsewhere(self, session_id: str) -> bool:
+        """유휴 TTL 안에 (다른 워커를 포함해) 사용된 세션인지 확인"""
+        return self.backend is not None and self.backend.get(f"session:{session_id}") is not None
+
+    def record_shared_usage(self, session_id: str, usage: Dict[str, int]):
+        """요청 1회의 토큰 사용량을 공유 저장소의 세션/전체 누적값에 더함"""
+        if self.backend is None:
+            return
+        for key in USAGE_KEYS:
+            if usage.get(key):
+                self.backend.hincrby(f"usage:{session_id}", key, usage[key])
+                self.backend.hincrby("usage:total", key, usage[key])
+        self.backend.expire(f"usage:{session_id}", self.idle_ttl)
+
+    def record_usage(self, session_id: str, usage: Dict[str, int]):
+        """요청 1회의 토큰 사용량을 세션/전체 누적값에 더함"""
+        totals = [self.total_usage]
+        if session_id in self.sessions:
+            totals.append(self.usage.setdefault(session_id, empty_usage()))
+        for total in totals:
+            for key in USAGE_KEYS:
+                total[key] += usage.get(key, 0)
+
+    def usage_of(self, session_id: str) -> Dict[str, int]:
+        """세션의 누적 토큰 사용량 (공유 저장소가 있으면 모든 워커 합계)"""
+        if self.backend is not None:
+            shared = self.backend.hgetall(f"usage:{session_id}")
+            return {key: int(shared.get(key, 0)) for key in USAGE_KEYS}
+        return dict(self.usage.get(session_id) or empty_usage())
+
+    def stats(self) -> Dict[str, Any]:
+        """세션 저장소 지표"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.sessions),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "tokens": dict(self.total_usage),
+        }
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __contains__(self, session_id: str):
+        return session_id in self.sessions
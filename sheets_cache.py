@@ -0,0 +1,144 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from reservation_index import parse_a1_range
+from reservation_store import ToolCall
+from state_backend import StateBackend
+import tracing
+
+# get_sheet_data 결과 보관 시간 (초)
+SHEETS_CACHE_TTL = float(os.getenv("SHEETS_CACHE_TTL", "30"))
+SHEETS_CACHE_MAX_ENTRIES = int(os.getenv("SHEETS_CACHE_MAX_ENTRIES", "256"))
+
+# 시트 쓰기 도구
+WRITE_TOOLS = ("update_cells", "batch_update_cells")
+
+CacheKey = Tuple[str, str, str]
+
+
+def ranges_overlap(a: Optional[str], b: Optional[str]) -> bool:
+    """두 A1 범위가 겹치는지 확인 (범위가 없거나 해석할 수 없으면 시트 전체로 간주)"""
+    ra, rb = parse_a1_range(a), parse_a1_range(b)
+    if ra is None or rb is None:
+        return True
+
+    def bounds(r):
+        start_col, start_row, end_col, end_row = r
+        return (
+            start_col,
+            start_row or 1,
+            float("inf") if end_col is None else end_col,
+            float("inf") if end_row is None else end_row,
+        )
+
+    a_c1, a_r1, a_c2, a_r2 = bounds(ra)
+    b_c1, b_r1, b_c2, b_r2 = bounds(rb)
+    return a_c1 <= b_c2 and b_c1 <= a_c2 and a_r1 <= b_r2 and b_r1 <= a_r2
+
+
+class SheetsCache:
+    """get_sheet_data 읽기 캐시 미들웨어 (TTL + 쓰기 시 무효화)
+
+    (spreadsheet_id, sheet, range) 단위로 결과를 보관하고, update_cells 가
+    겹치는 범위에 쓰면 해당 항목을 삭제합니다.
+
+    캐시는 워커별이므로 backend(STATE_BACKEND)가 있으면 쓰기마다 시트별 공유 세대를 올리고,
+    읽기 전에 공유 세대를 확인해 다른 워커가 쓴 시트의 항목은 버립니다 (적중 시에도 저장소 조회 1회).
+    """
+
+    def __init__(
+        self,
+        ttl: float = SHEETS_CACHE_TTL,
+        max_entries: int = SHEETS_CACHE_MAX_ENTRIES,
+        backend: Optional[StateBackend] = None,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.backend = backend
+        self.entries: Dict[CacheKey, Tuple[float, int, Any]] = {}  # key -> (만료 시각, 공유 세대, 결과)
+        self.generations: Dict[Tuple[str, str], int] = {}  # 시트별 쓰기 세대
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __call__(self, name: str, call: ToolCall) -> ToolCall:
+        """ReservationStore.use() 에 등록하는 미들웨어"""
+        if name == "get_sheet_data":
+            return self._cached_read(call)
+        if name in WRITE_TOOLS:
+            return self._invalidating_write(call)
+        return call
+
+    def _cached_read(self, call: ToolCall) -> ToolCall:
+        async def cached(args: Dict[str, Any]) -> Any:
+            sheet_key = (args.get("spreadsheet_id", ""), args.get("sheet", ""))
+            key = (*sheet_key, args.get("range") or "")
+            shared = await self._shared_generation(sheet_key)
+            entry = self.entries.get(key)
+            now = time.monotonic()
+            if entry is not None and entry[0] > now and entry[1] == shared:
+                self.hits += 1
+                tracing.annotate(cache_hit=True)
+                return entry[2]
+            self.misses += 1
+            tracing.annotate(cache_hit=False)
+            generation = self.generations.get(sheet_key, 0)
+            result = await call(args)
+            # 읽는 동안 쓰기가 있었다면 오래된 결과일 수 있으므로 저장하지 않음
+            if self.generations.get(sheet_key, 0) == generation:
+                if len(self.entries) >= self.max_entries:
+                    self.entries.pop(min(self.entries, key=lambda k: self.entries[k][0]))
+                self.entries[key] = (time.monotonic() + self.ttl, shared, result)
+            return result
+        return cached
+
+    def _invalidating_write(self, call: ToolCall) -> ToolCall:
+        async def invalidating(args: Dict[str, Any]) -> Any:
+            ranges = args.get("ranges") or {args.get("range"): None}
+            self._bump(args)
+            try:
+                return await call(args)
+            finally:
+                self._bump(args)
+                self.invalidate(args.get("spreadsheet_id", ""), args.get("sheet", ""), ranges)
+                if self.backend is not None:
+                    # 다른 워커의 캐시 무효화 (쓰기가 끝난 뒤에 올려야 쓰는 중에 읽은 결과도 버려짐)
+                    sheet_key = (args.get("spreadsheet_id", ""), args.get("sheet", ""))
+                    await asyncio.to_thread(self.backend.incr, self._generation_key(sheet_key))
+        return invalidating
+
+    @staticmethod
+    def _generation_key(sheet_key: Tuple[str, str]) -> str:
+        return f"sheets_cache:{sheet_key[0]}:{sheet_key[1]}:generation"
+
+    async def _shared_generation(self, sheet_key: Tuple[str, str]) -> int:
+        """다른 워커를 포함한 시트 쓰기 세대 (공유 저장소가 없으면 0)"""
+        if self.backend is None:
+            return 0
+        value = await asyncio.to_thread(self.backend.get, self._generation_key(sheet_key))
+        return int(value) if value else 0
+
+    def _bump(self, args: Dict[str, Any]):
+        sheet_key = (args.get("spreadsheet_id", ""), args.get("sheet", ""))
+        self.generations[sheet_key] = self.generations.get(sheet_key, 0) + 1
+
+    def invalidate(self, spreadsheet_id: str, sheet: str, ranges: Optional[Iterable[Optional[str]]] = None):
+        """시트(또는 지정 범위와 겹치는) 캐시 항목 삭제"""
+        ranges = list(ranges) if ranges is not None else [None]
+        for key in [k for k in self.entries if k[0] == spreadsheet_id and k[1] == sheet]:
+            if any(ranges_overlap(key[2] or None, written) for written in ranges):
+                del self.entries[key]
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 지표"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
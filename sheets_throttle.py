@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from reservation_index import parse_sheet_values
+from reservation_store import ToolCall, update_error
+import tracing
+
+# Google Sheets 분당 요청 한도에 맞춘 기본값
+SHEETS_RATE_PER_MINUTE = float(os.getenv("SHEETS_RATE_PER_MINUTE", "60"))
+SHEETS_BURST = int(os.getenv("SHEETS_BURST", "10"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "4"))
+SHEETS_BACKOFF_BASE = float(os.getenv("SHEETS_BACKOFF_BASE", "0.5"))
+SHEETS_BACKOFF_CAP = float(os.getenv("SHEETS_BACKOFF_CAP", "16"))
+SHEETS_WRITE_WINDOW_MS = float(os.getenv("SHEETS_WRITE_WINDOW_MS", "20"))
+# 같은 쿼터를 나눠 쓰는 워커 프로세스 수 (serve.py 가 WEB_CONCURRENCY 로 전달)
+SHEETS_WORKERS = max(1, int(os.getenv("SHEETS_WORKERS", os.getenv("WEB_CONCURRENCY", "1"))))
+
+# 재시도할 오류 메시지 (쿼터 초과, 일시적 서버 오류)
+RETRYABLE_MARKERS = (
+    "429", "rate limit", "ratelimit", "quota", "resource_exhausted",
+    "internal error", "backend error", "unavailable", "timeout", "timed out",
+)
+
+
+def is_retryable(error: Exception) -> bool:
+    """쿼터 초과/일시적 오류인지 판단"""
+    message = str(error).lower()
+    return isinstance(error, (asyncio.TimeoutError, ConnectionError)) or any(
+        marker in message for marker in RETRYABLE_MARKERS
+    )
+
+
+class TokenBucket:
+    """토큰 버킷 (초당 rate 개 충전, 최대 capacity 개)"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """토큰 1개를 얻을 때까지 대기"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class SheetsThrottle:
+    """Sheets MCP 도구 호출 미들웨어
+
+    - 모든 호출이 하나의 토큰 버킷을 공유하여 분당 쿼터를 넘지 않도록 조절
+      (버킷은 프로세스별이므로 워커가 여러 개면 쿼터와 버스트를 워커 수로 나눠 합계가 쿼터를 넘지 않게 함)
+    - 쿼터 초과/일시적 오류는 지터를 준 지수 백오프로 재시도
+    - 짧은 시간 안에 들어온 update_cells 호출은 batch_update_cells 한 번으로 묶어 기록
+      (같은 range 에 대한 쓰기는 순서대로 별도 묶음으로 나누고, 각 호출은 자기 range 의 결과를 받음)
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float = SHEETS_RATE_PER_MINUTE,
+        burst: int = SHEETS_BURST,
+        max_retries: int = SHEETS_MAX_RETRIES,
+        write_window_ms: float = SHEETS_WRITE_WINDOW_MS,
+        workers: int = SHEETS_WORKERS,
+    ):
+        self.workers = workers
+        self.bucket = TokenBucket(rate_per_minute / 60.0 / workers, max(1, burst // workers))
+        self.max_retries = max_retries
+        self.write_window = write_window_ms / 1000.0
+        self.calls: Dict[str, ToolCall] = {}
+        self.pending: Dict[Tuple[str, str], List[Tuple[Dict[str, Any], asyncio.Future]]] = {}
+        self.flushes = set()  # 진행 중인 병합 기록 작업 (GC 방지용 참조)
+        self.retries = 0
+        self.coalesced = 0
+
+    def __call__(self, name: str, call: ToolCall) -> ToolCall:
+        """ReservationStore.use() 에 등록하는 미들웨어"""
+        throttled = self._throttled(call)
+        self.calls[name] = throttled
+        if name == "update_cells" and self.write_window > 0:
+            return self._coalesced_update
+        return throttled
+
+    def _throttled(self, call: ToolCall) -> ToolCall:
+        async def throttled(args: Dict[str, Any]) -> Any:
+            for attempt in range(self.max_retries + 1):
+                await self.bucket.acquire()
+                try:
+                    return await call(args)
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        raise
+                    self.retries += 1
+                    tracing.increment("retries")
+                    delay = random.uniform(0, min(SHEETS_BACKOFF_CAP, SHEETS_BACKOFF_BASE * 2 ** attempt))
+                    print(f"⏳ Sheets 요청 재시도 {attempt + 1}/{self.max_retries} ({delay:.2f}s 후): {e}")
+                    await asyncio.sleep(delay)
+        return throttled
+
+    async def _coalesced_update(self, args: Dict[str, Any]) -> Any:
+        """update_cells 를 짧은 창 동안 모아 한 번에 기록"""
+        key = (args.get("spreadsheet_id", ""), args.get("sheet", ""))
+        future = asyncio.get_running_loop().create_future()
+        batch = self.pending.setdefault(key, [])
+        batch.append((args, future))
+        if len(batch) == 1:
+            task = asyncio.create_task(self._flush(key))
+            self.flushes.add(task)
+            task.add_done_callback(self.flushes.discard)
+        return await future
+
+    async def _flush(self, key: Tuple[str, str]):
+        await asyncio.sleep(self.write_window)
+        batch = self.pending.pop(key, [])
+        if not batch:
+            return
+        # 같은 range 에 대한 쓰기는 하나의 묶음에 넣지 않고 들어온 순서대로 다음 묶음에서 기록
+        rounds: List[List[Tuple[Dict[str, Any], asyncio.Future]]] = []
+        seen: Dict[str, int] = {}
+        for args, future in batch:
+            position = seen.get(args.get("range"), 0)
+            seen[args.get("range")] = position + 1
+            if position == len(rounds):
+                rounds.append([])
+            rounds[position].append((args, future))
+        for writes in rounds:
+            results = await self._write_round(key, writes)
+            for (_, future), result in zip(writes, results):
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def _write_round(self, key: Tuple[str, str], writes: List[Tuple[Dict[str, Any], asyncio.Future]]) -> List[Any]:
+        """range 가 겹치지 않는 쓰기 묶음을 기록하고 호출별 결과 목록을 반환"""
+        batch_call: Optional[ToolCall] = self.calls.get("batch_update_cells")
+        try:
+            if len(writes) == 1 or batch_call is None:
+                return await asyncio.gather(
+                    *(self.calls["update_cells"](args) for args, _ in writes),
+                    return_exceptions=True,
+                )
+            self.coalesced += len(writes) - 1
+            result = await batch_call({
+                "spreadsheet_id": key[0],
+                "sheet": key[1],
+                "ranges": {args["range"]: args["data"] for args, _ in writes},
+            })
+        except Exception as e:
+            return [e] * len(writes)
+        if update_error(result) is not None:
+            return [result] * len(writes)
+        # 묶음 기록이 성공하면 각 호출에는 자기 range 에 대한 update_cells 형식의 결과를 돌려줌
+        return [
+            json.dumps({
+                "updatedRange": f"{key[1]}!{args['range']}" if key[1] else args["range"],
+                "updatedCells": sum(len(row) for row in parse_sheet_values(args["data"])),
+            }, ensure_ascii=False)
+            for args, _ in writes
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """재시도/병합 지표"""
+        return {
+            "workers": self.workers,
+            "rate_per_minute": round(self.bucket.rate * 60, 2),
+            "tokens": round(self.bucket.tokens, 2),
+            "retries": self.retries,
+            "coalesced_writes": self.coalesced,
+        }
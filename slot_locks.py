@@ -0,0 +1,148 @@
+"""예약 시간대(예약일, 예약시간) 단위 잠금
+
+빈 시간 확인부터 시트 기록까지 같은 시간대를 다루는 요청을 직렬화하여 이중 예약을 막습니다.
+
+- 프로세스 안: 시간대별 asyncio.Lock
+- 워커 사이: 공유 저장소(StateBackend)의 set_if_absent 임대(lease), 만료 시간이 지나면 자동 해제
+- 잠금을 잡은 구간이 SLOT_LOCK_TIMEOUT 을 넘기면 취소되고 잠금이 풀림 (임대보다 오래 잡지 않음)
+
+여러 시간대를 잡을 때는 항상 정렬된 순서로 잡으므로 교착 상태가 생기지 않습니다.
+
+환경 변수:
+    SLOT_LOCK_TIMEOUT: 잠금을 유지할 수 있는 최대 시간 (초, 기본 30)
+    SLOT_LOCK_WAIT: 잠금을 기다리는 최대 시간 (초, 기본 10)
+"""
+import asyncio
+import contextlib
+import os
+import random
+import secrets
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from reservation_index import normalize_date, normalize_time
+from state_backend import StateBackend
+
+SLOT_LOCK_TIMEOUT = float(os.getenv("SLOT_LOCK_TIMEOUT", "30"))
+SLOT_LOCK_WAIT = float(os.getenv("SLOT_LOCK_WAIT", "10"))
+
+
+class SlotLockTimeout(Exception):
+    """시간대 잠금을 기다리다 시간이 초과되었거나(expired=False), 잠금 유지 시간을 넘긴 경우(expired=True)"""
+
+    def __init__(self, message: str, expired: bool = False):
+        super().__init__(message)
+        self.expired = expired
+
+
+class SlotLockManager:
+    """시간대 잠금 관리자 (backend 가 없으면 프로세스 안에서만 잠금)"""
+
+    def __init__(
+        self,
+        backend: Optional[StateBackend] = None,
+        timeout: float = SLOT_LOCK_TIMEOUT,
+        wait: float = SLOT_LOCK_WAIT,
+    ):
+        self.backend = backend
+        self.timeout = timeout
+        self.wait = wait
+        self.locks: Dict[str, asyncio.Lock] = {}
+        self.users: Dict[str, int] = {}  # 시간대별 잠금 사용/대기 수 (0 이 되면 잠금 객체 삭제)
+        self.acquired = 0
+        self.contended = 0
+        self.timeouts = 0
+        self.expired = 0
+
+    @staticmethod
+    def key(date: str, time: str) -> str:
+        return f"slot:{normalize_date(date)}:{normalize_time(time)}"
+
+    def _lock(self, key: str) -> asyncio.Lock:
+        self.users[key] = self.users.get(key, 0) + 1
+        return self.locks.setdefault(key, asyncio.Lock())
+
+    def _unuse(self, key: str):
+        self.users[key] -= 1
+        if not self.users[key]:
+            del self.users[key]
+            del self.locks[key]
+
+    async def _acquire(self, key: str, token: bytes, deadline: float):
+        loop = asyncio.get_running_loop()
+        lock = self._lock(key)
+        if lock.locked():
+            self.contended += 1
+        try:
+            await asyncio.wait_for(lock.acquire(), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self._unuse(key)
+            raise SlotLockTimeout(f"시간대 잠금 대기 시간 초과: {key}") from None
+
+        if self.backend is None:
+            return
+        delay = 0.01
+        try:
+            while not await asyncio.to_thread(self.backend.set_if_absent, key, token, self.timeout):
+                # 다른 워커가 잡고 있음: 지수 백오프 + 지터로 재시도
+                if loop.time() + delay > deadline:
+                    raise SlotLockTimeout(f"시간대 잠금 대기 시간 초과 (다른 워커): {key}")
+                self.contended += 1
+                await asyncio.sleep(random.uniform(delay / 2, delay))
+                delay = min(delay * 2, 0.2)
+        except BaseException:
+            lock.release()
+            self._unuse(key)
+            raise
+
+    async def _release(self, key: str, token: bytes):
+        try:
+            if self.backend is not None:
+                await asyncio.to_thread(self.backend.delete_if_equals, key, token)
+        finally:
+            self.locks[key].release()
+            self._unuse(key)
+
+    @contextlib.asynccontextmanager
+    async def hold(self, slots: Iterable[Tuple[str, str]]) -> AsyncIterator[List[str]]:
+        """(예약일, 예약시간) 목록을 모두 잠근 채로 실행
+
+        사용 예:
+            async with locks.hold(scheduler.lock_slots(date, time, service)):
+                ... 빈 시간 확인 후 기록 ...
+        """
+        keys = sorted({self.key(date, time) for date, time in slots})
+        token = secrets.token_hex(8).encode()
+        deadline = asyncio.get_running_loop().time() + self.wait
+        held: List[str] = []
+        try:
+            for key in keys:
+                await self._acquire(key, token, deadline)
+                held.append(key)
+            self.acquired += 1
+            limit = asyncio.timeout(self.timeout)
+            try:
+                async with limit:
+                    yield keys
+            except TimeoutError:
+                if limit.expired():
+                    self.expired += 1
+                    raise SlotLockTimeout(
+                        f"시간대 잠금 유지 시간 초과 ({self.timeout}s): {', '.join(keys)}", expired=True
+                    ) from None
+                raise
+        except SlotLockTimeout:
+            self.timeouts += 1
+            raise
+        finally:
+            for key in reversed(held):
+                await self._release(key, token)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.kind if self.backend else "local",
+            "held": sum(1 for lock in self.locks.values() if lock.locked()),
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "timeouts": self.timeouts,
+            "expired": self.expired,
+        }
@@ -0,0 +1,134 @@
+"""OpenAI 호환 스트리밍(SSE) 응답 인코더
+
+토큰마다 청크 dict 를 새로 만들어 json.dumps 하는 대신, 응답마다 변하지 않는 JSON 앞/뒷부분
+(id, object, created, model, choices 틀)을 한 번만 만들어 두고 토큰 내용만 이스케이프해서 끼워 넣습니다.
+짧은 시간/크기 창 안에 들어온 토큰은 하나의 청크로 묶어 쓰기 횟수를 줄입니다.
+
+환경 변수:
+    SSE_FLUSH_MS: 토큰을 묶어 보내는 최대 대기 시간 (ms, 기본 20, 0 이면 묶지 않음)
+    SSE_FLUSH_CHARS: 이 글자 수 이상 모이면 바로 전송 (기본 64)
+"""
+import asyncio
+import contextlib
+import json
+import os
+from json.encoder import encode_basestring  # ensure_ascii=False 와 같은 이스케이프 (C 구현)
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+SSE_FLUSH_MS = float(os.getenv("SSE_FLUSH_MS", "20"))
+SSE_FLUSH_CHARS = int(os.getenv("SSE_FLUSH_CHARS", "64"))
+
+SSE_MEDIA_TYPE = "text/event-stream"
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # nginx 등 프록시의 응답 버퍼링 끄기
+}
+SSE_DONE = "data: [DONE]\n\n"
+
+
+class ChunkEncoder:
+    """한 응답의 chat.completion.chunk 이벤트 인코더"""
+
+    def __init__(self, response_id: str, created: int, model: str):
+        head = json.dumps(
+            {"id": response_id, "object": "chat.completion.chunk", "created": created, "model": model},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )[:-1]
+        self.head = head
+        self.prefix = f'data: {head},"choices":[{{"index":0,"delta":{{"content":'
+        self.suffix = '},"finish_reason":null}]}\n\n'
+
+    def content(self, text: str) -> str:
+        """delta.content 이벤트"""
+        return self.prefix + encode_basestring(text) + self.suffix
+
+    def role(self) -> str:
+        """스트림 시작 이벤트 (delta.role = assistant)"""
+        return f'data: {self.head},"choices":[{{"index":0,"delta":{{"role":"assistant","content":""}},"finish_reason":null}}]}}\n\n'
+
+    def finish(self, usage: Optional[Dict[str, Any]] = None) -> str:
+        """스트림 종료 이벤트 (finish_reason = stop, 토큰 사용량 포함)"""
+        return (
+            f'data: {self.head},"choices":[{{"index":0,"delta":{{}},"finish_reason":"stop"}}],'
+            f'"usage":{json.dumps(usage, ensure_ascii=False, separators=(",", ":"))}}}\n\n'
+        )
+
+    @staticmethod
+    def comment(data: Dict[str, Any]) -> str:
+        """SSE 주석 줄 (OpenAI 호환 클라이언트는 무시)"""
+        return f": {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def batch_tokens(
+    events: AsyncGenerator[Tuple[str, Any], None],
+    window: float = SSE_FLUSH_MS / 1000,
+    max_chars: int = SSE_FLUSH_CHARS,
+) -> AsyncGenerator[Tuple[str, Any], None]:
+    """연속된 ("token", 텍스트) 이벤트를 짧은 창 안에서 하나로 묶음
+
+    직전 전송 후 window 가 지났으면 바로 보내므로 토큰이 드문드문 올 때는 지연이 없고,
+    빠르게 몰려올 때만 최대 window 동안 모아서 보냅니다. 다른 이벤트가 오면 모은 토큰을 먼저 보냅니다.
+    """
+    if window <= 0:
+        async for item in events:
+            yield item
+        return
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def pump():
+        # 원본 스트림은 한 태스크에서 끝까지 읽음 (컨텍스트 변수 기반 추적 스팬 유지)
+        try:
+            async with contextlib.aclosing(events):
+                async for item in events:
+                    await queue.put(item)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            queue.put_nowait(done)
+
+    task = asyncio.create_task(pump())
+    buffer: List[str] = []
+    size = 0
+    last_flush = float("-inf")
+    deadline = 0.0
+    try:
+        while True:
+            if buffer:
+                try:
+                    item = await asyncio.wait_for(queue.get(), max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    item = None
+            else:
+                item = await queue.get()
+
+            if item is not None and not isinstance(item, tuple):
+                # 종료 또는 오류: 모은 토큰을 먼저 보냄
+                if buffer:
+                    yield "token", "".join(buffer)
+                if item is done:
+                    return
+                raise item
+
+            if item is not None and item[0] == "token":
+                buffer.append(item[1])
+                size += len(item[1])
+                now = loop.time()
+                if len(buffer) == 1:
+                    deadline = now + window
+                if size < max_chars and now - last_flush < window:
+                    continue
+            if buffer:
+                yield "token", "".join(buffer)
+                buffer, size = [], 0
+                last_flush = loop.time()
+            if item is not None and item[0] != "token":
+                yield item
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
@@ -0,0 +1,123 @@
+"""서버 시작 시 미리 준비(warmup)와 준비 상태(readiness) 관리
+
+워커가 뜨면 MCP 서버 연결, OpenAI HTTP 연결, 예약 데이터 로드를 요청을 받기 전에 동시에 진행하고,
+단계별 결과를 기록합니다. 로드 밸런서는 /ready 가 200 일 때만 트래픽을 보내고,
+/live 는 프로세스가 응답 가능한지만 확인합니다.
+
+환경 변수:
+    READY_WAIT: 준비 전에 들어온 요청이 준비를 기다리는 최대 시간 (초, 기본 30)
+    WARMUP_RETRY_MAX: 준비 실패 시 재시도 간격 상한 (초, 기본 30)
+"""
+import asyncio
+import contextlib
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Optional
+
+READY_WAIT = float(os.getenv("READY_WAIT", "30"))
+WARMUP_RETRY_MAX = float(os.getenv("WARMUP_RETRY_MAX", "30"))
+
+# 무거운 모듈 import 전용 스레드 (하나만 두어 같은 모듈을 두 스레드가 동시에 import 하지 않게 함)
+_import_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preload")
+
+
+class NotReadyError(Exception):
+    """워커가 아직 준비되지 않은 경우 (HTTP 503 으로 응답)"""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__(f"서버가 준비 중입니다. 잠시 후 다시 시도해주세요. (Retry-After: {retry_after}s)")
+        self.retry_after = retry_after
+
+
+class Readiness:
+    """준비 단계별 상태 (pending → ok / failed, 필수가 아닌 단계는 실패해도 degraded)"""
+
+    def __init__(self):
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.started = time.monotonic()
+        self.ready_at: Optional[float] = None
+        self.attempts = 0
+
+    @contextlib.asynccontextmanager
+    async def step(self, name: str, required: bool = True) -> AsyncIterator[None]:
+        """단계 하나를 실행하며 소요 시간과 결과를 기록
+
+        필수 단계가 실패하면 예외를 그대로 올리고, 필수가 아닌 단계는 기록만 하고 넘어갑니다.
+        """
+        state = {"status": "pending", "required": required}
+        self.steps[name] = state
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            state["status"] = "failed" if required else "degraded"
+            state["error"] = str(e)
+            if required:
+                raise
+            print(f"⚠️ 준비 단계 실패 ({name}, 계속 진행): {e}")
+        else:
+            state["status"] = "ok"
+        finally:
+            state["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    def mark_ready(self):
+        self.ready_at = time.monotonic()
+        print(f"✅ 준비 완료 ({self.ready_at - self.started:.2f}s, 시도 {self.attempts}회)")
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "attempts": self.attempts,
+            "startup_s": round((self.ready_at or time.monotonic()) - self.started, 2),
+            "steps": self.steps,
+        }
+
+
+def _import_all(modules):
+    for module in modules:
+        importlib.import_module(module)
+
+
+async def preload(*modules: str):
+    """무거운 모듈을 전용 스레드에서 차례로 import
+
+    import 하는 동안에도 이벤트 루프는 /live 에 응답하고 MCP 서버 프로세스 실행 등 다른 준비를 진행합니다.
+    이미 읽은 모듈은 건너뛰며, 이후 함수 안의 import 문은 캐시에서 바로 가져옵니다.
+    """
+    missing = [module for module in modules if module not in sys.modules]
+    if missing:
+        await asyncio.get_running_loop().run_in_executor(_import_executor, _import_all, missing)
+
+
+async def warm_openai(model: Any):
+    """OpenAI HTTP 연결(TCP/TLS)을 미리 열어 첫 요청의 연결 비용을 없앰
+
+    같은 클라이언트의 연결 풀을 채팅 요청이 그대로 재사용합니다. 토큰을 쓰지 않는 모델 목록 조회를 사용합니다.
+    """
+    client = getattr(model, "root_async_client", None)
+    if client is None:
+        return  # 가짜 모델 등 HTTP 클라이언트가 없는 모델
+    await client.models.list()
+
+
+async def retry_until_ready(readiness: Readiness, attempt) -> Any:
+    """attempt() 가 성공할 때까지 간격을 늘려가며 재시도 (워커를 죽이지 않음)"""
+    delay = 1.0
+    while True:
+        readiness.attempts += 1
+        try:
+            result = await attempt()
+        except Exception as e:
+            print(f"❌ 준비 실패, {delay:.0f}s 후 재시도: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX)
+            continue
+        readiness.mark_ready()
+        return result
@@ -0,0 +1,347 @@
+"""여러 워커 프로세스가 함께 쓰는 상태 저장소
+
+세션 활동/토큰 사용량, 대화 체크포인트, 예약 인덱스를 워커 사이에 공유하기 위한
+작은 키-값 + 해시 인터페이스입니다 (Redis 명령의 부분 집합).
+
+- SQLiteBackend: 같은 호스트의 워커들이 하나의 SQLite 파일(WAL)을 공유
+- RedisBackend: 여러 호스트에 걸친 배포용 (Redis 호환 서버, redis 패키지 필요)
+
+메서드는 모두 동기 함수입니다. 이벤트 루프에서는 asyncio.to_thread 로 호출하세요.
+
+환경 변수:
+    STATE_BACKEND: local(기본, 공유 안 함) / sqlite / redis
+    STATE_DB_PATH: SQLite 파일 경로 (기본값은 CHECKPOINT_DB_PATH 와 같은 파일)
+    REDIS_URL: Redis 주소 (기본 redis://localhost:6379/0)
+    STATE_KEY_PREFIX: Redis 키 접두어 (기본 reservation:)
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+STATE_BACKEND = os.getenv("STATE_BACKEND", "local").lower()
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", os.getenv("CHECKPOINT_DB_PATH", "checkpoints.sqlite"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+STATE_KEY_PREFIX = os.getenv("STATE_KEY_PREFIX", "reservation:")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value BLOB,
+    expires_at REAL
+);
+CREATE TABLE IF NOT EXISTS hashes (
+    key TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value BLOB,
+    PRIMARY KEY (key, field)
+);
+CREATE TABLE IF NOT EXISTS hash_expiry (
+    key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS kv_expires_at ON kv(expires_at);
+CREATE INDEX IF NOT EXISTS hash_expiry_expires_at ON hash_expiry(expires_at);
+"""
+
+
+def _bytes(value) -> bytes:
+    if value is None or isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+class StateBackend:
+    """공유 상태 저장소 인터페이스 (만료 시간 ttl 은 초 단위)"""
+
+    kind = "base"
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def set_if_absent(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """키가 없을 때만 저장 (저장했으면 True)"""
+        raise NotImplementedError
+
+    def delete(self, *keys: str):
+        raise NotImplementedError
+
+    def delete_if_equals(self, key: str, value: bytes) -> bool:
+        """값이 같을 때만 삭제 (잠금 소유자만 해제하도록, 삭제했으면 True)"""
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        raise NotImplementedError
+
+    def hget(self, key: str, field: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def hgetall(self, key: str) -> Dict[str, bytes]:
+        raise NotImplementedError
+
+    def hset(self, key: str, mapping: Dict[str, bytes]):
+        raise NotImplementedError
+
+    def hdel(self, key: str, *fields: str):
+        raise NotImplementedError
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        raise NotImplementedError
+
+    def expire(self, key: str, ttl: float):
+        """해시 키의 만료 시간 설정"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteBackend(StateBackend):
+    """SQLite 파일 기반 공유 저장소 (같은 호스트의 여러 프로세스)
+
+    쓰기는 BEGIN IMMEDIATE 로 직렬화하고, 다른 프로세스가 잠근 동안에는 busy_timeout 만큼 기다립니다.
+    만료된 키는 읽을 때 무시하고, 쓰기 시 최대 1초에 한 번 정리합니다.
+    """
+
+    kind = "sqlite"
+
+    def __init__(self, path: str = STATE_DB_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.last_sweep = 0.0
+
+    def _write(self, statements: Iterable[tuple]):
+        """여러 문장을 하나의 쓰기 트랜잭션으로 실행"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in statements:
+                    self.conn.execute(sql, params)
+                self._sweep()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _sweep(self):
+        now = time.time()
+        if now - self.last_sweep < 1.0:
+            return
+        self.last_sweep = now
+        self.conn.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        expired = self.conn.execute("SELECT key FROM hash_expiry WHERE expires_at <= ?", (now,)).fetchall()
+        for (key,) in expired:
+            self.conn.execute("DELETE FROM hashes WHERE key = ?", (key,))
+            self.conn.execute("DELETE FROM hash_expiry WHERE key = ?", (key,))
+
+    def _hash_alive(self, key: str) -> bool:
+        row = self.conn.execute("SELECT expires_at FROM hash_expiry WHERE key = ?", (key,)).fetchone()
+        return row is None or row[0] > time.time()
+
+    @staticmethod
+    def _expires_at(ttl: Optional[float]) -> Optional[float]:
+        return time.time() + ttl if ttl else None
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            ).fetchone()
+        return _bytes(row[0]) if row else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self._write([(
+            "INSERT OR REPLACE INTO kv VALUES (?, ?, ?)", (key, _bytes(value), self._expires_at(ttl))
+        )])
+
+    def set_if_absent(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                self.conn.execute("DELETE FROM kv WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?", (key, now))
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO kv VALUES (?, ?, ?)", (key, _bytes(value), self._expires_at(ttl))
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount == 1
+
+    def delete(self, *keys: str):
+        statements = []
+        for key in keys:
+            statements.append(("DELETE FROM kv WHERE key = ?", (key,)))
+            statements.append(("DELETE FROM hashes WHERE key = ?", (key,)))
+            statements.append(("DELETE FROM hash_expiry WHERE key = ?", (key,)))
+        self._write(statements)
+
+    def delete_if_equals(self, key: str, value: bytes) -> bool:
+        with self.lock:
+            cursor = self.conn.execute(
+                "DELETE FROM kv WHERE key = ? AND value = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, _bytes(value), time.time()),
+            )
+        return cursor.rowcount == 1
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                    (key, time.time()),
+                ).fetchone()
+                value = int(_bytes(row[0])) + amount if row else amount
+                self.conn.execute("INSERT OR REPLACE INTO kv VALUES (?, ?, NULL)", (key, str(value).encode()))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return value
+
+    def hget(self, key: str, field: str) -> Optional[bytes]:
+        with self.lock:
+            if not self._hash_alive(key):
+                return None
+            row = self.conn.execute(
+                "SELECT value FROM hashes WHERE key = ? AND field = ?", (key, field)
+            ).fetchone()
+        return _bytes(row[0]) if row else None
+
+    def hgetall(self, key: str) -> Dict[str, bytes]:
+        with self.lock:
+            if not self._hash_alive(key):
+                return {}
+            rows = self.conn.execute("SELECT field, value FROM hashes WHERE key = ?", (key,)).fetchall()
+        return {field: _bytes(value) for field, value in rows}
+
+    def hset(self, key: str, mapping: Dict[str, bytes]):
+        self._write(
+            ("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?)", (key, field, _bytes(value)))
+            for field, value in mapping.items()
+        )
+
+    def hdel(self, key: str, *fields: str):
+        self._write(
+            ("DELETE FROM hashes WHERE key = ? AND field = ?", (key, field)) for field in fields
+        )
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT value FROM hashes WHERE key = ? AND field = ?", (key, field)
+                ).fetchone()
+                value = int(_bytes(row[0])) + amount if row else amount
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?)", (key, field, str(value).encode())
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return value
+
+    def expire(self, key: str, ttl: float):
+        self._write([(
+            "INSERT OR REPLACE INTO hash_expiry VALUES (?, ?)", (key, time.time() + ttl)
+        )])
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class RedisBackend(StateBackend):
+    """Redis 호환 서버 기반 공유 저장소 (여러 호스트)"""
+
+    kind = "redis"
+
+    _DELETE_IF_EQUALS = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = STATE_KEY_PREFIX):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("STATE_BACKEND=redis 를 사용하려면 redis 패키지를 설치하세요: pip install redis") from e
+        self.url = url
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self._delete_if_equals = self.client.register_script(self._DELETE_IF_EQUALS)
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    @staticmethod
+    def _ms(ttl: Optional[float]) -> Optional[int]:
+        return max(1, int(ttl * 1000)) if ttl else None
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self._key(key))
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self.client.set(self._key(key), value, px=self._ms(ttl))
+
+    def set_if_absent(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        return bool(self.client.set(self._key(key), value, px=self._ms(ttl), nx=True))
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*(self._key(key) for key in keys))
+
+    def delete_if_equals(self, key: str, value: bytes) -> bool:
+        return bool(self._delete_if_equals(keys=[self._key(key)], args=[value]))
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        return int(self.client.incrby(self._key(key), amount))
+
+    def hget(self, key: str, field: str) -> Optional[bytes]:
+        return self.client.hget(self._key(key), field)
+
+    def hgetall(self, key: str) -> Dict[str, bytes]:
+        return {
+            field.decode("utf-8"): value
+            for field, value in self.client.hgetall(self._key(key)).items()
+        }
+
+    def hset(self, key: str, mapping: Dict[str, bytes]):
+        if mapping:
+            self.client.hset(self._key(key), mapping=mapping)
+
+    def hdel(self, key: str, *fields: str):
+        if fields:
+            self.client.hdel(self._key(key), *fields)
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        return int(self.client.hincrby(self._key(key), field, amount))
+
+    def expire(self, key: str, ttl: float):
+        self.client.pexpire(self._key(key), self._ms(ttl))
+
+    def close(self):
+        self.client.close()
+
+
+def create_backend(kind: str = STATE_BACKEND) -> Optional[StateBackend]:
+    """STATE_BACKEND 설정에 맞는 공유 저장소 (local 이면 None: 프로세스 안에서만 상태 유지)"""
+    if kind == "local":
+        return None
+    if kind == "sqlite":
+        return SQLiteBackend()
+    if kind == "redis":
+        return RedisBackend()
+    raise ValueError(f"알 수 없는 STATE_BACKEND: {kind} (local, sqlite, redis 중 하나)")
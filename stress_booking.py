@@ -0,0 +1,153 @@
+"""이중 예약 스트레스 테스트
+
+여러 워커(각자 ReservationStore + 로컬 인덱스)를 한 프로세스 안에 흉내 내고, 같은 날짜의 적은 수의
+시간대로 예약 요청을 대량으로 동시에 보낸 뒤, 최종 시트에 시간이 겹치는 예약이 하나도 없는지 확인합니다.
+워커들은 하나의 SQLite 공유 저장소(state_backend)로 인덱스와 시간대 잠금을 공유하고,
+시트는 쓰기 지연이 있는 메모리 모의 시트를 사용합니다.
+
+    python stress_booking.py --workers 4 --requests 2000
+    python stress_booking.py --no-shared-locks   # 워커 간 잠금을 끄면 이중 예약이 생기는 것을 확인
+
+이중 예약이 하나라도 있으면 종료 코드 1 을 반환합니다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from reservation_index import DEFAULT_COLUMNS, ReservationIndex, parse_a1_range, time_to_minutes
+from reservation_store import ReservationStore
+from scheduler import SchedulingEngine
+from slot_locks import SlotLockManager
+from state_backend import SQLiteBackend
+
+DATE = "2025-09-22"  # 월요일
+SERVICES = ("커트", "드라이", "염색", "펌")
+
+
+class MockSheet:
+    """쓰기 지연이 있는 메모리 시트 (get_sheet_data / update_cells)"""
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.rows: Dict[int, List[str]] = {1: list(DEFAULT_COLUMNS)}
+        self.writes = 0
+
+    async def get_sheet_data(self, args: Dict[str, Any]) -> str:
+        await asyncio.sleep(random.uniform(0, self.latency))
+        last = max(self.rows)
+        return json.dumps({"values": [self.rows.get(row, []) for row in range(1, last + 1)]}, ensure_ascii=False)
+
+    async def update_cells(self, args: Dict[str, Any]) -> str:
+        await asyncio.sleep(random.uniform(0, self.latency))
+        start_col, start_row, _, _ = parse_a1_range(args["range"])
+        for offset, values in enumerate(args["data"]):
+            cells = self.rows.setdefault(start_row + offset, [])
+            cells.extend([""] * (start_col + len(values) - len(cells)))
+            cells[start_col:start_col + len(values)] = values
+        self.writes += 1
+        return "ok"
+
+    def values(self) -> List[List[str]]:
+        return [self.rows.get(row, []) for row in range(1, max(self.rows) + 1)]
+
+
+def count_double_bookings(values: List[List[str]]) -> List[tuple]:
+    """최종 시트에서 시간이 겹치는 예약 쌍"""
+    index = ReservationIndex()
+    index.load(values)
+    scheduler = SchedulingEngine(index)
+    conflicts = []
+    for row in sorted(index.cells):
+        record = index.record(row)
+        start = time_to_minutes(record["time"])
+        if start is None:
+            continue
+        if scheduler.overlaps(record["date"], start, scheduler.duration(record["service"]), ignore_row=row):
+            conflicts.append((row, record["date"], record["time"], record["service"]))
+    return conflicts
+
+
+async def run(args) -> int:
+    sheet = MockSheet(args.latency_ms)
+    path = os.path.join(tempfile.mkdtemp(prefix="stress_booking_"), "state.sqlite")
+    stores = []
+    for _ in range(args.workers):
+        backend = SQLiteBackend(path)
+        locks = SlotLockManager(None if args.no_shared_locks else backend, wait=args.lock_wait)
+        store = ReservationStore(backend=backend, slot_locks=locks)
+        store.calls = {"get_sheet_data": sheet.get_sheet_data, "update_cells": sheet.update_cells}
+        stores.append(store)
+    for store in stores:
+        await store.load()
+
+    slots = [f"{hour:02d}:{minute:02d}" for hour in range(10, 18) for minute in (0, 30)]
+    results: Dict[str, int] = {"success": 0, "taken": 0, "busy": 0, "error": 0}
+    booked: List[Dict[str, Any]] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def request(i: int):
+        store = random.choice(stores)
+        time_ = random.choice(slots)
+        service = random.choice(SERVICES)
+        async with semaphore:
+            try:
+                result = json.loads(await store.append_reservation(f"고객{i}", DATE, time_, service))
+            except Exception as e:
+                results["error"] += 1
+                print(f"❌ 요청 {i} 실패: {e}")
+                return
+        if result["success"]:
+            results["success"] += 1
+            booked.append(result)
+        elif "잠시 후" in result["reason"]:
+            results["busy"] += 1
+        else:
+            results["taken"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(request(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    values = sheet.values()
+    conflicts = count_double_bookings(values)
+    # 성공한 예약이 다른 예약에 덮어써지지 않았는지 확인
+    overwritten = [
+        result for result in booked
+        if values[result["row"] - 1][:1] != [result["reservation"]["name"]]
+    ]
+
+    print(f"📊 워커 {args.workers}개, 요청 {args.requests}건, 동시 {args.concurrency}, {elapsed:.2f}s")
+    print(f"  - 결과: {results}")
+    print(f"  - 시트 쓰기: {sheet.writes}회, 예약 행: {len(values) - 1}")
+    print(f"  - 잠금: {[store.slot_locks.stats() for store in stores][0]}")
+    print(f"  - 겹치는 예약: {len(conflicts)}건, 덮어쓴 예약: {len(overwritten)}건")
+    for conflict in conflicts[:10]:
+        print(f"    ⚠️ {conflict}")
+    ok = not conflicts and not overwritten and results["success"] == len(values) - 1
+    print("✅ 이중 예약 없음" if ok else "❌ 이중 예약 발생")
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="이중 예약 스트레스 테스트")
+    parser.add_argument("--workers", type=int, default=4, help="흉내 낼 워커 수")
+    parser.add_argument("--requests", type=int, default=1000, help="예약 요청 수")
+    parser.add_argument("--concurrency", type=int, default=200, help="동시에 진행할 요청 수")
+    parser.add_argument("--latency-ms", type=float, default=20, help="모의 시트 쓰기 최대 지연 (ms)")
+    parser.add_argument("--lock-wait", type=float, default=30, help="시간대 잠금 최대 대기 시간 (초)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-shared-locks", action="store_true", help="워커 간 잠금 없이 실행 (비교용)")
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
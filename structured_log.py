@@ -0,0 +1,75 @@
+"""요청 경로용 구조화(JSON 한 줄) + 샘플링 로그
+
+로그 기록은 QueueHandler 로 큐에 넣기만 하고, 실제 출력은 별도 스레드(QueueListener)가
+담당하므로 요청 처리 중에 stdout 쓰기로 막히지 않습니다. 대화 내용은 기록하지 않습니다.
+
+환경 변수:
+    LOG_SAMPLE_RATE: 일반 이벤트를 기록할 비율 (기본 0.1, 오류는 항상 기록)
+    LOG_LEVEL: 로그 레벨 (기본 INFO)
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from typing import Any, Optional
+
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+logger = logging.getLogger("reservation_agent")
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging():
+    """비동기 로그 출력 시작 (여러 번 호출해도 한 번만 설정)"""
+    global _listener
+    if _listener is not None:
+        return
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+
+def shutdown_logging():
+    """남은 로그를 모두 출력하고 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_event(event: str, level: int = logging.INFO, sample: bool = True, **fields: Any):
+    """이벤트 1건 기록 (sample=True 면 LOG_SAMPLE_RATE 비율로만 기록)"""
+    if sample and random.random() >= LOG_SAMPLE_RATE:
+        return
+    if _listener is None:
+        setup_logging()
+    if not logger.isEnabledFor(level):
+        return
+    fields.setdefault("sample_rate", LOG_SAMPLE_RATE if sample else 1.0)
+    logger.log(level, event, extra={"fields": fields})
+
+
+def elapsed_ms(started: float) -> float:
+    """time.perf_counter() 기준 경과 시간 (ms)"""
+    return round((time.perf_counter() - started) * 1000, 2)
@@ -0,0 +1,217 @@
+"""MCP 도구 스키마 등록부
+
+MCP 서버가 연결 시 알려준 도구별 입력 스키마(JSON Schema)를 모아 두고, 도구를 호출하기 전에
+인자를 로컬에서 검사합니다. 인자가 잘못된 호출은 원격 왕복(쿼터, 지연) 없이 바로 ToolException 으로
+실패하고, 오류 메시지에 필요한 인자 목록을 함께 넣어 모델이 다음 호출에서 바로 고칠 수 있게 합니다.
+
+스키마는 "서버이름@버전" 단위로 디스크에 저장합니다. 같은 버전인데 스키마가 달라지면 경고 후 갱신하고,
+CLI 등 서버에 연결하기 전에도 마지막으로 본 스키마를 참고할 수 있습니다.
+
+환경 변수:
+    TOOL_SCHEMA_CACHE_PATH: 스키마 캐시 파일 경로 (기본 tool_schemas.json, 빈 값이면 저장하지 않음)
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from langchain_core.tools import BaseTool, ToolException
+
+from reservation_store import ToolCall
+
+TOOL_SCHEMA_CACHE_PATH = os.getenv("TOOL_SCHEMA_CACHE_PATH", "tool_schemas.json")
+
+JSON_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list, tuple),
+    "object": (dict,),
+    "null": (type(None),),
+}
+
+
+def _type_name(value: Any) -> str:
+    for name, types in JSON_TYPES.items():
+        if isinstance(value, types) and not (isinstance(value, bool) and name in ("integer", "number")):
+            return name
+    return type(value).__name__
+
+
+def check_value(schema: Dict[str, Any], value: Any, root: Dict[str, Any], path: str = "") -> List[str]:
+    """MCP 도구 스키마에 쓰이는 JSON Schema 부분 집합으로 값을 검사하고 오류 목록을 반환
+
+    지원: type, enum, required, properties, additionalProperties, items, anyOf/oneOf/allOf, $ref(#/$defs/...)
+    """
+    where = path or "인자"
+    if "$ref" in schema:
+        target: Any = root
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            target = target.get(part, {}) if isinstance(target, dict) else {}
+        return check_value(target, value, root, path)
+    for keyword in ("anyOf", "oneOf"):
+        if keyword in schema:
+            branches = [check_value(branch, value, root, path) for branch in schema[keyword]]
+            if all(branches):
+                return min(branches, key=len)
+    errors: List[str] = []
+    for branch in schema.get("allOf", []):
+        errors += check_value(branch, value, root, path)
+
+    expected = schema.get("type")
+    if expected is not None:
+        allowed = expected if isinstance(expected, list) else [expected]
+        if _type_name(value) not in allowed and not (_type_name(value) == "integer" and "number" in allowed):
+            return errors + [f"'{where}' 은(는) {' | '.join(allowed)} 이어야 합니다 (받은 값: {_type_name(value)})"]
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"'{where}' 은(는) {schema['enum']} 중 하나여야 합니다 (받은 값: {value!r})")
+
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        for name in schema.get("required", []):
+            if name not in value:
+                errors.append(f"필수 인자 '{f'{path}.{name}' if path else name}' 이(가) 없습니다")
+        extra = schema.get("additionalProperties", True)
+        for name, item in value.items():
+            item_path = f"{path}.{name}" if path else name
+            if name in properties:
+                errors += check_value(properties[name], item, root, item_path)
+            elif extra is False:
+                errors.append(f"알 수 없는 인자 '{item_path}'")
+            elif isinstance(extra, dict):
+                errors += check_value(extra, item, root, item_path)
+    elif isinstance(value, (list, tuple)) and isinstance(schema.get("items"), dict):
+        for i, item in enumerate(value):
+            errors += check_value(schema["items"], item, root, f"{where}[{i}]")
+    return errors
+
+
+class ToolArgumentError(ToolException):
+    """도구 인자가 스키마에 맞지 않는 경우 (원격 호출 전에 실패)"""
+
+    def __init__(self, tool: str, errors: List[str], usage: str):
+        super().__init__(f"{tool} 인자 오류: {'; '.join(errors)}. 사용 가능한 인자: {usage}")
+        self.tool = tool
+        self.errors = errors
+
+
+class ToolRegistry:
+    """도구별 입력 스키마 보관 + 호출 전 인자 검사 미들웨어
+
+    사용 예:
+        registry = ToolRegistry()
+        store.use(registry)                                   # bind 전에 (원격 호출 전에 검사)
+        registry.register(pool.server_tools(), pool.server_versions())
+    """
+
+    def __init__(self, cache_path: Optional[str] = TOOL_SCHEMA_CACHE_PATH):
+        self.cache_path = cache_path
+        self.cache: Dict[str, Dict[str, Any]] = self._read_cache()
+        self.schemas: Dict[str, Dict[str, Any]] = {}  # 도구 이름 -> 입력 스키마
+        self.sources: Dict[str, str] = {}  # 도구 이름 -> "서버이름@버전"
+        self.validated = 0
+        self.rejected: Dict[str, int] = {}
+
+    # ---- 스키마 등록 / 캐시 ----
+
+    def _read_cache(self) -> Dict[str, Dict[str, Any]]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 도구 스키마 캐시를 읽지 못했습니다 ({self.cache_path}): {e}")
+            return {}
+
+    def _write_cache(self):
+        if not self.cache_path:
+            return
+        # 여러 워커가 동시에 써도 깨지지 않도록 임시 파일에 쓰고 교체
+        temp = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(self.cache, f, indent=2, ensure_ascii=False)
+            os.replace(temp, self.cache_path)
+        except OSError as e:
+            print(f"⚠️ 도구 스키마 캐시를 저장하지 못했습니다 ({self.cache_path}): {e}")
+
+    def register(self, tools_by_server: Dict[str, List[BaseTool]], versions: Dict[str, str]):
+        """서버별 도구 목록의 입력 스키마를 등록 (연결 시 받은 도구 목록을 그대로 사용, 추가 호출 없음)"""
+        changed = False
+        for server, tools in tools_by_server.items():
+            key = f"{server}@{versions.get(server) or 'unknown'}"
+            schemas = {
+                tool.name: {
+                    "description": tool.description,
+                    "input_schema": tool.args_schema if isinstance(tool.args_schema, dict) else tool.tool_call_schema.model_json_schema(),
+                }
+                for tool in tools
+            }
+            cached = self.cache.get(key)
+            if cached is None:
+                print(f"📐 도구 스키마 저장: {key} ({len(schemas)}개)")
+                changed = True
+            elif cached != schemas:
+                print(f"⚠️ 같은 서버 버전({key})인데 도구 스키마가 바뀌었습니다. 캐시를 갱신합니다.")
+                changed = True
+            self.cache[key] = schemas
+            for name, entry in schemas.items():
+                self.schemas[name] = entry["input_schema"]
+                self.sources[name] = key
+        if changed:
+            self._write_cache()
+
+    def cached_schema(self, tool: str, server: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """디스크 캐시에 있는 도구 스키마 (서버에 연결하기 전에 참고용, 없으면 None)"""
+        if tool in self.schemas:
+            return self.schemas[tool]
+        for key, schemas in self.cache.items():
+            if (server is None or key.split("@", 1)[0] == server) and tool in schemas:
+                return schemas[tool]["input_schema"]
+        return None
+
+    # ---- 인자 검사 ----
+
+    def usage(self, tool: str) -> str:
+        """모델/사람이 읽을 인자 요약 (예: spreadsheet_id: string (필수), range: string | null)"""
+        schema = self.schemas.get(tool) or {}
+        required = set(schema.get("required", []))
+        parts = []
+        for name, prop in schema.get("properties", {}).items():
+            types = [branch.get("type", "any") for branch in prop.get("anyOf", [])] or [prop.get("type", "any")]
+            parts.append(f"{name}: {' | '.join(map(str, types))}{' (필수)' if name in required else ''}")
+        return ", ".join(parts) or "(없음)"
+
+    def fit_args(self, tool: str, candidates: Dict[str, Any]) -> Dict[str, Any]:
+        """후보 값들 중 스키마에 있는 인자만 골라 반환 (인자 이름을 추측해 여러 번 호출하지 않도록)"""
+        properties = (self.schemas.get(tool) or {}).get("properties")
+        if properties is None:
+            return dict(candidates)
+        return {name: value for name, value in candidates.items() if name in properties}
+
+    def check(self, tool: str, args: Dict[str, Any]):
+        """인자가 스키마에 맞지 않으면 ToolArgumentError (스키마를 모르는 도구는 통과)"""
+        schema = self.schemas.get(tool)
+        if schema is None:
+            return
+        self.validated += 1
+        errors = check_value(schema, args, schema)
+        if errors:
+            self.rejected[tool] = self.rejected.get(tool, 0) + 1
+            raise ToolArgumentError(tool, errors, self.usage(tool))
+
+    def __call__(self, name: str, call: ToolCall) -> ToolCall:
+        async def validated(args: Dict[str, Any]) -> Any:
+            self.check(name, args)
+            return await call(args)
+        return validated
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tools": len(self.schemas),
+            "servers": sorted(set(self.sources.values())),
+            "validated": self.validated,
+            "rejected": sum(self.rejected.values()),
+            "rejected_by_tool": dict(self.rejected),
+        }
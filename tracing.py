@@ -0,0 +1,429 @@
+"""요청 단위 추적(tracing, OpenTelemetry SDK)
+
+stream_chat 1회 = 추적(trace) 1개. 그 아래에 모델 호출, 도구 호출, MCP 호출이 자식 스팬으로
+붙고 토큰 수/행 수/재시도 횟수 같은 속성을 기록합니다.
+
+- 스팬 생성/내보내기는 OpenTelemetry SDK (TracerProvider + BatchSpanProcessor) 에 맡김
+- 부모 스팬은 OpenTelemetry 문맥(contextvars 기반)으로 전달 (asyncio 태스크가 생성될 때 문맥이
+  복사되므로 LangGraph 노드/도구 태스크 안에서도 이어짐)
+- 완료된 추적은 최근 TRACE_BUFFER_SIZE 개를 메모리에 보관 (/debug/trace/{id}, RecentTraces 프로세서)
+- 내보내기: otlp 는 OTLP/HTTP(protobuf) 수집기, jsonl 은 스팬 1개당 1줄 (SDK 의 ReadableSpan.to_json 형식)
+
+환경 변수:
+    TRACE_EXPORT: jsonl(기본) / otlp / none
+    TRACE_FILE_PATH: JSONL 파일 경로 (기본 traces.jsonl)
+    TRACE_OTLP_ENDPOINT: OTLP/HTTP 수집기 주소 (기본 http://localhost:4318/v1/traces)
+    TRACE_BUFFER_SIZE: 메모리에 보관할 최근 추적 수 (기본 200)
+"""
+import asyncio
+import contextvars
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from opentelemetry import context as otel_context
+from opentelemetry import trace as otel_trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.id_generator import RandomIdGenerator
+from opentelemetry.trace import StatusCode
+
+from reservation_index import parse_sheet_values
+
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "jsonl").lower()
+TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", "traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+SERVICE_NAME = "reservation-agent"
+
+# 다음에 시작할 루트 스팬의 trace_id (X-Trace-Id 를 응답 전에 정해 두기 위해)
+_preset_trace_id: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("preset_trace_id", default=None)
+# 현재 추적의 루트 스팬 (ReAct 반복 횟수 기록용)
+_root: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("root_span", default=None)
+
+_ids = RandomIdGenerator()
+
+
+def new_trace_id() -> str:
+    return otel_trace.format_trace_id(_ids.generate_trace_id())
+
+
+def trace_id_of(span: otel_trace.Span) -> str:
+    return otel_trace.format_trace_id(span.get_span_context().trace_id)
+
+
+class _PresetIdGenerator(RandomIdGenerator):
+    """start_trace 에 trace_id 가 주어지면 그 값을 쓰는 ID 생성기"""
+
+    def generate_trace_id(self) -> int:
+        return _preset_trace_id.get() or super().generate_trace_id()
+
+
+def _duration_ms(span: ReadableSpan) -> float:
+    if span.start_time is None or span.end_time is None:
+        return 0.0
+    return round((span.end_time - span.start_time) / 1e6, 2)
+
+
+def _status(span: ReadableSpan) -> str:
+    return "error" if span.status.status_code == StatusCode.ERROR else "ok"
+
+
+def _span_dict(span: ReadableSpan) -> Dict[str, Any]:
+    return {
+        "trace_id": otel_trace.format_trace_id(span.context.trace_id),
+        "span_id": otel_trace.format_span_id(span.context.span_id),
+        "parent_id": otel_trace.format_span_id(span.parent.span_id) if span.parent else None,
+        "name": span.name,
+        "start": span.start_time / 1e9 if span.start_time else None,
+        "end": span.end_time / 1e9 if span.end_time else None,
+        "duration_ms": _duration_ms(span),
+        "status": _status(span),
+        "attributes": dict(span.attributes or {}),
+    }
+
+
+class Trace:
+    """완료된 스팬 묶음 (/debug/trace 조회용)"""
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List[ReadableSpan] = []
+
+    @property
+    def root(self) -> Optional[ReadableSpan]:
+        for span in self.spans:
+            if span.parent is None:
+                return span
+        return None
+
+    def summary(self) -> Dict[str, Any]:
+        root = self.root
+        return {
+            "trace_id": self.trace_id,
+            "duration_ms": _duration_ms(root) if root else 0.0,
+            "spans": len(self.spans),
+            "attributes": dict(root.attributes or {}) if root else {},
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        root = self.root
+        spans = sorted(self.spans, key=lambda s: s.start_time or 0)
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name if root else "",
+            "duration_ms": _duration_ms(root) if root else 0.0,
+            "spans": [_span_dict(span) for span in spans],
+        }
+
+    def tree(self) -> List[str]:
+        """스팬을 들여쓰기한 타임라인 (사람이 읽는 용도)"""
+        children: Dict[Optional[int], List[ReadableSpan]] = {}
+        for span in self.spans:
+            children.setdefault(span.parent.span_id if span.parent else None, []).append(span)
+        origin = min((span.start_time or 0 for span in self.spans), default=0)
+        lines = []
+
+        def walk(span: ReadableSpan, depth: int):
+            attrs = " ".join(f"{k}={v}" for k, v in (span.attributes or {}).items())
+            lines.append(
+                f"{'  ' * depth}{span.name} +{((span.start_time or 0) - origin) / 1e6:.1f}ms "
+                f"{_duration_ms(span):.1f}ms [{_status(span)}] {attrs}".rstrip()
+            )
+            for child in sorted(children.get(span.context.span_id, []), key=lambda s: s.start_time or 0):
+                walk(child, depth + 1)
+
+        for root in children.get(None, []):
+            walk(root, 0)
+        return lines
+
+
+class RecentTraces(SpanProcessor):
+    """끝난 스팬을 trace_id 별로 모아 최근 buffer_size 개 추적을 메모리에 보관"""
+
+    def __init__(self, buffer_size: int = TRACE_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.traces: "OrderedDict[str, Trace]" = OrderedDict()
+
+    def on_end(self, span: ReadableSpan):
+        trace_id = trace_id_of(span)
+        trace = self.traces.get(trace_id)
+        if trace is None:
+            trace = self.traces[trace_id] = Trace(trace_id)
+            while len(self.traces) > self.buffer_size:
+                self.traces.popitem(last=False)
+        trace.spans.append(span)
+
+
+class _CountingExporter(SpanExporter):
+    """내보낸 스팬 수/실패 횟수를 세는 래퍼 (/health)"""
+
+    def __init__(self, exporter: SpanExporter):
+        self.exporter = exporter
+        self.exported = 0
+        self.errors = 0
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        try:
+            result = self.exporter.export(spans)
+        except Exception as e:
+            print(f"⚠️ 추적 내보내기 실패: {e}")
+            result = SpanExportResult.FAILURE
+        if result == SpanExportResult.SUCCESS:
+            self.exported += len(spans)
+        else:
+            self.errors += 1
+        return result
+
+    def shutdown(self):
+        self.exporter.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.exporter.force_flush(timeout_millis)
+
+
+class Tracer:
+    """TracerProvider 구성과 루트 스팬(추적) 시작/종료"""
+
+    def __init__(self, export: str = TRACE_EXPORT, buffer_size: int = TRACE_BUFFER_SIZE):
+        self.export = export
+        self.provider = TracerProvider(
+            resource=Resource.create({"service.name": SERVICE_NAME}),
+            id_generator=_PresetIdGenerator(),
+        )
+        self.buffer = RecentTraces(buffer_size)
+        self.provider.add_span_processor(self.buffer)
+        self.tracer = self.provider.get_tracer("tracing")
+        self.exporter: Optional[_CountingExporter] = None
+        self.tokens: Dict[int, tuple] = {}  # 루트 span_id -> (문맥 토큰, attach 한 문맥, 이전 문맥)
+
+    @property
+    def recent(self) -> "OrderedDict[str, Trace]":
+        return self.buffer.traces
+
+    # ---- 스팬 ----
+
+    def start_trace(self, name: str, trace_id: Optional[str] = None, **attributes: Any) -> Span:
+        """루트 스팬 시작 (현재 문맥의 부모 스팬으로 설정)"""
+        preset = _preset_trace_id.set(int(trace_id, 16) if trace_id else None)
+        try:
+            span = self.tracer.start_span(name, context=otel_context.Context(), attributes=attributes)
+        finally:
+            _preset_trace_id.reset(preset)
+        _root.set(span)
+        previous = otel_context.get_current()
+        context = otel_trace.set_span_in_context(span)
+        self.tokens[span.get_span_context().span_id] = (otel_context.attach(context), context, previous)
+        return span
+
+    def end_trace(self, span: Span, error: Optional[BaseException] = None):
+        try:
+            _finish(span, error)
+        finally:
+            entry = self.tokens.pop(span.get_span_context().span_id, None)
+            if entry is not None:
+                _detach(*entry)
+            _root.set(None)
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        return self.recent.get(trace_id)
+
+    # ---- 내보내기 ----
+
+    def start(self):
+        """내보내기 프로세서 등록 (BatchSpanProcessor 가 별도 스레드에서 일괄 전송)"""
+        if self.exporter is not None or self.export not in ("jsonl", "otlp"):
+            return
+        if self.export == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            exporter: SpanExporter = OTLPSpanExporter(endpoint=TRACE_OTLP_ENDPOINT)
+        else:
+            exporter = ConsoleSpanExporter(
+                out=open(TRACE_FILE_PATH, "a", encoding="utf-8"),
+                formatter=lambda span: span.to_json(indent=None) + "\n",
+            )
+        self.exporter = _CountingExporter(exporter)
+        self.provider.add_span_processor(BatchSpanProcessor(self.exporter))
+
+    async def stop(self):
+        """남은 스팬을 내보내고 프로세서 종료 (블로킹이므로 스레드에서)"""
+        await asyncio.to_thread(self.provider.shutdown)
+        if self.exporter is not None:
+            out = getattr(self.exporter.exporter, "out", None)
+            if out is not None:
+                out.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "export": self.export,
+            "buffered": len(self.recent),
+            "exported_spans": self.exporter.exported if self.exporter else 0,
+            "export_errors": self.exporter.errors if self.exporter else 0,
+        }
+
+
+def _detach(token: contextvars.Token, context: otel_context.Context, previous: otel_context.Context):
+    """attach 로 설정한 문맥을 토큰으로 되돌림
+
+    LangChain 은 종료 콜백을 시작 때 Context 를 복사한 다른 Context 에서 부르기도 하는데, 이때는 토큰을
+    쓸 수 없으므로 복사되어 넘어온 현재 값이 이 문맥일 때만 이전 문맥으로 되돌립니다.
+    (시작 때의 Context 에 남은 값은 바깥 스팬의 토큰을 되돌릴 때 함께 정리됩니다.)
+    """
+    try:
+        token.var.reset(token)
+    except ValueError:
+        if otel_context.get_current() is context:
+            token.var.set(previous)
+
+
+def _finish(span: Span, error: Optional[BaseException] = None):
+    if error is not None:
+        span.set_attribute("error", str(error)[:300])
+        span.set_status(StatusCode.ERROR, str(error)[:300])
+    span.end()
+
+
+# ---- 현재 스팬 헬퍼 ----
+
+def current_span() -> Optional[Span]:
+    span = otel_trace.get_current_span()
+    return span if span.get_span_context().is_valid else None
+
+
+def annotate(**attributes: Any):
+    """현재 스팬에 속성 추가 (추적 중이 아니면 무시)"""
+    span = current_span()
+    if span is not None:
+        span.set_attributes(attributes)
+
+
+def _increment(span: Span, key: str, amount: int):
+    span.set_attribute(key, (span.attributes or {}).get(key, 0) + amount)
+
+
+def increment(key: str, amount: int = 1):
+    span = current_span()
+    if span is not None:
+        _increment(span, key, amount)
+
+
+def _row_count(name: str, args: Dict[str, Any], result: Any) -> Optional[int]:
+    if name == "get_sheet_data":
+        return len(parse_sheet_values(result))
+    if name == "update_cells":
+        return len(args.get("data") or [])
+    if name == "batch_update_cells":
+        return sum(len(data) for data in (args.get("ranges") or {}).values())
+    return None
+
+
+def traced_tool(name: str, call):
+    """MCP 도구 호출 스팬 미들웨어 (ReservationStore.use 에 가장 바깥으로 등록)
+
+    안쪽 미들웨어(캐시/쿼터 조절)는 annotate/increment 로 이 스팬에 캐시 적중, 재시도 횟수를 기록합니다.
+    """
+    async def traced(args: Dict[str, Any]) -> Any:
+        if current_span() is None:
+            return await call(args)
+        span = tracer.tracer.start_span(f"mcp.{name}", attributes={"tool": name})
+        token = otel_context.attach(otel_trace.set_span_in_context(span))
+        try:
+            result = await call(args)
+            rows = _row_count(name, args, result)
+            if rows is not None:
+                span.set_attribute("rows", rows)
+            _finish(span)
+            return result
+        except Exception as e:
+            _finish(span, e)
+            raise
+        finally:
+            otel_context.detach(token)
+    return traced
+
+
+class TracingCallback(AsyncCallbackHandler):
+    """모델 호출/도구 호출을 현재 추적의 자식 스팬으로 기록하는 LangChain 콜백
+
+    run_inline 으로 호출되어 스팬을 현재 문맥에 설정하므로, 도구 안에서 일어나는 MCP 호출이
+    해당 도구 스팬 아래에 붙습니다.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.spans: Dict[UUID, tuple] = {}  # run_id -> (span, 문맥 토큰, attach 한 문맥, 이전 문맥)
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, **attributes: Any):
+        # 문맥의 현재 스팬이 가장 정확한 부모 (MCP 미들웨어 스팬 안에서 호출된 도구 등)
+        parent = current_span()
+        if parent is None and parent_run_id in self.spans:
+            parent = self.spans[parent_run_id][0]
+        if parent is None:
+            return
+        span = tracer.tracer.start_span(name, context=otel_trace.set_span_in_context(parent), attributes=attributes)
+        previous = otel_context.get_current()
+        context = otel_trace.set_span_in_context(span, previous)
+        self.spans[run_id] = (span, otel_context.attach(context), context, previous)
+
+    def _finish(self, run_id: UUID, error: Optional[BaseException] = None, **attributes: Any) -> Optional[Span]:
+        entry = self.spans.pop(run_id, None)
+        if entry is None:
+            return None
+        span, token, context, previous = entry
+        try:
+            span.set_attributes(attributes)
+            _finish(span, error)
+        finally:
+            _detach(token, context, previous)
+        return span
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        metadata = kwargs.get("metadata") or {}
+        model = metadata.get("ls_model_name") or (serialized or {}).get("name") or "unknown"
+        self._start(run_id, parent_run_id, "llm", model=model, input_messages=len(messages[0]) if messages else 0)
+        root = _root.get()
+        if run_id in self.spans and root is not None:
+            # ReAct 반복 횟수 = 모델 호출 수 (루트 스팬에 기록)
+            _increment(root, "iterations", 1)
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        attributes = {}
+        try:
+            message = response.generations[0][0].message
+            usage = getattr(message, "usage_metadata", None) or {}
+            attributes = {
+                "input_tokens": usage.get("input_tokens", 0),
+                "output_tokens": usage.get("output_tokens", 0),
+                "tool_calls": len(getattr(message, "tool_calls", None) or []),
+            }
+        except (AttributeError, IndexError):
+            pass
+        self._finish(run_id, **attributes)
+
+    async def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error)
+
+    async def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = (serialized or {}).get("name", "unknown")
+        self._start(run_id, parent_run_id, f"tool.{name}", tool=name, input_chars=len(str(input_str)))
+
+    async def on_tool_end(self, output, *, run_id, **kwargs):
+        content = getattr(output, "content", output)
+        self._finish(run_id, output_chars=len(str(content)))
+
+    async def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error)
+
+
+tracer = Tracer()